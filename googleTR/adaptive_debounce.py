@@ -0,0 +1,99 @@
+import time
+from collections import deque
+
+
+class AdaptiveDebouncer:
+    """根据打字节奏和实测请求延迟决定防抖时间
+
+    - 连续输入时，等待时间略大于用户的平均按键间隔，避免在单词中途发请求；
+    - 后端越慢，提前发出的请求越可能被作废，等待时间随平均延迟适当加长；
+    - 一次性粘贴大段文本时立即翻译；
+    - 规范化后与上次发送内容相同的文本（例如只改了末尾空白）不再发送。
+
+    所有决策都记录在decisions中，便于调参。
+    """
+
+    def __init__(self, min_delay=80, max_delay=800, language_delay=100, paste_chars=20,
+                 alpha=0.3, clock=time.monotonic):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.language_delay = language_delay
+        self.paste_chars = paste_chars
+        self.alpha = alpha
+        self.clock = clock
+        # 平均按键间隔和平均请求延迟（毫秒），初始值对应原来的固定300毫秒
+        self.typing_interval = 200.0
+        self.latency = 200.0
+        self.last_keystroke = None
+        self.last_length = 0
+        self.last_sent = None
+        self.scheduled = 0
+        self.skipped = 0
+        self.decisions = deque(maxlen=200)
+
+    def on_keystroke(self, text_length):
+        """文本变化时调用，返回本次应等待的毫秒数"""
+        now = self.clock()
+        if self.last_keystroke is not None:
+            interval = (now - self.last_keystroke) * 1000
+            # 长时间停顿不计入打字节奏
+            if interval < 2000:
+                self.typing_interval += self.alpha * (interval - self.typing_interval)
+        self.last_keystroke = now
+
+        changed = abs(text_length - self.last_length)
+        self.last_length = text_length
+        if changed >= self.paste_chars:
+            delay = self.min_delay
+            reason = "paste"
+        else:
+            delay = 1.5 * self.typing_interval + 0.5 * self.latency
+            reason = "typing"
+        delay = int(min(self.max_delay, max(self.min_delay, delay)))
+        self.scheduled += 1
+        self._record(reason, delay)
+        return delay
+
+    def on_language_changed(self):
+        self._record("language", self.language_delay)
+        return self.language_delay
+
+    @staticmethod
+    def normalize(text):
+        return text.rstrip()
+
+    def should_send(self, text, source_lang, target_lang):
+        """与上次发送的内容相同时返回False，否则记为已发送并返回True"""
+        key = (source_lang, target_lang, self.normalize(text))
+        if key == self.last_sent:
+            self.skipped += 1
+            self._record("skip", 0)
+            return False
+        self.last_sent = key
+        return True
+
+    def forget(self):
+        """上次请求失败或文本被清空后调用，允许再次发送相同内容"""
+        self.last_sent = None
+        self.last_length = 0
+
+    def record_latency(self, seconds):
+        self.latency += self.alpha * (seconds * 1000 - self.latency)
+
+    def _record(self, reason, delay):
+        self.decisions.append({
+            "time": time.time(),
+            "reason": reason,
+            "delay_ms": delay,
+            "typing_interval_ms": round(self.typing_interval, 1),
+            "latency_ms": round(self.latency, 1),
+        })
+
+    def stats(self):
+        return {
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "typing_interval_ms": round(self.typing_interval, 1),
+            "latency_ms": round(self.latency, 1),
+            "recent_decisions": list(self.decisions)[-20:],
+        }
@@ -0,0 +1,113 @@
+"""异步翻译接口
+
+    import asyncio
+    from async_client import translate, translate_many
+
+    async def main():
+        print(await translate("你好", "zh-CN", "en"))
+        print(await translate_many(["早上好", "晚安"], "zh-CN", "en"))
+
+    asyncio.run(main())
+
+所有请求共用一个保持长连接的连接池，同时进行的请求数受max_concurrency限制。
+同步代码可以直接调用translate_sync。
+"""
+import asyncio
+import weakref
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from translate_engine import API_URL, TranslationEngine
+
+
+class AsyncTranslator:
+    """基于asyncio的翻译客户端
+
+    实际的HTTP请求由TranslationEngine在线程池中完成，连接池大小与并发上限一致，
+    因此每个连接都能被复用，不会为每条文本重新建立TLS连接。
+    """
+
+    def __init__(self, max_concurrency=16, timeout=15, cache=None, api_url=API_URL, limiter=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.engine = TranslationEngine(cache=cache, pool_size=max_concurrency, timeout=timeout,
+                                        api_url=api_url, limiter=limiter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="translate")
+        # 信号量与事件循环绑定，同一客户端可在多个事件循环中使用
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    async def translate(self, text, source_lang="zh-CN", target_lang="en", timeout=None):
+        """翻译一段文本，timeout为本次调用的总超时（秒）"""
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        timeout = timeout or self.timeout
+        async with semaphore:
+            # wait_for只能取消asyncio一侧的等待，超时同时传给引擎，线程中的请求和重试也在超时后结束
+            call = functools.partial(self.engine.translate, text, source_lang, target_lang, timeout=timeout)
+            future = loop.run_in_executor(self.executor, call)
+            return await asyncio.wait_for(future, timeout)
+
+    async def stream_many(self, texts, source_lang="zh-CN", target_lang="en", timeout=None):
+        """按输入顺序逐个产出译文，同时在途的任务数有上限，适合超大的可迭代对象"""
+        window = deque()
+        try:
+            for text in texts:
+                window.append(asyncio.ensure_future(self.translate(text, source_lang, target_lang, timeout)))
+                if len(window) >= self.max_concurrency * 2:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+        finally:
+            # 某个任务出错或调用方提前停止迭代时，取消其余在途任务并等待其结束，
+            # 避免出现"Task exception was never retrieved"
+            for task in window:
+                task.cancel()
+            if window:
+                await asyncio.gather(*window, return_exceptions=True)
+
+    async def translate_many(self, texts, source_lang="zh-CN", target_lang="en", timeout=None):
+        """批量翻译，返回与输入顺序一致的译文列表"""
+        return [result async for result in self.stream_many(texts, source_lang, target_lang, timeout)]
+
+    def translate_sync(self, text, source_lang="zh-CN", target_lang="en"):
+        """同步翻译，与异步接口共用同一连接池"""
+        return self.engine.translate(text, source_lang, target_lang)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.engine.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client():
+    """进程内共享的默认客户端"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = AsyncTranslator()
+        return _default_client
+
+
+async def translate(text, source_lang="zh-CN", target_lang="en", timeout=None):
+    return await get_default_client().translate(text, source_lang, target_lang, timeout)
+
+
+async def translate_many(texts, source_lang="zh-CN", target_lang="en", timeout=None):
+    return await get_default_client().translate_many(texts, source_lang, target_lang, timeout)
+
+
+def translate_sync(text, source_lang="zh-CN", target_lang="en"):
+    return get_default_client().translate_sync(text, source_lang, target_lang)
@@ -0,0 +1,138 @@
+import time
+import threading
+from urllib.parse import urlparse
+
+from translate_api import API_URL, build_request_url, build_request_body, parse_response
+from rate_limiter import CircuitBreaker, CircuitOpenError
+from request_metrics import LatencyHistogram
+
+
+class Backend:
+    """一个翻译接口：地址、请求构造和响应解析
+
+    默认使用Google翻译接口的格式（本地替身服务fake_server.py也兼容）；
+    其他服务商可继承并覆盖build_url/build_body/parse，parse需返回译文字符串。
+    每个接口有独立的熔断器和耗时统计，用于故障切换和对冲请求。
+    """
+
+    def __init__(self, api_url=API_URL, name=None, failure_threshold=3, recovery_timeout=15.0, clock=time.monotonic):
+        self.api_url = api_url
+        self.name = name or urlparse(api_url).netloc or api_url
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout, clock)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def build_url(self, source_lang, target_lang):
+        return build_request_url(source_lang, target_lang, self.api_url)
+
+    def build_body(self, text):
+        return build_request_body(text)
+
+    def parse(self, data):
+        return parse_response(data)
+
+    def stats(self):
+        return {
+            "url": self.api_url,
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            **self.latency.summary(),
+        }
+
+
+class BackendPool:
+    """按配置顺序选择健康的接口，并根据最近的耗时分布决定何时发出对冲请求
+
+    连续失败的接口熔断一段时间，期间请求自动切换到下一个接口。
+    """
+
+    def __init__(self, backends, hedge_percentile=95, min_samples=20, default_hedge_ms=1500, min_hedge_ms=50):
+        if not backends:
+            raise ValueError("至少需要一个翻译接口")
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_ms = default_hedge_ms
+        self.min_hedge_ms = min_hedge_ms
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_urls(cls, urls, **kwargs):
+        return cls([Backend(url) for url in urls], **kwargs)
+
+    def choose(self, exclude=(), fallback=True):
+        """选择第一个可用（未熔断）的接口，优先跳过exclude中的接口
+
+        fallback为False时不退回exclude中的接口，没有其他可用接口时返回None；
+        所有接口都熔断时抛出CircuitOpenError。
+        """
+        with self.lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            if fallback:
+                candidates += [b for b in self.backends if b in exclude]
+            retry_in = None
+            for backend in candidates:
+                try:
+                    backend.breaker.check()
+                except CircuitOpenError as e:
+                    retry_in = e.retry_in if retry_in is None else min(retry_in, e.retry_in)
+                    continue
+                return backend
+            if not fallback:
+                return None
+            raise CircuitOpenError(retry_in or 1.0)
+
+    def release_probe(self, backend):
+        """选中的接口处于半开状态（本请求即探测请求），但请求被取消或未发送时释放探测名额"""
+        with self.lock:
+            backend.breaker.release_probe()
+
+    def has_alternative(self, backend):
+        """除backend外是否还有未熔断的接口"""
+        with self.lock:
+            return any(b is not backend and b.breaker.state != CircuitBreaker.OPEN for b in self.backends)
+
+    def hedge_delay_ms(self):
+        """对冲等待时间：最近请求耗时的hedge_percentile分位数；只有一个接口时返回None（不对冲）"""
+        with self.lock:
+            return self._hedge_delay_ms()
+
+    def _hedge_delay_ms(self):
+        if len(self.backends) < 2:
+            return None
+        samples = sorted(s for b in self.backends for s in b.latency.samples)
+        if len(samples) < self.min_samples:
+            return self.default_hedge_ms
+        value = samples[min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))]
+        return max(self.min_hedge_ms, int(value))
+
+    def record(self, backend, latency_ms, ok):
+        """记录一次请求的结果；失败计入该接口的熔断器"""
+        with self.lock:
+            backend.requests += 1
+            if ok:
+                backend.latency.observe(latency_ms)
+                backend.breaker.record_success()
+            else:
+                backend.errors += 1
+                backend.breaker.record_failure()
+
+    def record_hedge(self, backend, won=False):
+        with self.lock:
+            if won:
+                backend.hedge_wins += 1
+            else:
+                backend.hedges += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hedge_delay_ms": self._hedge_delay_ms(),
+                "backends": {backend.name: backend.stats() for backend in self.backends},
+            }
@@ -0,0 +1,178 @@
+import os
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QCheckBox,
+                             QFileDialog, QApplication)
+from PyQt5.QtCore import QTimer
+
+from batch_queue import BatchJob
+
+
+STATE_NAMES = {
+    BatchJob.PREPARING: "准备中",
+    BatchJob.QUEUED: "排队中",
+    BatchJob.RUNNING: "翻译中",
+    BatchJob.PAUSED: "已暂停",
+    BatchJob.DONE: "已完成",
+    BatchJob.FAILED: "失败",
+    BatchJob.CANCELLED: "已取消",
+}
+
+
+class BatchPanel(QDialog):
+    """批量翻译面板：加入文件或粘贴的文本，查看进度，暂停、继续、取消任务"""
+
+    def __init__(self, translator):
+        super(BatchPanel, self).__init__(translator)
+        self.translator = translator
+        self.setWindowTitle("批量翻译")
+        self.resize(720, 560)
+        self.setAcceptDrops(True)
+
+        layout = QVBoxLayout(self)
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["名称", "语言", "状态", "进度", "字符数"])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        job_buttons = QHBoxLayout()
+        for text, handler in (("暂停", self.pause_selected), ("继续", self.resume_selected),
+                              ("取消", self.cancel_selected), ("复制译文", self.copy_selected),
+                              ("保存译文...", self.save_selected), ("清除已结束", self.remove_finished)):
+            button = QPushButton(text)
+            button.clicked.connect(handler)
+            job_buttons.addWidget(button)
+        job_buttons.addStretch()
+        layout.addLayout(job_buttons)
+
+        layout.addWidget(QLabel("粘贴要翻译的文本（也可以把文件拖到此窗口），使用主窗口当前选择的语言："))
+        self.paste_text = QPlainTextEdit()
+        self.paste_text.setMaximumHeight(120)
+        layout.addWidget(self.paste_text)
+
+        add_buttons = QHBoxLayout()
+        self.split_lines = QCheckBox("每行作为一个任务")
+        add_buttons.addWidget(self.split_lines)
+        add_buttons.addStretch()
+        add_text = QPushButton("加入队列")
+        add_text.clicked.connect(self.add_pasted)
+        add_files = QPushButton("添加文件...")
+        add_files.clicked.connect(self.choose_files)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        add_buttons.addWidget(add_text)
+        add_buttons.addWidget(add_files)
+        add_buttons.addWidget(close_button)
+        layout.addLayout(add_buttons)
+
+        # 面板打开期间每0.5秒刷新进度
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start(500)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        self.add_files([url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()])
+
+    def choose_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "添加文件", "", "文本文件 (*.txt *.md *.srt);;所有文件 (*)")
+        self.add_files(paths)
+
+    def add_files(self, paths):
+        for path in paths:
+            if os.path.isfile(path):
+                self.translator.add_batch_job(os.path.basename(path), None, path)
+        self.refresh()
+
+    def add_pasted(self):
+        text = self.paste_text.toPlainText()
+        if not text.strip():
+            return
+        if self.split_lines.isChecked():
+            for line in text.splitlines():
+                if line.strip():
+                    self.translator.add_batch_job(line.strip()[:40], line)
+        else:
+            self.translator.add_batch_job(text.strip().splitlines()[0][:40], text)
+        self.paste_text.clear()
+        self.refresh()
+
+    def selected_jobs(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        jobs = self.translator.batch_queue.jobs
+        return [jobs[row] for row in sorted(rows) if row < len(jobs)]
+
+    def pause_selected(self):
+        for job in self.selected_jobs():
+            self.translator.pause_batch_job(job)
+        self.refresh()
+
+    def resume_selected(self):
+        for job in self.selected_jobs():
+            self.translator.resume_batch_job(job)
+        self.refresh()
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            self.translator.cancel_batch_job(job)
+        self.refresh()
+
+    def copy_selected(self):
+        jobs = [job for job in self.selected_jobs() if job.state == BatchJob.DONE]
+        if jobs:
+            QApplication.clipboard().setText("\n".join(job.result() for job in jobs))
+
+    def save_selected(self):
+        for job in self.selected_jobs():
+            if job.state != BatchJob.DONE:
+                continue
+            if job.path:
+                base, ext = os.path.splitext(job.path)
+                default = f"{base}.{job.target_lang}{ext or '.txt'}"
+            else:
+                default = f"{job.name}.{job.target_lang}.txt"
+            path, _ = QFileDialog.getSaveFileName(self, "保存译文", default, "文本文件 (*.txt);;所有文件 (*)")
+            if path:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(job.result())
+
+    def remove_finished(self):
+        self.translator.batch_queue.remove_finished()
+        self.table.clearSelection()
+        self.refresh()
+
+    def refresh(self):
+        queue = self.translator.batch_queue
+        stats = queue.stats()
+        self.summary.setText(
+            f"队列中 {stats['queue_depth']} 块  进行中 {stats['in_flight']} 个请求  "
+            f"吞吐 {stats['chars_per_minute']} 字符/分钟  已完成 {stats['completed_chunks']} 块  "
+            f"为前台翻译让行 {stats['held_for_interactive']} 次"
+        )
+        self.table.setRowCount(len(queue.jobs))
+        for row, job in enumerate(queue.jobs):
+            state = STATE_NAMES[job.state] + (f"：{job.error}" if job.error else "")
+            values = (job.name, f"{job.source_lang} → {job.target_lang}", state,
+                      f"{job.done}/{job.total}（{job.progress:.0%}）", str(job.chars))
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
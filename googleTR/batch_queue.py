@@ -0,0 +1,244 @@
+import time
+import itertools
+from collections import deque
+
+from segmenter import MAX_CHUNK_CHARS, split_segments, group_missing, assemble
+
+
+def read_text_file(path):
+    """读取文本文件，依次尝试UTF-8和GB18030编码"""
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "gb18030"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+class BatchJob:
+    """一个后台翻译任务（一个文件或一段粘贴的文本）"""
+
+    PREPARING = "preparing"
+    QUEUED = "queued"
+    RUNNING = "running"
+    PAUSED = "paused"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    # 任务可能在线程池中创建，用count保证编号唯一
+    _ids = itertools.count(1)
+
+    def __init__(self, name, text, source_lang, target_lang, max_chars=MAX_CHUNK_CHARS, path=None):
+        self.id = next(BatchJob._ids)
+        self.name = name
+        self.path = path
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        # text为None时由prepare从path读取文件
+        self.text = text
+        self.chars = len(text) if text is not None else 0
+        self.max_chars = max_chars
+        self.segments = []
+        self.translations = {}
+        self.pending = deque()
+        self.total = 0
+        self.done = 0
+        self.in_flight = 0
+        self.attempts = {}
+        self.error = None
+        self.created = time.monotonic()
+        self.finished = None
+        self.state = self.PREPARING
+
+    def prepare(self, cache=None):
+        """读取文件（未给出text时）、分段并从缓存取已有的译文，生成待请求的分块；不改变状态，可在后台线程调用"""
+        if self.text is None:
+            self.text = read_text_file(self.path)
+            self.chars = len(self.text)
+        segments = split_segments(self.text)
+        known = {}
+        if cache is not None:
+            for segment in segments:
+                if segment.body and segment.body not in known:
+                    cached = cache.get(self.source_lang, self.target_lang, segment.body)
+                    if cached is not None:
+                        known[segment.body] = cached
+        pending = deque(group_missing(segments, known, self.max_chars))
+        self.segments, self.translations, self.pending, self.total = segments, known, pending, len(pending)
+        self.text = None
+
+    @property
+    def active(self):
+        return self.state in (self.QUEUED, self.RUNNING)
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def result(self):
+        """拼接译文（未完成的分段为空）"""
+        return assemble(self.segments, self.translations)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "languages": f"{self.source_lang}->{self.target_lang}",
+            "state": self.state,
+            "chars": self.chars,
+            "done": self.done,
+            "total": self.total,
+            "in_flight": self.in_flight,
+            "error": self.error,
+        }
+
+
+class BatchQueue:
+    """后台批量翻译队列：按加入顺序逐个分块发出，支持暂停、继续、取消
+
+    只负责任务状态和分块的调度顺序，发送时机（前台空闲、并发和限流余量）由调用方决定。
+    只在界面线程中使用。
+    """
+
+    def __init__(self, max_chars=MAX_CHUNK_CHARS, throughput_window=60.0, clock=time.monotonic):
+        self.max_chars = max_chars
+        self.throughput_window = throughput_window
+        self.clock = clock
+        self.jobs = []
+        self.completed_chunks = 0
+        self.failed_chunks = 0
+        self.held = 0
+        self.recent = deque()
+
+    def add(self, name, text, source_lang, target_lang, cache=None, path=None):
+        """加入一个任务并立即准备；缓存中已有的分段不再请求"""
+        job = self.create(name, text, source_lang, target_lang, path)
+        job.prepare(cache)
+        self.ready(job)
+        return job
+
+    def create(self, name, text, source_lang, target_lang, path=None):
+        """加入一个待准备的任务，由调用方（可在后台线程）调用job.prepare后再调用ready"""
+        job = BatchJob(name, text, source_lang, target_lang, self.max_chars, path)
+        self.jobs.append(job)
+        return job
+
+    def ready(self, job, error=None):
+        """任务准备完成，开始排队；准备期间已取消的任务保持取消状态"""
+        if job.state != BatchJob.PREPARING:
+            job.pending.clear()
+            return
+        if error is not None:
+            job.state = BatchJob.FAILED
+            job.error = error
+            job.finished = self.clock()
+        elif job.pending:
+            job.state = BatchJob.QUEUED
+        else:
+            job.state = BatchJob.DONE
+            job.finished = self.clock()
+
+    def next_request(self):
+        """取下一个待发送的分块，返回 (任务, 分段列表)；没有时返回 (None, None)"""
+        for job in self.jobs:
+            if job.active and job.pending:
+                job.state = BatchJob.RUNNING
+                job.in_flight += 1
+                return job, job.pending.popleft()
+        return None, None
+
+    def complete(self, job, bodies, mapping):
+        """一个分块完成，返回该任务是否已全部完成"""
+        job.in_flight -= 1
+        if job.state == BatchJob.CANCELLED:
+            return False
+        job.translations.update(mapping)
+        job.done += 1
+        self.completed_chunks += 1
+        now = self.clock()
+        self.recent.append((now, len("\n".join(bodies))))
+        if job.done == job.total:
+            job.state = BatchJob.DONE
+            job.finished = now
+            return True
+        return False
+
+    def attempts(self, job, bodies):
+        """该分块因错误已重试的次数"""
+        return job.attempts.get("\n".join(bodies), 0)
+
+    def retry(self, job, bodies, counted=True):
+        """分块放回队首；counted为False时（限流、取消）不计入重试次数"""
+        job.in_flight -= 1
+        if counted:
+            key = "\n".join(bodies)
+            job.attempts[key] = job.attempts.get(key, 0) + 1
+        if job.state != BatchJob.CANCELLED:
+            job.pending.appendleft(bodies)
+
+    def fail(self, job, bodies, error):
+        """分块多次重试仍失败：任务停在失败状态，该分块放回队首，继续时从它开始"""
+        job.in_flight -= 1
+        self.failed_chunks += 1
+        if job.state != BatchJob.CANCELLED:
+            job.pending.appendleft(bodies)
+            job.state = BatchJob.FAILED
+            job.error = error
+            job.finished = self.clock()
+
+    def pause(self, job):
+        """暂停：不再发出新的分块，已发出的请求照常完成"""
+        if job.active:
+            job.state = BatchJob.PAUSED
+
+    def resume(self, job):
+        if job.state == BatchJob.FAILED and not job.total:
+            # 准备阶段出错，没有可重试的分块
+            return
+        if job.state == BatchJob.PAUSED:
+            job.state = BatchJob.RUNNING if job.done or job.in_flight else BatchJob.QUEUED
+        elif job.state == BatchJob.FAILED:
+            job.state = BatchJob.RUNNING
+            job.error = None
+            job.finished = None
+            job.attempts.clear()
+
+    def cancel(self, job):
+        if job.state not in (BatchJob.DONE, BatchJob.CANCELLED):
+            job.state = BatchJob.CANCELLED
+            job.pending.clear()
+            job.finished = self.clock()
+
+    def remove_finished(self):
+        """移除已完成、已取消和失败的任务"""
+        self.jobs = [job for job in self.jobs
+                     if job.active or job.state in (BatchJob.PAUSED, BatchJob.PREPARING) or job.in_flight]
+
+    def queue_depth(self):
+        """待发送的分块数（不含暂停的任务）"""
+        return sum(len(job.pending) for job in self.jobs if job.active)
+
+    def throughput(self):
+        """最近throughput_window秒内每分钟完成的字符数"""
+        now = self.clock()
+        while self.recent and now - self.recent[0][0] > self.throughput_window:
+            self.recent.popleft()
+        return round(sum(chars for _, chars in self.recent) * 60 / self.throughput_window)
+
+    def stats(self):
+        states = {}
+        for job in self.jobs:
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            "jobs": len(self.jobs),
+            "states": states,
+            "queue_depth": self.queue_depth(),
+            "in_flight": sum(job.in_flight for job in self.jobs),
+            "completed_chunks": self.completed_chunks,
+            "failed_chunks": self.failed_chunks,
+            "held_for_interactive": self.held,
+            "chars_per_minute": self.throughput(),
+        }
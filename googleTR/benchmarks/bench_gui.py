@@ -0,0 +1,136 @@
+"""交互路径基准：在Qt offscreen平台上向source_text回放脚本化输入
+
+测量每次按键到target_text显示对应（或更新）译文的延迟、每次编辑产生的请求数以及CPU时间。
+
+    python benchmarks/bench_gui.py --interval 120 --latency 150 --output gui.json
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import FakeServerProcess, add_server_arguments, latency_summary, write_result
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+from translation_cache import TranslationCache
+from google_translator import GoogleTranslator
+
+
+DEFAULT_SCRIPT = [
+    "今天天气很好，我们去公园散步吧。",
+    "这个应用可以实时翻译输入的文本。",
+    "请把翻译结果复制到剪贴板。",
+]
+
+
+class TypingReplay:
+    """按给定节奏逐字输入，并把每次按键与最终显示的译文对应起来"""
+
+    def __init__(self, app, window, script, interval, jitter, pause, timeout):
+        self.app = app
+        self.window = window
+        self.keystrokes = []
+        self.actions = []
+        for line_index, line in enumerate(script):
+            for ch in line:
+                self.actions.append((ch, interval))
+            if line_index < len(script) - 1:
+                self.actions.append(("\n", pause))
+        self.jitter = jitter
+        self.timeout = timeout
+        self.resolved = 0
+        self.latencies = []
+        self.finished_typing = None
+        window.target_text.textChanged.connect(self.on_result)
+
+    def start(self):
+        QTimer.singleShot(0, self.type_next)
+
+    def type_next(self):
+        if not self.actions:
+            self.finished_typing = time.perf_counter()
+            QTimer.singleShot(int(self.timeout * 1000), self.app.quit)
+            return
+        ch, delay = self.actions.pop(0)
+        cursor = self.window.source_text.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(ch)
+        self.keystrokes.append((time.perf_counter(), self.window.source_text.toPlainText().rstrip()))
+        delay = max(1, int(delay + random.uniform(-self.jitter, self.jitter)))
+        QTimer.singleShot(delay, self.type_next)
+
+    def on_result(self):
+        """根据替身服务的译文格式（每行加“[语言] ”前缀）还原出对应的原文版本"""
+        now = time.perf_counter()
+        lines = self.window.target_text.toPlainText().split("\n")
+        source = "\n".join(line.split("] ", 1)[1] if line.startswith("[") and "] " in line else line
+                           for line in lines).rstrip()
+        matched = None
+        for index in range(len(self.keystrokes) - 1, self.resolved - 1, -1):
+            if self.keystrokes[index][1] == source:
+                matched = index
+                break
+        if matched is None:
+            return
+        for index in range(self.resolved, matched + 1):
+            self.latencies.append(now - self.keystrokes[index][0])
+        self.resolved = matched + 1
+        if self.finished_typing is not None and self.resolved == len(self.keystrokes):
+            self.app.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按键到译文显示的延迟基准")
+    parser.add_argument("--script", help="要输入的文本文件，每行一段，默认使用内置文本")
+    parser.add_argument("--interval", type=float, default=120, help="平均按键间隔（毫秒）")
+    parser.add_argument("--typing-jitter", type=float, default=40, help="按键间隔抖动（±毫秒）")
+    parser.add_argument("--pause", type=float, default=800, help="每段之间的停顿（毫秒）")
+    parser.add_argument("--timeout", type=float, default=10, help="输入结束后等待结果的最长时间（秒）")
+    parser.add_argument("--seed", type=int, default=1)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = [line.rstrip("\n") for line in f if line.strip()]
+
+    app = QApplication(sys.argv[:1])
+    with FakeServerProcess(args.latency, args.jitter, args.error_rate, args.padding) as server:
+        window = GoogleTranslator(cache=TranslationCache(":memory:"), api_url=server.url)
+        window.rate_limiter.bucket.rate = window.rate_limiter.bucket.burst = 1e6
+        window.show()
+        replay = TypingReplay(app, window, script, args.interval, args.typing_jitter, args.pause, args.timeout)
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        replay.start()
+        app.exec_()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        server_stats = server.stats()
+
+    edits = len(replay.keystrokes)
+    write_result("gui_keystroke_latency", {
+        "config": {"interval_ms": args.interval, "typing_jitter_ms": args.typing_jitter,
+                   "pause_ms": args.pause, "edits": edits, **server.config},
+        "keystroke_to_result": latency_summary(replay.latencies),
+        "unresolved_keystrokes": edits - replay.resolved,
+        "server_requests": server_stats["requests"],
+        "requests_per_edit": round(server_stats["requests"] / edits, 3) if edits else None,
+        "cancelled_requests": window.cancelled_requests,
+        "coalesced_requests": window.coalesced_requests,
+        "wall_time_s": round(wall, 3),
+        "cpu_time_s": round(cpu, 3),
+        "debouncer": {key: value for key, value in window.debouncer.stats().items() if key != "recent_decisions"},
+    }, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
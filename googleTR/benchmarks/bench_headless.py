@@ -0,0 +1,65 @@
+"""无界面吞吐量基准：通过AsyncTranslator向替身服务批量翻译
+
+    python benchmarks/bench_headless.py --count 2000 --concurrency 32 --output headless.json
+"""
+import time
+import asyncio
+import argparse
+
+from common import FakeServerProcess, add_server_arguments, latency_summary, write_result
+from async_client import AsyncTranslator
+from rate_limiter import RateLimiter
+
+
+async def run_batch(client, texts):
+    latencies = []
+
+    async def one(text):
+        start = time.perf_counter()
+        result = await client.translate(text, "zh-CN", "en")
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    results = await asyncio.gather(*(one(text) for text in texts))
+    return results, latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量翻译吞吐量基准")
+    parser.add_argument("--count", type=int, default=1000, help="翻译的文本条数")
+    parser.add_argument("--unique", type=float, default=0.5, help="不重复文本的比例")
+    parser.add_argument("--concurrency", type=int, default=16, help="最大并发请求数")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    unique = max(1, int(args.count * args.unique))
+    texts = [f"第{i % unique}条测试文本，用于测量吞吐量。" for i in range(args.count)]
+
+    with FakeServerProcess(args.latency, args.jitter, args.error_rate, args.padding) as server:
+        # 基准测试只测量网络路径：不使用缓存，限流放宽到不影响结果
+        limiter = RateLimiter(rate=1e6, burst=1e6)
+        client = AsyncTranslator(max_concurrency=args.concurrency, api_url=server.url, limiter=limiter)
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        results, latencies = asyncio.run(run_batch(client, texts))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        engine_stats = client.engine.stats()
+        client.close()
+        server_stats = server.stats()
+
+    write_result("headless_throughput", {
+        "config": {"count": args.count, "unique": unique, "concurrency": args.concurrency, **server.config},
+        "wall_time_s": round(wall, 3),
+        "cpu_time_s": round(cpu, 3),
+        "strings_per_s": round(len(results) / wall, 1),
+        "latency": latency_summary(latencies),
+        "server_requests": server_stats["requests"],
+        "requests_per_string": round(server_stats["requests"] / len(texts), 3),
+        "coalesced": engine_stats["single_flight"]["coalesced"],
+    }, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
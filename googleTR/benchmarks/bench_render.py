@@ -0,0 +1,93 @@
+"""结果渲染基准：比较旧的QTextEdit.setText与纯文本分批追加显示大结果的耗时和内存
+
+每种方式在独立子进程中运行，内存取进程峰值RSS（仅类Unix系统可用）。
+
+    python benchmarks/bench_render.py --size-mb 5 --output render.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import write_result
+
+MODES = ("rich_text", "plain_chunked")
+
+
+def make_text(size_mb):
+    line = "这是用于测量渲染性能的一行翻译结果 The quick brown fox jumps over the lazy dog.\n"
+    return line * (int(size_mb * 1024 * 1024) // len(line.encode("utf-8")))
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_mode(mode, size_mb):
+    """在当前进程中渲染一次，返回耗时和内存"""
+    from PyQt5.QtWidgets import QApplication, QTextEdit
+    from google_translator import CopyableTextEdit
+
+    app = QApplication([])
+    text = make_text(size_mb)
+    widget = QTextEdit() if mode == "rich_text" else CopyableTextEdit()
+    widget.resize(800, 600)
+    widget.show()
+    app.processEvents()
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "rich_text":
+        widget.setText(text)
+    else:
+        widget.setResult(text)
+    first_paint = time.perf_counter() - start
+    # 分批追加时等待所有批次插入完成
+    while mode == "plain_chunked" and widget.pending:
+        app.processEvents()
+    app.processEvents()
+    total = time.perf_counter() - start
+
+    return {
+        "chars": len(text),
+        "first_batch_s": round(first_paint, 3),
+        "total_s": round(total, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="大结果渲染耗时与内存基准")
+    parser.add_argument("--size-mb", type=float, default=5, help="结果文本大小（MB，UTF-8）")
+    parser.add_argument("--output", help="结果JSON文件，默认输出到标准输出")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.size_mb)))
+        return 0
+
+    result = {"config": {"size_mb": args.size_mb}}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--size-mb", str(args.size_mb)],
+            stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+        result[mode] = json.loads(output.strip().splitlines()[-1])
+    write_result("render_large_result", result, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+"""基准测试公用工具：启动替身服务、统计分位数、写出JSON结果"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from urllib.request import urlopen
+
+# 让基准测试脚本可以直接导入应用模块
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def add_server_arguments(parser):
+    """替身服务相关的命令行参数"""
+    parser.add_argument("--latency", type=float, default=150, help="替身服务延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=50, help="延迟抖动（±毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="替身服务返回500的比例")
+    parser.add_argument("--padding", type=int, default=0, help="响应附加的填充字节数")
+    parser.add_argument("--output", help="结果JSON文件，默认输出到标准输出")
+
+
+class FakeServerProcess:
+    """在独立进程中运行替身服务，避免服务端的CPU时间计入被测进程"""
+
+    def __init__(self, latency=0, jitter=0, error_rate=0.0, padding=0):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(APP_DIR, "fake_server.py"), "--port", "0",
+             "--latency", str(latency), "--jitter", str(jitter),
+             "--error-rate", str(error_rate), "--padding", str(padding)],
+            stdout=subprocess.PIPE, text=True
+        )
+        self.url = self.process.stdout.readline().strip()
+        self.config = {"latency_ms": latency, "jitter_ms": jitter, "error_rate": error_rate, "padding": padding}
+
+    def stats(self):
+        base = self.url.split("/translate_a/")[0]
+        with urlopen(f"{base}/stats") as response:
+            return json.loads(response.read())
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def percentile(values, pct):
+    """线性插值的分位数，values为空时返回None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def latency_summary(seconds):
+    """把秒为单位的样本汇总为毫秒分位数"""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "p50_ms": _round(percentile(ms, 50)),
+        "p95_ms": _round(percentile(ms, 95)),
+        "p99_ms": _round(percentile(ms, 99)),
+        "max_ms": _round(max(ms) if ms else None),
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def write_result(name, result, output=None):
+    """写出机器可读的结果，附带运行环境信息，便于CI对比"""
+    document = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "result": result,
+    }
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,139 @@
+import json
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton,
+                             QFileDialog, QLabel)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+
+
+PHASE_NAMES = {
+    "queue": "排队",
+    "connect": "建立连接(DNS/TLS)",
+    "ttfb": "首字节",
+    "download": "下载",
+    "parse": "解析",
+    "render": "渲染",
+    "total": "总计",
+    "main_thread": "主线程处理",
+    "ttfb_new_connection": "首字节(新连接)",
+    "ttfb_reused_connection": "首字节(复用连接)",
+}
+
+
+class DiagnosticsPanel(QDialog):
+    """诊断面板：显示请求耗时分布和各组件状态，支持导出"""
+
+    def __init__(self, translator):
+        super(DiagnosticsPanel, self).__init__(translator)
+        self.translator = translator
+        self.setWindowTitle("诊断")
+        self.resize(640, 520)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("请求耗时（毫秒，最近1000个请求）"))
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setFont(QFont("Consolas", 10))
+        layout.addWidget(self.view)
+
+        button_layout = QHBoxLayout()
+        export_json = QPushButton("导出JSON")
+        export_json.clicked.connect(self.export_json)
+        export_prometheus = QPushButton("导出Prometheus")
+        export_prometheus.clicked.connect(self.export_prometheus)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(export_json)
+        button_layout.addWidget(export_prometheus)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        # 面板打开期间每秒刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        snapshot = self.translator.diagnostics_snapshot()
+        requests = snapshot["requests"]
+        lines = [f"{'阶段':<16}{'次数':>8}{'平均':>10}{'p50':>10}{'p95':>10}{'p99':>10}"]
+        for phase, summary in requests["phases"].items():
+            lines.append(
+                f"{PHASE_NAMES.get(phase, phase):<16}{summary['count']:>8}"
+                f"{_fmt(summary['mean_ms']):>10}{_fmt(summary['p50_ms']):>10}"
+                f"{_fmt(summary['p95_ms']):>10}{_fmt(summary['p99_ms']):>10}"
+            )
+        lines.append("")
+        lines.append(f"请求: {requests['requests']}  失败: {requests['errors']}  接收字节: {requests['bytes']}")
+        first = requests["first_request"]
+        if first is not None:
+            lines.append(f"首个请求: {'已预热' if first['prewarmed'] else '未预热'}  "
+                         f"{'新建连接' if first['new_connection'] else '复用连接'}  "
+                         f"首字节 {_fmt(first['ttfb_ms'])}ms  总计 {_fmt(first['total_ms'])}ms")
+        lines.append(f"主线程处理超过 {requests['main_thread_budget_ms']}ms 的响应: {requests['main_thread_over_budget']}")
+        for section in ("counters", "cache", "rate_limiter", "prefetch", "memory", "history", "batch"):
+            lines.append("")
+            lines.append(f"[{section}]")
+            for key, value in snapshot[section].items():
+                lines.append(f"  {key}: {value}")
+        backends = snapshot["backends"]
+        lines.append("")
+        lines.append(f"[backends]  对冲等待: {backends['hedge_delay_ms'] if backends['hedge_delay_ms'] is not None else '-'}ms")
+        for name, backend in backends["backends"].items():
+            lines.append(f"  {name}: {backend['state']}  请求 {backend['requests']}  失败 {backend['errors']}  "
+                         f"对冲 {backend['hedges']}/胜出 {backend['hedge_wins']}  "
+                         f"p50 {_fmt(backend['p50_ms'])}ms  p95 {_fmt(backend['p95_ms'])}ms")
+        stalls = snapshot["stalls"]
+        lateness = stalls["event_loop_lateness"]
+        lines.append("")
+        lines.append(f"[stalls]  超过{stalls['threshold_ms']}ms无响应: {stalls['stalls']}次  "
+                     f"累计 {stalls['stalled_ms']}ms  最长 {stalls['max_stall_ms']}ms")
+        lines.append(f"  事件循环延迟: p50 {_fmt(lateness['p50_ms'])}ms  p95 {_fmt(lateness['p95_ms'])}ms  "
+                     f"p99 {_fmt(lateness['p99_ms'])}ms")
+        for stall in reversed(stalls["recent"]):
+            lines.append(f"  - {stall['duration_ms']}ms  {stall['handler']}")
+            for entry in stall["stack"][-4:]:
+                lines.append(f"      {entry}")
+        frames = snapshot["frames"]
+        lines.append("")
+        lines.append(f"[frames]  加载动画: {_fmt(frames['fps'])}/{frames['expected_fps']} fps  "
+                     f"掉帧 {frames['dropped_frames']}/{frames['frames']}  "
+                     f"绘制 p50 {_fmt(frames['paint']['p50_ms'])}ms  p95 {_fmt(frames['paint']['p95_ms'])}ms")
+        debounce = dict(snapshot["debounce"])
+        recent = debounce.pop("recent_decisions", [])
+        lines.append("")
+        lines.append("[debounce]")
+        for key, value in debounce.items():
+            lines.append(f"  {key}: {value}")
+        for decision in recent[-5:]:
+            lines.append(f"  - {decision['reason']}: {decision['delay_ms']}ms")
+
+        scroll = self.view.verticalScrollBar().value()
+        self.view.setPlainText("\n".join(lines))
+        self.view.verticalScrollBar().setValue(scroll)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出JSON", "googletr_metrics.json", "JSON (*.json)")
+        if path:
+            data = self.translator.diagnostics_snapshot()
+            data["requests"] = json.loads(self.translator.request_metrics.export_json())
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def export_prometheus(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出Prometheus", "googletr_metrics.prom", "Prometheus (*.prom *.txt)")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.translator.request_metrics.export_prometheus())
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.1f}"
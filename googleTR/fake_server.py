@@ -0,0 +1,175 @@
+"""本地翻译接口替身
+
+模拟 translate.googleapis.com/translate_a/single 的响应格式，可配置延迟、
+抖动、错误率、限流（429）比例和响应大小，用于在不联网的情况下测试限流、
+重试和熔断逻辑，也是基准测试（benchmarks/）使用的后端。
+
+    python fake_server.py --port 8765 --latency 200 --throttle-rate 0.1
+    python translate_cli.py input.txt --api-url http://127.0.0.1:8765/translate_a/single
+"""
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def fake_translate(text, target_lang, padding=0):
+    """按行生成“译文”，保留换行结构，格式与Google翻译API一致
+
+    padding为附加在无关字段中的填充字节数，用于模拟较大的响应。
+    """
+    sentences = []
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        end = "\n" if i < len(lines) - 1 else ""
+        sentences.append([f"[{target_lang}] {line}{end}", f"{line}{end}", None, None, 3])
+    return [sentences, None, "auto", "x" * padding]
+
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # 每个TCP连接调用一次，用于观察连接复用（预热、keep-alive）
+        super().setup()
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with self.server.lock:
+                body = json.dumps(self.server.stats).encode("utf-8")
+            self.send_body(200, body, {"Content-Type": "application/json"})
+            return
+        self.respond(parse_qs(url.query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        params = parse_qs(urlparse(self.path).query)
+        params.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+        self.respond(params)
+
+    def respond(self, params):
+        config = self.server.config
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+        delay = config["latency"] + random.uniform(-config["jitter"], config["jitter"])
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < config["throttle_rate"]:
+            with self.server.lock:
+                self.server.stats["throttled"] += 1
+            self.send_body(429, b"", {"Retry-After": str(config["retry_after"])})
+            return
+        if roll < config["throttle_rate"] + config["error_rate"]:
+            with self.server.lock:
+                self.server.stats["errors"] += 1
+            self.send_body(500, b"")
+            return
+
+        text = params.get("q", [""])[0]
+        target_lang = params.get("tl", ["en"])[0]
+        body = json.dumps(fake_translate(text, target_lang, config["padding"]), ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        # 与真实接口一样，客户端接受gzip且响应较大时压缩
+        if len(body) > 1024 and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+            with self.server.lock:
+                self.server.stats["compressed"] += 1
+        self.send_body(200, body, headers)
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已中止请求（过时请求、对冲中落后的一方）
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTranslateServer:
+    """在后台线程中运行的替身服务，port为0时自动分配端口"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0, error_rate=0.0, throttle_rate=0.0, retry_after=1,
+                 jitter=0, padding=0):
+        self.httpd = ThreadingHTTPServer((host, port), FakeTranslateHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.stats = {"requests": 0, "throttled": 0, "errors": 0, "connections": 0, "compressed": 0}
+        self.httpd.config = {
+            "latency": latency,
+            "error_rate": error_rate,
+            "throttle_rate": throttle_rate,
+            "retry_after": retry_after,
+            "jitter": jitter,
+            "padding": padding,
+        }
+        self.thread = None
+
+    @property
+    def config(self):
+        """运行中可直接修改的配置"""
+        return self.httpd.config
+
+    @property
+    def stats(self):
+        return dict(self.httpd.stats)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/translate_a/single"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地翻译接口替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="每个请求的延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟的随机抖动范围（±毫秒）")
+    parser.add_argument("--padding", type=int, default=0, help="响应中附加的填充字节数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回500的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="返回429的比例")
+    parser.add_argument("--retry-after", type=int, default=1, help="429响应中的Retry-After（秒）")
+    args = parser.parse_args(argv)
+
+    server = FakeTranslateServer(args.host, args.port, args.latency, args.error_rate,
+                                 args.throttle_rate, args.retry_after, args.jitter, args.padding)
+    # 第一行输出服务地址，供基准测试脚本读取
+    print(server.url, flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,66 @@
 import sys
-import requests
-import json
+import time
+from startup_profile import StartupProfiler
+# --profile-startup需在导入其他模块之前开始计时，才能统计各模块的导入耗时
+startup_profiler = StartupProfiler(track_imports="--profile-startup" in sys.argv)
+
+import argparse
+import importlib
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QTextEdit, QPushButton, QLabel, 
+                             QHBoxLayout, QPlainTextEdit, QPushButton, QLabel, 
                              QComboBox, QMessageBox, QAction, QMenu, QToolBar,
                              QStatusBar, QSplitter, QFrame, QShortcut, QGraphicsOpacityEffect)
-from PyQt5.QtCore import Qt, QSize, QUrl, QTranslator, pyqtSignal, QPropertyAnimation, QEasingCurve, QTimer, QThread, QObject
-from PyQt5.QtGui import QFont, QIcon, QClipboard, QKeySequence, QColor, QPalette, QLinearGradient, QRadialGradient, QBrush, QPainter
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PyQt5.QtCore import Qt, QSize, QUrl, QTranslator, pyqtSignal, QPropertyAnimation, QEasingCurve, QTimer, QThread, QObject, QThreadPool
+from PyQt5.QtGui import QFont, QIcon, QClipboard, QKeySequence, QColor, QPalette, QLinearGradient, QRadialGradient, QBrush, QPainter, QTextCursor
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QSslConfiguration, QSslSocket
+from segmenter import split_segments, group_missing, translated_prefix_end, assemble
+from translate_api import API_URL, LANGUAGE_CODES, get_language_code
+from rate_limiter import shared_limiter, CircuitBreaker, CircuitOpenError
+from adaptive_debounce import AdaptiveDebouncer
+# 缓存、预取、批量队列、卡顿监测等模块不在此导入，由start_services和对应属性在窗口首次绘制后导入
+
+startup_profiler.mark("imports")
+
+# 加载动画每帧间隔（毫秒），降低更新频率，减少卡顿
+LOADING_FRAME_MS = 80
+# 同时进行的翻译请求数上限
+MAX_CONCURRENT_REQUESTS = 4
+# 后台批量翻译最多占用的并发数，其余留给前台输入的翻译
+MAX_BATCH_CONCURRENT = 2
+# 后台批量翻译只在限流器剩余至少这么多令牌时发送，为前台请求保留余量
+BATCH_RESERVE_TOKENS = 5
+# 前台翻译进行中时，每隔多久（毫秒）检查一次能否继续后台批量翻译
+BATCH_HOLD_RETRY_MS = 200
+# 超过该长度的文本按块逐步显示译文
+STREAM_THRESHOLD = 5000
+# 翻译完成后输入停顿多久（毫秒）开始预取其他目标语言
+PREFETCH_IDLE_MS = 1500
+# 译文显示后输入停顿多久（毫秒）记入翻译历史，连续输入过程中的中间结果不单独记录
+HISTORY_IDLE_MS = 3000
+# 每隔多久（毫秒）检查一次翻译历史是否需要整理，长时间不关闭的窗口也会按期整理
+HISTORY_COMPACT_CHECK_MS = 3600 * 1000
+# 待请求的分段不超过该数量时查询翻译记忆，全部找到近似译文则先显示
+MAX_PROVISIONAL_SEGMENTS = 20
+# 空闲时每隔多久（毫秒）检查一次到翻译接口的连接，断开则重新建立
+KEEPALIVE_INTERVAL_MS = 60000
+# 单个请求的传输超时（毫秒），超时后按失败处理并切换接口重试
+REQUEST_TIMEOUT_MS = 15000
+# 同一分块因网络错误、超时或5xx最多重试的次数（优先换用其他接口）
+MAX_FAILOVER_RETRIES = 2
+# 启动耗时目标（毫秒，从进程导入本模块起计）：首次绘制窗口、可以开始翻译
+FIRST_PAINT_TARGET_MS = 150
+INTERACTIVE_TARGET_MS = 200
+# 本地识别的置信度达到该值时自动切换源语言
+DETECT_CONFIDENCE = 0.3
 
 
 class LoadingIndicator(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, frame_monitor=None):
         super(LoadingIndicator, self).__init__(parent)
+        # 记录每帧的绘制耗时和实际帧率
+        self.frame_monitor = frame_monitor
         self.setFixedSize(40, 40)
         self.angle = 0
         self.timer = QTimer(self)
@@ -25,6 +73,7 @@ class LoadingIndicator(QWidget):
         self.update()
         
     def paintEvent(self, event):
+        started = time.perf_counter()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         painter.translate(self.width() / 2, self.height() / 2)
@@ -38,10 +87,13 @@ class LoadingIndicator(QWidget):
             color.setAlpha(alpha)
             painter.setBrush(color)
             painter.drawRoundedRect(-4, -15, 8, 12, 4, 4)
+        painter.end()
+        if self.frame_monitor is not None:
+            self.frame_monitor.record_frame((time.perf_counter() - started) * 1000)
             
     def start(self):
         self.setVisible(True)
-        self.timer.start(80)  # 降低更新频率，减少卡顿
+        self.timer.start(LOADING_FRAME_MS)
         
     def stop(self):
         self.timer.stop()
@@ -72,14 +124,32 @@ class SimpleButton(QPushButton):
         """)
 
 
-class CopyableTextEdit(QTextEdit):
-    """带右键复制功能的文本编辑器"""
+class CopyableTextEdit(QPlainTextEdit):
+    """带右键复制功能的纯文本结果框
+
+    结果分批追加到文档末尾，每次事件循环最多插入 BATCH_CHARS 个字符；
+    显示内容不超过 MAX_DISPLAY_CHARS，超出部分只保留在内存中，复制时仍是完整译文。
+    """
+    BATCH_CHARS = 256 * 1024
+    MAX_DISPLAY_CHARS = 2 * 1024 * 1024
+    
     def __init__(self, parent=None):
         super(CopyableTextEdit, self).__init__(parent)
         self.setReadOnly(True)
+        # 只读结果框不需要撤销栈，避免大文本在内存中多存一份
+        self.setUndoRedoEnabled(False)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.showContextMenu)
         self.statusBar = None
+        self.parts = []
+        self.pending = deque()
+        self.pendingOffset = 0
+        self.displayed = 0
+        self.truncated = False
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(0)
+        self.flushTimer.timeout.connect(self.flushPending)
         
     def setStatusBar(self, statusBar):
         self.statusBar = statusBar
@@ -92,9 +162,10 @@ class CopyableTextEdit(QTextEdit):
         menu.exec_(self.mapToGlobal(position))
         
     def copyAll(self):
-        if self.toPlainText():
+        text = self.fullText()
+        if text:
             clipboard = QApplication.clipboard()
-            clipboard.setText(self.toPlainText())
+            clipboard.setText(text)
             if self.statusBar:
                 self.statusBar.showMessage("已复制翻译结果到剪贴板", 3000)
     
@@ -102,20 +173,93 @@ class CopyableTextEdit(QTextEdit):
     def mouseDoubleClickEvent(self, event):
         self.copyAll()
         super().mouseDoubleClickEvent(event)
-
-    # 设置文本的同时将内容复制到剪贴板
-    def setTextAndCopy(self, text):
-        self.setText(text)
+    
+    # 完整结果（包括尚未显示或超出显示上限的部分）
+    def fullText(self):
+        return "".join(self.parts)
+    
+    def clear(self):
+        self.flushTimer.stop()
+        self.parts = []
+        self.pending.clear()
+        self.pendingOffset = 0
+        self.displayed = 0
+        self.truncated = False
+        super().clear()
+    
+    # 在末尾追加文本，用于长文档逐块显示；第一批立即插入，其余留到后续事件循环
+    def appendChunk(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        if self.truncated:
+            return
+        self.pending.append(text)
+        if not self.flushTimer.isActive():
+            self.flushPending()
+    
+    def flushPending(self):
+        budget = self.BATCH_CHARS
+        pieces = []
+        while self.pending and budget > 0:
+            text = self.pending[0]
+            piece = text[self.pendingOffset:self.pendingOffset + budget]
+            pieces.append(piece)
+            budget -= len(piece)
+            self.pendingOffset += len(piece)
+            if self.pendingOffset >= len(text):
+                self.pending.popleft()
+                self.pendingOffset = 0
+        text = "".join(pieces)
+        
+        room = self.MAX_DISPLAY_CHARS - self.displayed
+        if len(text) > room:
+            text = text[:room] + f"\n\n……（结果过长，仅显示前 {self.MAX_DISPLAY_CHARS} 个字符，复制可获取完整译文）"
+            self.truncated = True
+            self.pending.clear()
+            self.pendingOffset = 0
+        
+        # 插入期间暂停重绘，整批作为一次编辑提交，只触发一次布局
+        self.setUpdatesEnabled(False)
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        self.setUpdatesEnabled(True)
+        self.displayed += len(text)
+        
+        if self.pending:
+            self.flushTimer.start()
+    
+    # 替换全部内容
+    def setResult(self, text):
+        self.clear()
+        self.appendChunk(text)
+    
+    # 将完整结果复制到剪贴板
+    def copyResult(self, text):
         if text:
             clipboard = QApplication.clipboard()
             clipboard.setText(text)
             if self.statusBar:
                 self.statusBar.showMessage("翻译结果已自动复制到剪贴板", 3000)
+    
+    # 设置文本的同时将内容复制到剪贴板
+    def setTextAndCopy(self, text):
+        self.setResult(text)
+        self.copyResult(text)
 
 
 class GoogleTranslator(QMainWindow):
-    def __init__(self):
+    # 窗口首次绘制后延迟初始化的组件（网络、缓存、翻译记忆）全部就绪
+    startup_finished = pyqtSignal()
+    
+    def __init__(self, cache=None, api_url=API_URL, trace_log=None, usage=None, memory=None, prewarm=True,
+                 backends=None, startup_profiler=None, stall_log=None, stall_threshold_ms=None,
+                 history=None):
         super().__init__()
+        self.startup_profiler = startup_profiler if startup_profiler is not None else StartupProfiler()
         self.setWindowTitle("谷歌翻译")
         self.setMinimumSize(800, 500)
         
@@ -125,7 +269,7 @@ class GoogleTranslator(QMainWindow):
                 background-color: #1e1e1e;
                 color: #e0e0e0;
             }
-            QTextEdit {
+            QPlainTextEdit {
                 font-family: 'Microsoft YaHei', 'SimHei', sans-serif;
                 font-size: 14px;
                 padding: 10px;
@@ -134,7 +278,7 @@ class GoogleTranslator(QMainWindow):
                 background-color: #2d2d2d;
                 color: #e0e0e0;
             }
-            QTextEdit:focus {
+            QPlainTextEdit:focus {
                 border: 1px solid #4285f4;
             }
             QLabel {
@@ -233,42 +377,304 @@ class GoogleTranslator(QMainWindow):
                 border: 1px solid #444444;
                 padding: 15px;
             }
+            
+            /* 以下为原文、结果区域的样式，统一写在窗口样式表中，不再逐个部件设置样式表 */
+            #sourceFrame, #sourceFrame * {
+                background-color: rgba(45, 45, 45, 225);
+            }
+            #targetFrame, #targetFrame * {
+                background-color: #252525;
+                border: 1px solid #333333;
+                border-radius: 5px;
+            }
+            #resultHeader, #resultHeader * {
+                background-color: #333333;
+                border-top-left-radius: 5px;
+                border-top-right-radius: 5px;
+                padding: 5px;
+            }
+            #targetLabel {
+                color: #e0e0e0;
+                font-weight: bold;
+            }
+            #targetFrame #resultTextEdit {
+                border-top: none;
+                border-top-left-radius: 0px;
+                border-top-right-radius: 0px;
+                padding: 15px;
+                font-size: 15px;
+                line-height: 1.5;
+            }
         """)
         
+        # 先设置调色板再创建子部件，避免调色板变化逐个传播到已创建的部件
+        self.apply_dark_theme()
+        
         # 创建主窗口部件和布局
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
         
+        # 创建状态栏（需在翻译界面之前创建，结果框会引用它）
+        self.statusBar = QStatusBar()
+        self.setStatusBar(self.statusBar)
+        self.statusBar.showMessage("就绪")
+        
         # 创建工具栏
         self.create_toolbar()
         
         # 创建翻译界面
         self.create_translation_interface()
+        self.startup_profiler.mark("widgets")
         
-        # 创建状态栏
-        self.statusBar = QStatusBar()
-        self.setStatusBar(self.statusBar)
-        self.statusBar.showMessage("就绪")
+        # 网络管理器、翻译缓存、翻译记忆、翻译历史和预取在窗口首次绘制后才创建（见start_services），
+        # 在此之前用到时由对应属性按需创建
+        self._network_manager = None
+        self._cache = cache
+        self._memory = memory
+        self._memory_writer = None
+        self._history = history
+        self._prefetcher = None
+        self.first_paint_done = False
+        self.services_started = False
+        # 正在进行的请求 -> (请求代次, (源语言, 目标语言, 原文))
+        self.pending_requests = {}
+        # 每次发起翻译代次加一，旧代次的响应一律丢弃
+        self.request_generation = 0
+        self.cancelled_requests = 0
+        self.stale_replies = 0
+        # 在途请求的 (源语言, 目标语言, 请求正文) -> reply，相同的请求直接沿用
+        self.inflight_keys = {}
+        self.coalesced_requests = 0
+        # 每个请求使用的接口及发送时间；对冲请求与原请求互为sibling
+        self.reply_backends = {}
+        self.hedge_siblings = {}
+        self.hedge_replies = set()
+        # 主动中止的请求（过时、对冲落后），与传输超时区分
+        self.aborted_replies = set()
+        # 占用了熔断探测名额的请求（限流器、请求 -> 接口），没有计入结果时需释放，否则熔断器一直等待
+        self.limiter_probes = set()
+        self.backend_probes = {}
+        self.hedges_sent = 0
+        self.failover_retries = 0
+        self.request_timeouts = 0
+        # 当前翻译任务（分段、已得到的译文、待完成的请求数）
+        self.current_job = None
+        # 每个请求的耗时记录，汇总到直方图，可在诊断面板查看和导出
+        self.request_timings = {}
+        self.trace_log = trace_log
+        self._request_metrics = None
+        # 诊断面板在第一次打开时才导入和创建
+        self.diagnostics_panel = None
+        # 大响应在线程池中解析，结果通过信号交回主线程
+        self.thread_pool = QThreadPool.globalInstance()
+        self.parse_tasks = {}
+        self.parse_token = 0
+        
+        # 翻译接口：可配置多个（含本地替身服务），按顺序选择健康的接口；
+        # 请求超过最近耗时的p95仍未返回时向另一个接口发出对冲请求，先返回者生效
+        self.api_url = api_url
+        self._backends = backends
+        
+        # 窗口显示后立即预先建立到翻译接口的连接（DNS + TCP + TLS），第一次翻译不再等待握手；
+        # 空闲期间定时检查，连接被关闭后重新建立
+        self.prewarm = prewarm
+        self.prewarms = 0
+        self.keepalive_timer = QTimer()
+        self.keepalive_timer.timeout.connect(self.warm_connection)
         
-        # 网络管理器
-        self.network_manager = QNetworkAccessManager()
-        self.network_manager.finished.connect(self.handle_network_reply)
+        self.provisional_results = 0
+        
+        # 限流器：令牌桶 + 429退避 + 熔断，需要等待时由定时器稍后继续发送
+        self.rate_limiter = shared_limiter()
+        self.dispatch_timer = QTimer()
+        self.dispatch_timer.setSingleShot(True)
+        self.dispatch_timer.timeout.connect(self.dispatch_requests)
+        
+        # 多目标语言预取（需在工具栏中开启）：输入停顿后在后台把原文译成其他常用语言
+        self._usage = usage
+        self.prefetch_replies = {}
+        self.prefetch_source = None
+        self.prefetch_timer = QTimer()
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.start_prefetch)
+        self.prefetch_dispatch_timer = QTimer()
+        self.prefetch_dispatch_timer.setSingleShot(True)
+        self.prefetch_dispatch_timer.timeout.connect(self.dispatch_prefetch)
+        self.detected_switches = 0
+        
+        # 后台批量翻译：与前台共用并发上限和限流器，前台有请求待发或正在输入时让行
+        self._batch_queue = None
+        self.batch_replies = {}
+        self.batch_panel = None
+        self.batch_holding = False
+        self.batch_timer = QTimer()
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.timeout.connect(self.dispatch_batch)
+        
+        # 翻译历史：最近一次完成的翻译暂存在history_pending，输入停顿、清空、改为翻译别的内容时才写入，
+        # 打开历史条目时直接显示保存的译文
+        self.history_pending = None
+        self.history_panel = None
+        self.history_timer = QTimer()
+        self.history_timer.setSingleShot(True)
+        self.history_timer.timeout.connect(self.commit_history)
+        self.compact_timer = QTimer()
+        self.compact_timer.timeout.connect(self.start_history_compaction)
+        self.compacting = False
         
         # 快捷键
         self.create_shortcuts()
         
-        # 加载指示器
+        # 界面卡顿监测：事件循环超过阈值没有响应时记录主线程调用栈（窗口显示后开始）；
+        # 加载动画的实际帧率和绘制耗时
+        self.stall_threshold_ms = stall_threshold_ms
+        self.stall_log = stall_log
+        self._stall_watchdog = None
+        self._frame_monitor = None
+        
+        # 加载指示器（帧率统计在start_services中接上）
         self.loading_indicator = LoadingIndicator(self)
         self.loading_indicator.move(self.width() // 2 - 20, self.height() // 2 - 20)
         
-        # 应用黑色主题
-        self.apply_dark_theme()
-        
-        # 使用防抖定时器进行实时翻译
+        # 使用防抖定时器进行实时翻译，等待时间由打字节奏和请求延迟动态决定
+        self.debouncer = AdaptiveDebouncer()
         self.translate_timer = QTimer()
         self.translate_timer.setSingleShot(True)
         self.translate_timer.timeout.connect(self.translate_text)
+        self.startup_profiler.mark("window")
+    
+    @property
+    def network_manager(self):
+        if self._network_manager is None:
+            self._network_manager = QNetworkAccessManager(self)
+            self._network_manager.finished.connect(self.handle_network_reply)
+        return self._network_manager
+    
+    @property
+    def cache(self):
+        """翻译缓存，重复内容无需再次请求"""
+        if self._cache is None:
+            from translation_cache import TranslationCache
+            self._cache = TranslationCache()
+        return self._cache
+    
+    @property
+    def memory(self):
+        """模糊翻译记忆：相近的原文（如只有数字、名称不同）在请求返回前先显示近似译文"""
+        if self._memory is None:
+            from translation_memory import TranslationMemory
+            self._memory = TranslationMemory()
+        return self._memory
+    
+    @property
+    def memory_writer(self):
+        """翻译记忆的索引和提交较慢（小响应在界面线程上约20ms），统一交给后台写入线程"""
+        if self._memory_writer is None:
+            from translation_memory import MemoryWriter
+            self._memory_writer = MemoryWriter(self.memory)
+        return self._memory_writer
+    
+    @property
+    def history(self):
+        if self._history is None:
+            from translation_history import TranslationHistory
+            self._history = TranslationHistory()
+        return self._history
+    
+    @property
+    def prefetcher(self):
+        if self._prefetcher is None:
+            from prefetch import PrefetchPlanner
+            self._prefetcher = PrefetchPlanner(self.cache, self.usage)
+        return self._prefetcher
+    
+    @property
+    def usage(self):
+        """目标语言使用次数，以及预取、自动识别的开关"""
+        if self._usage is None:
+            from prefetch import LanguageUsage
+            self._usage = LanguageUsage()
+        return self._usage
+    
+    @property
+    def backends(self):
+        """翻译接口：可配置多个（含本地替身服务），按顺序选择健康的接口"""
+        if self._backends is None:
+            from backends import Backend, BackendPool
+            self._backends = BackendPool([Backend(self.api_url)])
+        return self._backends
+    
+    @property
+    def batch_queue(self):
+        if self._batch_queue is None:
+            from batch_queue import BatchQueue
+            self._batch_queue = BatchQueue()
+        return self._batch_queue
+    
+    @property
+    def request_metrics(self):
+        if self._request_metrics is None:
+            from request_metrics import RequestMetrics
+            self._request_metrics = RequestMetrics(self.trace_log)
+        return self._request_metrics
+    
+    @property
+    def stall_watchdog(self):
+        if self._stall_watchdog is None:
+            from stall_watchdog import STALL_THRESHOLD_MS, StallWatchdog
+            threshold_ms = self.stall_threshold_ms if self.stall_threshold_ms is not None else STALL_THRESHOLD_MS
+            self._stall_watchdog = StallWatchdog(threshold_ms, self.stall_log, parent=self)
+        return self._stall_watchdog
+    
+    @property
+    def frame_monitor(self):
+        if self._frame_monitor is None:
+            from stall_watchdog import FrameMonitor
+            self._frame_monitor = FrameMonitor(LOADING_FRAME_MS)
+        return self._frame_monitor
+    
+    def ensure_services(self):
+        """导入并创建首次绘制时不需要的模块和组件（各属性在第一次访问时才创建），返回这些组件
+
+        处理响应和本地识别语言用到的模块也在此导入，第一次翻译不再等待导入。
+        """
+        for module in ("parse_worker", "request_metrics", "language_detect"):
+            importlib.import_module(module)
+        self.action_prefetch.setChecked(self.usage.prefetch_enabled)
+        self.action_detect.setChecked(self.usage.detect_enabled)
+        self.loading_indicator.frame_monitor = self.frame_monitor
+        return (self.network_manager, self.cache, self.memory, self.memory_writer, self.history, self.prefetcher,
+                self.backends, self.batch_queue, self.request_metrics, self.stall_watchdog)
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            # 首帧已绘制，其余组件在下一轮事件循环中初始化
+            self.first_paint_done = True
+            self.startup_profiler.mark("first_paint")
+            QTimer.singleShot(0, self.start_services)
+    
+    def start_services(self):
+        """创建网络、缓存、翻译记忆等组件并预热连接；之后的第一轮空闲即视为可交互"""
+        if self.services_started:
+            return
+        self.services_started = True
+        self.ensure_services()
+        # 翻译历史每天整理一次（删除过期和超出上限的记录），在后台线程中分批进行；
+        # 启动时检查一次，之后每小时检查一次
+        self.start_history_compaction()
+        self.compact_timer.start(HISTORY_COMPACT_CHECK_MS)
+        if self.prewarm:
+            self.warm_connection()
+            self.keepalive_timer.start(KEEPALIVE_INTERVAL_MS)
+        self.stall_watchdog.start()
+        self.startup_profiler.mark("services")
+        QTimer.singleShot(0, self.on_interactive)
+    
+    def on_interactive(self):
+        self.startup_profiler.mark("interactive")
+        self.startup_finished.emit()
     
     def apply_dark_theme(self):
         """应用黑色主题到应用程序"""
@@ -312,6 +718,32 @@ class GoogleTranslator(QMainWindow):
         
         toolbar.addSeparator()
         
+        self.action_detect = QAction("自动识别", self)
+        self.action_detect.setCheckable(True)
+        self.action_detect.setToolTip("发送请求前在本地识别输入的语言，自动切换源语言")
+        self.action_detect.triggered.connect(self.toggle_detect)
+        toolbar.addAction(self.action_detect)
+        
+        self.action_prefetch = QAction("预取", self)
+        self.action_prefetch.setCheckable(True)
+        self.action_prefetch.setToolTip("空闲时在后台预先翻译成其他常用目标语言，切换语言时立即显示")
+        self.action_prefetch.triggered.connect(self.toggle_prefetch)
+        toolbar.addAction(self.action_prefetch)
+        
+        action_batch = QAction("批量翻译", self)
+        action_batch.setToolTip("把多个文件或粘贴的文本加入后台队列翻译，不影响输入时的实时翻译")
+        action_batch.triggered.connect(self.show_batch_panel)
+        toolbar.addAction(action_batch)
+        
+        action_history = QAction("历史", self)
+        action_history.setToolTip("搜索以前的翻译，打开时直接显示保存的译文 (Ctrl+H)")
+        action_history.triggered.connect(self.show_history_panel)
+        toolbar.addAction(action_history)
+        
+        action_diagnostics = QAction("诊断", self)
+        action_diagnostics.triggered.connect(self.show_diagnostics)
+        toolbar.addAction(action_diagnostics)
+        
         action_about = QAction("关于", self)
         action_about.triggered.connect(self.show_about)
         toolbar.addAction(action_about)
@@ -350,13 +782,13 @@ class GoogleTranslator(QMainWindow):
         # 源文本区域
         source_frame = QFrame()
         source_frame.setFrameShape(QFrame.StyledPanel)
-        source_frame.setStyleSheet("background-color: rgba(45, 45, 45, 225);")
+        source_frame.setObjectName("sourceFrame")
         source_layout = QVBoxLayout(source_frame)
         
         self.source_label = QLabel("输入要翻译的文本:")
         source_layout.addWidget(self.source_label)
         
-        self.source_text = QTextEdit()
+        self.source_text = QPlainTextEdit()
         self.source_text.setPlaceholderText("在此输入文本，自动翻译并复制到剪贴板...")
         self.source_text.textChanged.connect(self.on_text_changed)
         source_layout.addWidget(self.source_text)
@@ -364,26 +796,17 @@ class GoogleTranslator(QMainWindow):
         # 目标文本区域 - 美化翻译结果显示
         target_frame = QFrame()
         target_frame.setFrameShape(QFrame.StyledPanel)
-        target_frame.setStyleSheet("""
-            background-color: #252525;
-            border: 1px solid #333333;
-            border-radius: 5px;
-        """)
+        target_frame.setObjectName("targetFrame")
         target_layout = QVBoxLayout(target_frame)
         
         # 结果标题区域
         result_header = QFrame()
-        result_header.setStyleSheet("""
-            background-color: #333333;
-            border-top-left-radius: 5px;
-            border-top-right-radius: 5px;
-            padding: 5px;
-        """)
+        result_header.setObjectName("resultHeader")
         result_header_layout = QHBoxLayout(result_header)
         result_header_layout.setContentsMargins(10, 5, 10, 5)
         
         self.target_label = QLabel("翻译结果:")
-        self.target_label.setStyleSheet("color: #e0e0e0; font-weight: bold;")
+        self.target_label.setObjectName("targetLabel")
         result_header_layout.addWidget(self.target_label)
         result_header_layout.addStretch()
         
@@ -399,14 +822,6 @@ class GoogleTranslator(QMainWindow):
         self.target_text.setObjectName("resultTextEdit")
         self.target_text.setPlaceholderText("翻译结果将显示在这里...")
         self.target_text.setStatusBar(self.statusBar)
-        self.target_text.setStyleSheet("""
-            border-top: none;
-            border-top-left-radius: 0px;
-            border-top-right-radius: 0px;
-            padding: 15px;
-            font-size: 15px;
-            line-height: 1.5;
-        """)
         target_layout.addWidget(self.target_text)
         
         # 添加到分割器
@@ -425,106 +840,914 @@ class GoogleTranslator(QMainWindow):
         shortcut_swap = QShortcut(QKeySequence("Ctrl+S"), self)
         shortcut_swap.activated.connect(self.swap_languages)
         
+        # 翻译历史
+        shortcut_history = QShortcut(QKeySequence("Ctrl+H"), self)
+        shortcut_history.activated.connect(self.show_history_panel)
+        
         # 复制翻译结果 (可选，因为已经自动复制)
         shortcut_copy = QShortcut(QKeySequence("Ctrl+C"), self)
         shortcut_copy.activated.connect(lambda: self.target_text.copyAll())
     
     def on_text_changed(self):
         """当文本变化时启动延迟翻译"""
+        self.stop_prefetch()
         text = self.source_text.toPlainText()
         if text:
             # 重启定时器，实现防抖功能，避免频繁翻译
             self.translate_timer.stop()
-            self.translate_timer.start(300)  # 300毫秒后执行翻译
+            self.translate_timer.start(self.debouncer.on_keystroke(len(text)))
         else:
+            self.translate_timer.stop()
+            self.cancel_pending_requests()
+            self.loading_indicator.stop()
             self.target_text.clear()
     
     def on_language_changed(self):
         """当语言选择变化时重新翻译"""
-        if self.source_text.toPlainText():
+        text = self.source_text.toPlainText()
+        if text:
             self.translate_timer.stop()
-            self.translate_timer.start(100)  # 快速重新翻译
+            if self.usage.prefetch_enabled and self.prefetcher.covers(text, *self.current_languages()):
+                # 已预取到该语言，直接显示
+                self.translate_text()
+            else:
+                self.translate_timer.start(self.debouncer.on_language_changed())  # 快速重新翻译
+    
+    def current_languages(self):
+        return (get_language_code(self.source_lang_combo.currentText()),
+                get_language_code(self.target_lang_combo.currentText()))
     
     def translate_text(self):
-        """执行翻译操作"""
+        """执行翻译操作：只请求内容发生变化的分段"""
         text = self.source_text.toPlainText()
         if not text:
             return
         
-        # 获取语言代码
-        source_lang = self.get_language_code(self.source_lang_combo.currentText())
-        target_lang = self.get_language_code(self.target_lang_combo.currentText())
+        # 获取语言代码（先在本地识别输入的语言，避免源语言选错浪费一次请求）
+        if self.usage.detect_enabled:
+            self.apply_detected_language(text)
+        source_lang, target_lang = self.current_languages()
+        
+        # 与上次发送的内容相同（例如只改了末尾空白）时不再请求
+        if not self.debouncer.should_send(text, source_lang, target_lang):
+            return
+        
+        # 新一代请求开始；旧请求先不中止，与新任务相同的分块可以直接沿用
+        self.request_generation += 1
+        self.current_job = None
+        
+        # 切分为段落/句子，已翻译过的分段直接从缓存取译文
+        segments = split_segments(text)
+        translations = {}
+        for segment in segments:
+            if segment.body and segment.body not in translations:
+                cached = self.cache.get(source_lang, target_lang, segment.body)
+                if cached is not None:
+                    translations[segment.body] = cached
+        runs = group_missing(segments, translations)
+        
+        self.current_job = {
+            # 发送时的原文，译文到达前编辑框可能已经改变
+            "text": text,
+            "lang": (source_lang, target_lang),
+            "segments": segments,
+            "translations": translations,
+            "queue": runs,
+            "in_flight": 0,
+            "total": len(runs),
+            "done": 0,
+            "cached": len(translations),
+            # 长文档在译文到达时按顺序逐块追加显示
+            "stream": bool(runs) and len(text) > STREAM_THRESHOLD,
+            "rendered": 0,
+            "rendered_parts": [],
+            "started": time.monotonic(),
+            # 已完成但译文尚未显示的请求耗时记录
+            "timings": [],
+            # 分块文本 -> 依次失败的接口，重试时优先换用其他接口
+            "failed_backends": {},
+        }
+        if not runs:
+            self.loading_indicator.stop()
+            self.abort_stale_requests()
+            self.finish_job()
+            return
         
         # 显示翻译中状态
         self.statusBar.showMessage("正在翻译...")
         self.loading_indicator.start()
-        
-        # 使用Google翻译API
-        url = f"https://translate.googleapis.com/translate_a/single?client=gtx&sl={source_lang}&tl={target_lang}&dt=t&q={text}"
-        
-        # 发送网络请求
-        request = QNetworkRequest(QUrl(url))
-        self.network_manager.get(request)
+        if self.current_job["stream"]:
+            self.target_text.clear()
+            self.render_progress()
+        else:
+            self.show_provisional()
+        self.adopt_inflight_requests()
+        self.abort_stale_requests()
+        self.dispatch_requests()
+    
+    def apply_detected_language(self, text):
+        """识别结果与所选源语言不同且足够可信时切换源语言；与目标语言相同时互换两者"""
+        source_lang, target_lang = self.current_languages()
+        from language_detect import detect_language
+        detected, confidence = detect_language(text, hint=source_lang)
+        if detected is None or detected == source_lang or confidence < DETECT_CONFIDENCE:
+            return
+        names = {code: name for name, code in LANGUAGE_CODES.items()}
+        # 只切换下拉框，不触发on_language_changed，本次翻译直接使用新语言
+        self.source_lang_combo.blockSignals(True)
+        self.target_lang_combo.blockSignals(True)
+        if detected == target_lang:
+            self.target_lang_combo.setCurrentText(names[source_lang])
+        self.source_lang_combo.setCurrentText(names[detected])
+        self.source_lang_combo.blockSignals(False)
+        self.target_lang_combo.blockSignals(False)
+        self.detected_switches += 1
+        self.statusBar.showMessage(f"已自动识别源语言：{names[detected]}", 3000)
+    
+    def show_provisional(self):
+        """待请求的分段都能在翻译记忆中找到近似译文时，先显示近似结果（不复制到剪贴板）"""
+        job = self.current_job
+        source_lang, target_lang = job["lang"]
+        missing = {body for bodies in job["queue"] for body in bodies}
+        if len(missing) > MAX_PROVISIONAL_SEGMENTS:
+            return
+        provisional = dict(job["translations"])
+        for body in missing:
+            match = self.memory.lookup(source_lang, target_lang, body)
+            if match is None:
+                return
+            provisional[body] = match[0]
+        self.provisional_results += 1
+        self.target_text.setResult(assemble(job["segments"], provisional))
+        self.statusBar.showMessage("显示翻译记忆中的近似译文，正在请求...")
+    
+    def adopt_inflight_requests(self):
+        """队列中与在途请求完全相同的分块不再重复发送，由当前任务接管该请求"""
+        job = self.current_job
+        source_lang, target_lang = job["lang"]
+        remaining = []
+        for bodies in job["queue"]:
+            reply = self.inflight_keys.get((source_lang, target_lang, "\n".join(bodies)))
+            if reply is not None and reply.isRunning():
+                self.pending_requests[reply] = (self.request_generation, self.pending_requests[reply][1])
+                job["in_flight"] += 1
+                self.coalesced_requests += 1
+            else:
+                remaining.append(bodies)
+        job["queue"] = remaining
+    
+    def dispatch_requests(self):
+        """在并发上限内发出排队中的分块请求"""
+        from request_metrics import RequestTiming
+        job = self.current_job
+        if job is None:
+            return
+        source_lang, target_lang = job["lang"]
+        # 后台批量翻译最多占用MAX_BATCH_CONCURRENT个并发，前台始终有余量
+        while job["queue"] and job["in_flight"] + len(self.batch_replies) < MAX_CONCURRENT_REQUESTS:
+            try:
+                wait, probe = self.rate_limiter.try_reserve()
+            except CircuitOpenError as e:
+                self.loading_indicator.stop()
+                self.cancel_pending_requests()
+                self.statusBar.showMessage(str(e))
+                return
+            if wait > 0:
+                if not self.dispatch_timer.isActive():
+                    self.dispatch_timer.start(int(wait * 1000) + 1)
+                return
+            bodies = job["queue"][0]
+            text = "\n".join(bodies)
+            try:
+                backend = self.backends.choose(exclude=job["failed_backends"].get(text, ()))
+            except CircuitOpenError as e:
+                self.rate_limiter.cancel_reservation(probe)
+                self.loading_indicator.stop()
+                self.cancel_pending_requests()
+                self.statusBar.showMessage(str(e))
+                return
+            job["queue"].pop(0)
+            timing = RequestTiming(len(text), enqueue=job["started"])
+            reply = self.send_request(backend, (source_lang, target_lang, bodies), timing)
+            self.track_probes(reply, probe, backend)
+            self.inflight_keys[(source_lang, target_lang, text)] = reply
+            job["in_flight"] += 1
+            
+            # 超过最近耗时的分位数仍未返回时发出对冲请求
+            delay = self.backends.hedge_delay_ms()
+            if delay is not None:
+                QTimer.singleShot(delay, lambda reply=reply: self.hedge_request(reply))
+    
+    def send_request(self, backend, request_key, timing):
+        """向backend发出一个分块请求并登记，返回reply"""
+        source_lang, target_lang, bodies = request_key
+        timing.mark("send")
+        reply = self.post_translation(backend, source_lang, target_lang, "\n".join(bodies))
+        # 新建连接时encrypted在TLS握手完成后触发；metaDataChanged对应收到响应头
+        reply.encrypted.connect(lambda timing=timing: timing.mark("encrypted"))
+        reply.metaDataChanged.connect(lambda timing=timing: timing.mark("first_byte"))
+        self.pending_requests[reply] = (self.request_generation, request_key)
+        self.request_timings[reply] = timing
+        self.reply_backends[reply] = (backend, time.monotonic())
+        return reply
+    
+    def record_backend_result(self, reply, backend, sent, status, retry_after, ok):
+        """记录请求结果：耗时和失败计入该接口，限流状态计入全局限流器"""
+        self.backend_probes.pop(reply, None)
+        self.backends.record(backend, (time.monotonic() - sent) * 1000, ok)
+        # 还有其他可用接口时，单个接口的失败只由它自己的熔断器处理，不暂停所有请求
+        if ok or not self.backends.has_alternative(backend):
+            self.limiter_probes.discard(reply)
+            self.rate_limiter.record_result(status, retry_after)
+        else:
+            self.release_probes(reply)
+    
+    def track_probes(self, reply, limiter_probe, backend):
+        """记录请求占用的熔断探测名额，请求没有计入结果时由release_probes释放"""
+        if limiter_probe:
+            self.limiter_probes.add(reply)
+        # choose()刚选中半开状态的接口，说明本请求就是它的探测请求
+        if backend.breaker.state == CircuitBreaker.HALF_OPEN:
+            self.backend_probes[reply] = backend
+    
+    def release_probes(self, reply):
+        """请求被取消或结果不计入限流器时，释放它占用的探测名额"""
+        if reply in self.limiter_probes:
+            self.limiter_probes.discard(reply)
+            self.rate_limiter.release_probe()
+        backend = self.backend_probes.pop(reply, None)
+        if backend is not None:
+            self.backends.release_probe(backend)
+    
+    def hedge_request(self, reply):
+        """原请求仍未返回时，把同一分块发给另一个接口，先返回的结果生效"""
+        from request_metrics import RequestTiming
+        if reply not in self.pending_requests or reply in self.hedge_siblings:
+            return
+        generation, request_key = self.pending_requests[reply]
+        backend, _ = self.reply_backends[reply]
+        if generation != self.request_generation or not self.backends.has_alternative(backend):
+            return
+        # 先选定另一个接口，没有可用接口时不占用限流令牌
+        alternative = self.backends.choose(exclude=(backend,), fallback=False)
+        if alternative is None:
+            return
+        try:
+            wait, probe = self.rate_limiter.try_reserve()
+        except CircuitOpenError:
+            wait = 1.0
+        if wait > 0:
+            # 不发对冲请求，choose()可能占用的探测名额留给下一个请求
+            if alternative.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.backends.release_probe(alternative)
+            return
+        original = self.request_timings.get(reply)
+        timing = RequestTiming(original.chars if original else 0,
+                               enqueue=original.marks["enqueue"] if original else None)
+        hedge = self.send_request(alternative, request_key, timing)
+        self.track_probes(hedge, probe, alternative)
+        self.hedge_siblings[reply] = hedge
+        self.hedge_siblings[hedge] = reply
+        self.hedge_replies.add(hedge)
+        self.hedges_sent += 1
+        self.backends.record_hedge(alternative)
+    
+    def post_translation(self, backend, source_lang, target_lang, text, priority=QNetworkRequest.NormalPriority):
+        """以POST方式发送翻译请求，正文不受URL长度限制"""
+        request = QNetworkRequest(QUrl.fromEncoded(backend.build_url(source_lang, target_lang).encode("ascii")))
+        request.setHeader(QNetworkRequest.ContentTypeHeader, "application/x-www-form-urlencoded;charset=UTF-8")
+        request.setPriority(priority)
+        request.setTransferTimeout(REQUEST_TIMEOUT_MS)
+        # HTTPS时允许HTTP/2（ALPN协商），并发的分块和预取请求复用同一个连接；
+        # 明文HTTP（本地替身服务）不开启，否则Qt会另建一个h2c连接而不复用预热的连接。
+        # Qt会自动请求并解压gzip响应
+        if backend.api_url.startswith("https:"):
+            request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+        return self.network_manager.post(request, backend.build_body(text))
+    
+    def warm_connection(self):
+        """预先建立到翻译接口的连接；连接已存在时Qt直接复用，不产生网络流量"""
+        if self.pending_requests or self.prefetch_replies:
+            return
+        for backend in self.backends.backends:
+            url = QUrl(backend.api_url)
+            if url.scheme() == "https":
+                if not QSslSocket.supportsSsl():
+                    continue
+                # 通过ALPN协商HTTP/2，与翻译请求使用同一个缓存连接
+                config = QSslConfiguration.defaultConfiguration()
+                config.setAllowedNextProtocols([b"h2", QSslConfiguration.NextProtocolHttp1_1])
+                self.network_manager.connectToHostEncrypted(url.host(), url.port(443), config)
+            else:
+                self.network_manager.connectToHost(url.host(), url.port(80))
+        self.prewarms += 1
+        self.request_metrics.record_prewarm()
+    
+    def cancel_pending_requests(self):
+        """推进请求代次并中止所有未完成的请求"""
+        self.request_generation += 1
+        self.current_job = None
+        self.debouncer.forget()
+        self.abort_stale_requests()
+    
+    def abort_stale_requests(self):
+        """中止不属于当前代次的在途请求"""
+        for reply, (generation, _) in list(self.pending_requests.items()):
+            if generation != self.request_generation and reply.isRunning():
+                self.cancelled_requests += 1
+                # abort会同步触发finished信号，由handle_network_reply按过时响应处理
+                self.aborted_replies.add(reply)
+                reply.abort()
     
     def handle_network_reply(self, reply):
         """处理网络响应"""
-        self.loading_indicator.stop()
+        if reply in self.prefetch_replies:
+            self.handle_prefetch_reply(reply)
+            return
+        if reply in self.batch_replies:
+            self.handle_batch_reply(reply)
+            return
+        if reply not in self.pending_requests:
+            # connectToHost预热连接时Qt内部发出的请求
+            reply.deleteLater()
+            return
+        started = time.perf_counter()
+        reply.deleteLater()
+        generation, request_key = self.pending_requests.pop(reply)
+        source_lang, target_lang, bodies = request_key
+        text = "\n".join(bodies)
+        if self.inflight_keys.get((source_lang, target_lang, text)) is reply:
+            del self.inflight_keys[(source_lang, target_lang, text)]
+        timing = self.request_timings.pop(reply, None)
+        backend, sent = self.reply_backends.pop(reply)
+        sibling = self.hedge_siblings.pop(reply, None)
+        if sibling is not None:
+            self.hedge_siblings.pop(sibling, None)
+        is_hedge = reply in self.hedge_replies
+        self.hedge_replies.discard(reply)
+        
+        # 主动取消的请求（过时、对冲中落后的一方）不计入限流和耗时统计
+        if reply in self.aborted_replies:
+            self.aborted_replies.discard(reply)
+            self.release_probes(reply)
+            return
+        
+        # 未被主动取消却返回OperationCanceledError，说明超过了传输超时
+        timed_out = reply.error() == QNetworkReply.OperationCanceledError
+        status = None if timed_out else reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        data = reply.readAll().data() if reply.error() == QNetworkReply.NoError else None
+        ok = data is not None and status not in (429, 503)
+        self.record_backend_result(reply, backend, sent, status, bytes(reply.rawHeader(b"Retry-After")) or None, ok)
+        if timed_out:
+            self.request_timeouts += 1
+        if timing is not None:
+            timing.mark("finished")
+            timing.status = status
+            timing.bytes = len(data or b"")
+            if data is None:
+                timing.error = "请求超时" if timed_out else reply.errorString()
+        
+        # 对冲中的一对请求：失败的一方直接放弃，等待另一方；成功的一方取消另一方
+        if sibling is not None and sibling in self.pending_requests:
+            if not ok:
+                self.record_timing(timing)
+                self.request_metrics.record_main_thread((time.perf_counter() - started) * 1000)
+                return
+            if is_hedge:
+                self.backends.record_hedge(backend, won=True)
+            self.aborted_replies.add(sibling)
+            sibling.abort()
+        
+        # 过时的响应：已完成的结果仍写入缓存，但不覆盖界面上的新结果
+        if generation != self.request_generation or self.current_job is None:
+            self.stale_replies += 1
+            if data is not None:
+                self.parse_reply(data, generation, request_key, timing, backend.parse)
+            else:
+                self.record_timing(timing)
         
-        if reply.error() == QNetworkReply.NoError:
-            data = reply.readAll().data().decode('utf-8')
+        # 被限流的分块放回队首，等退避结束后重发
+        elif status in (429, 503):
+            self.record_timing(timing)
+            if self.backends.has_alternative(backend):
+                self.current_job["failed_backends"].setdefault(text, []).append(backend)
+            self.current_job["queue"].insert(0, request_key[2])
+            self.current_job["in_flight"] -= 1
+            self.statusBar.showMessage("请求过于频繁，稍后自动重试...")
+            self.dispatch_requests()
+        
+        elif data is None:
+            self.record_timing(timing)
+            failed = self.current_job["failed_backends"].setdefault(text, [])
+            failed.append(backend)
+            if len(failed) <= MAX_FAILOVER_RETRIES:
+                # 换用其他健康的接口重试该分块（没有其他接口时重试同一接口）
+                self.failover_retries += 1
+                self.current_job["queue"].insert(0, bodies)
+                self.current_job["in_flight"] -= 1
+                self.statusBar.showMessage("请求失败，正在切换接口重试...")
+                self.dispatch_requests()
+            else:
+                self.loading_indicator.stop()
+                error = "请求超时" if timed_out else reply.errorString()
+                self.cancel_pending_requests()
+                self.statusBar.showMessage(f"翻译请求失败: {error}")
+        
+        else:
+            self.parse_reply(data, generation, request_key, timing, backend.parse)
+        
+        self.request_metrics.record_main_thread((time.perf_counter() - started) * 1000)
+    
+    def parse_reply(self, data, generation, request_key, timing, parse):
+        """小响应直接在主线程解析；大响应交给线程池，避免界面卡顿"""
+        from parse_worker import PARSE_IN_THREAD_BYTES, ParseTask, parse_and_store
+        if len(data) < PARSE_IN_THREAD_BYTES:
             try:
-                json_data = json.loads(data)
-                translated_text = ""
-                # 解析Google翻译API的响应
-                for sentence in json_data[0]:
-                    if sentence[0]:
-                        translated_text += sentence[0]
-                
-                # 设置翻译结果，并自动复制到剪贴板
-                self.target_text.setTextAndCopy(translated_text)
-                self.statusBar.showMessage("翻译完成并已复制到剪贴板")
+                mapping, error = parse_and_store(data, request_key, self.cache, self.memory_writer, parse), None
             except Exception as e:
-                self.statusBar.showMessage(f"解析翻译结果出错: {str(e)}")
+                mapping, error = None, str(e)
+            self.apply_translation(generation, request_key, timing, mapping, error)
+            return
+        
+        self.parse_token += 1
+        task = ParseTask(self.parse_token, data, request_key, self.cache, self.memory_writer, parse)
+        task.signals.finished.connect(self.on_parse_finished)
+        # 保留信号对象和上下文，直到结果回到主线程
+        self.parse_tasks[self.parse_token] = (task.signals, generation, request_key, timing)
+        self.thread_pool.start(task)
+    
+    def on_parse_finished(self, token, mapping, error):
+        """线程池解析完成（已回到主线程）"""
+        started = time.perf_counter()
+        _, generation, request_key, timing = self.parse_tasks.pop(token)
+        self.apply_translation(generation, request_key, timing, mapping, error)
+        self.request_metrics.record_main_thread((time.perf_counter() - started) * 1000)
+    
+    def apply_translation(self, generation, request_key, timing, mapping, error):
+        """把一个分块的解析结果应用到当前任务"""
+        if timing is not None:
+            if error is None:
+                timing.mark("parse_done")
+            else:
+                timing.error = error
+        
+        # 解析期间任务可能已被新的输入取代，此时译文只写入了缓存
+        if generation != self.request_generation or self.current_job is None:
+            self.record_timing(timing)
+            return
+        
+        if error is not None:
+            self.record_timing(timing)
+            self.loading_indicator.stop()
+            self.cancel_pending_requests()
+            self.statusBar.showMessage(f"解析翻译结果出错: {error}")
+            return
+        
+        job = self.current_job
+        job["translations"].update(mapping)
+        if timing is not None:
+            job["timings"].append(timing)
+        job["in_flight"] -= 1
+        job["done"] += 1
+        if job["done"] == job["total"]:
+            self.loading_indicator.stop()
+            self.finish_job()
+            self.flush_timings(job)
+            return
+        
+        if job["stream"]:
+            self.render_progress()
+            self.flush_timings(job)
+        self.statusBar.showMessage(f"正在翻译... {job['done']}/{job['total']} 块")
+        self.dispatch_requests()
+    
+    def toggle_detect(self, enabled):
+        """开启或关闭源语言自动识别"""
+        self.usage.set_detect_enabled(enabled)
+        self.statusBar.showMessage("已开启自动识别源语言" if enabled else "已关闭自动识别源语言", 2000)
+    
+    def toggle_prefetch(self, enabled):
+        """开启或关闭预取"""
+        self.usage.set_prefetch_enabled(enabled)
+        if not enabled:
+            self.stop_prefetch()
+        self.statusBar.showMessage("已开启预取" if enabled else "已关闭预取", 2000)
+    
+    def schedule_prefetch(self, text, source_lang, target_lang, translation):
+        """前台翻译完成后记录使用的语言，并在输入停顿一段时间后开始预取"""
+        self.usage.record(target_lang)
+        if self.usage.prefetch_enabled and text:
+            self.prefetch_source = (text, source_lang, target_lang, translation)
+            self.prefetch_timer.start(PREFETCH_IDLE_MS)
+    
+    def stop_prefetch(self):
+        """原文变化后预取队列失效；在途的预取请求继续完成并写入缓存"""
+        self.prefetch_timer.stop()
+        self.prefetch_dispatch_timer.stop()
+        self.prefetch_source = None
+        if self._prefetcher is not None:
+            self._prefetcher.cancel()
+    
+    def start_prefetch(self):
+        if self.prefetch_source is None:
+            return
+        self.prefetcher.plan(*self.prefetch_source)
+        self.dispatch_prefetch()
+    
+    def dispatch_prefetch(self):
+        """前台空闲时以低优先级逐个发出预取请求，受带宽预算和共享限流器约束"""
+        if not self.usage.prefetch_enabled or self.current_job is not None or self.prefetch_replies:
+            return
+        # 先确定有分块要发送，再申请限流令牌；没有发出的分块放回队首
+        request_key, wait = self.prefetcher.next_request()
+        if request_key is None:
+            if wait > 0:
+                self.prefetch_dispatch_timer.start(int(wait * 1000) + 1)
+            return
+        try:
+            wait, probe = self.rate_limiter.try_reserve()
+        except CircuitOpenError:
+            self.prefetcher.requeue(request_key)
+            return
+        if wait > 0:
+            self.prefetcher.requeue(request_key)
+            self.prefetch_dispatch_timer.start(int(wait * 1000) + 1)
+            return
+        try:
+            backend = self.backends.choose()
+        except CircuitOpenError:
+            self.rate_limiter.cancel_reservation(probe)
+            self.prefetcher.requeue(request_key)
+            return
+        source_lang, target_lang, bodies = request_key
+        reply = self.post_translation(backend, source_lang, target_lang, "\n".join(bodies), QNetworkRequest.LowPriority)
+        self.prefetch_replies[reply] = request_key
+        self.reply_backends[reply] = (backend, time.monotonic())
+        self.track_probes(reply, probe, backend)
+    
+    def handle_prefetch_reply(self, reply):
+        """预取响应只写入缓存；失败不重试"""
+        from parse_worker import PARSE_IN_THREAD_BYTES, ParseTask, parse_and_store
+        reply.deleteLater()
+        request_key = self.prefetch_replies.pop(reply)
+        backend, sent = self.reply_backends.pop(reply)
+        # 预取请求不会被主动中止，OperationCanceledError即传输超时
+        timed_out = reply.error() == QNetworkReply.OperationCanceledError
+        status = None if timed_out else reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        self.record_backend_result(reply, backend, sent, status, bytes(reply.rawHeader(b"Retry-After")) or None,
+                                   reply.error() == QNetworkReply.NoError)
+        if reply.error() != QNetworkReply.NoError:
+            self.prefetcher.record_result(False)
         else:
-            self.statusBar.showMessage(f"翻译请求失败: {reply.errorString()}")
-    
-    def get_language_code(self, language):
-        """获取语言代码"""
-        language_codes = {
-            "中文 (简体)": "zh-CN",
-            "英语": "en",
-            "日语": "ja",
-            "韩语": "ko",
-            "法语": "fr",
-            "德语": "de",
-            "西班牙语": "es",
-            "俄语": "ru"
-        }
-        return language_codes.get(language, "en")
+            data = reply.readAll().data()
+            if len(data) < PARSE_IN_THREAD_BYTES:
+                try:
+                    parse_and_store(data, request_key, self.cache, self.memory_writer, backend.parse)
+                    self.prefetcher.record_result(True)
+                except Exception:
+                    self.prefetcher.record_result(False)
+            else:
+                self.parse_token += 1
+                task = ParseTask(self.parse_token, data, request_key, self.cache, self.memory_writer, backend.parse)
+                task.signals.finished.connect(self.on_prefetch_parsed)
+                self.parse_tasks[self.parse_token] = (task.signals, None, request_key, None)
+                self.thread_pool.start(task)
+        self.dispatch_prefetch()
+    
+    def on_prefetch_parsed(self, token, mapping, error):
+        self.parse_tasks.pop(token)
+        self.prefetcher.record_result(error is None)
+    
+    def add_batch_job(self, name, text, path=None):
+        """按当前选择的语言加入一个后台翻译任务；text为None时读取path
+
+        读取文件、分段和查缓存在线程池中进行，完成后开始排队。
+        """
+        from parse_worker import BatchPrepareTask
+        source_lang, target_lang = self.current_languages()
+        job = self.batch_queue.create(name, text, source_lang, target_lang, path)
+        self.parse_token += 1
+        task = BatchPrepareTask(self.parse_token, job, self.cache)
+        task.signals.finished.connect(self.on_batch_prepared)
+        self.parse_tasks[self.parse_token] = (task.signals, job, None, None)
+        self.thread_pool.start(task)
+        return job
+    
+    def on_batch_prepared(self, token, _, error):
+        _, job, _, _ = self.parse_tasks.pop(token)
+        self.batch_queue.ready(job, None if error is None else f"准备任务出错: {error}")
+        self.dispatch_batch()
+    
+    def interactive_busy(self):
+        """前台正在输入（防抖等待中）或有翻译请求待发送"""
+        job = self.current_job
+        return self.translate_timer.isActive() or (job is not None and bool(job["queue"]))
+    
+    def dispatch_batch(self):
+        """在前台空闲、并发和限流有余量时发出后台批量翻译请求"""
+        while self.batch_queue.queue_depth():
+            if self.interactive_busy():
+                # 每次让行只计一次
+                if not self.batch_holding:
+                    self.batch_holding = True
+                    self.batch_queue.held += 1
+                self.batch_timer.start(BATCH_HOLD_RETRY_MS)
+                return
+            self.batch_holding = False
+            slots = min(MAX_BATCH_CONCURRENT, MAX_CONCURRENT_REQUESTS - len(self.pending_requests))
+            if len(self.batch_replies) >= slots:
+                return
+            try:
+                wait, probe = self.rate_limiter.try_reserve(keep=BATCH_RESERVE_TOKENS)
+            except CircuitOpenError as e:
+                self.batch_timer.start(int(e.retry_in * 1000) + 1)
+                return
+            if wait > 0:
+                self.batch_timer.start(int(wait * 1000) + 1)
+                return
+            # 拿到令牌后再选接口，限流等待时不占用接口的探测名额
+            try:
+                backend = self.backends.choose()
+            except CircuitOpenError as e:
+                self.rate_limiter.cancel_reservation(probe)
+                self.batch_timer.start(int(e.retry_in * 1000) + 1)
+                return
+            job, bodies = self.batch_queue.next_request()
+            reply = self.post_translation(backend, job.source_lang, job.target_lang, "\n".join(bodies),
+                                          QNetworkRequest.LowPriority)
+            self.batch_replies[reply] = (job, bodies)
+            self.reply_backends[reply] = (backend, time.monotonic())
+            self.track_probes(reply, probe, backend)
+    
+    def handle_batch_reply(self, reply):
+        """后台翻译响应：结果写入缓存和任务；限流时放回队首，其他错误重试后标记任务失败"""
+        from parse_worker import PARSE_IN_THREAD_BYTES, ParseTask, parse_and_store
+        reply.deleteLater()
+        job, bodies = self.batch_replies.pop(reply)
+        backend, sent = self.reply_backends.pop(reply)
+        if reply in self.aborted_replies:
+            # 任务已取消
+            self.aborted_replies.discard(reply)
+            self.release_probes(reply)
+            self.batch_queue.retry(job, bodies, counted=False)
+        else:
+            timed_out = reply.error() == QNetworkReply.OperationCanceledError
+            status = None if timed_out else reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+            ok = reply.error() == QNetworkReply.NoError
+            self.record_backend_result(reply, backend, sent, status, bytes(reply.rawHeader(b"Retry-After")) or None, ok)
+            request_key = (job.source_lang, job.target_lang, bodies)
+            if ok:
+                data = reply.readAll().data()
+                if len(data) < PARSE_IN_THREAD_BYTES:
+                    try:
+                        mapping, error = parse_and_store(data, request_key, self.cache, self.memory_writer, backend.parse), None
+                    except Exception as e:
+                        mapping, error = None, str(e)
+                    self.apply_batch_result(job, bodies, mapping, error)
+                else:
+                    self.parse_token += 1
+                    task = ParseTask(self.parse_token, data, request_key, self.cache, self.memory_writer, backend.parse)
+                    task.signals.finished.connect(self.on_batch_parsed)
+                    self.parse_tasks[self.parse_token] = (task.signals, job, bodies, None)
+                    self.thread_pool.start(task)
+            elif status in (429, 503):
+                # 被限流：放回队首，等限流器退避结束后重发
+                self.batch_queue.retry(job, bodies, counted=False)
+            elif self.batch_queue.attempts(job, bodies) < MAX_FAILOVER_RETRIES:
+                self.batch_queue.retry(job, bodies)
+            else:
+                self.batch_queue.fail(job, bodies, "请求超时" if timed_out else reply.errorString())
+        self.dispatch_batch()
+    
+    def on_batch_parsed(self, token, mapping, error):
+        _, job, bodies, _ = self.parse_tasks.pop(token)
+        self.apply_batch_result(job, bodies, mapping, error)
+        self.dispatch_batch()
+    
+    def apply_batch_result(self, job, bodies, mapping, error):
+        if error is not None:
+            self.batch_queue.fail(job, bodies, f"解析翻译结果出错: {error}")
+        elif self.batch_queue.complete(job, bodies, mapping):
+            self.statusBar.showMessage(f"批量翻译完成: {job.name}", 3000)
+    
+    def pause_batch_job(self, job):
+        self.batch_queue.pause(job)
+    
+    def resume_batch_job(self, job):
+        self.batch_queue.resume(job)
+        self.dispatch_batch()
+    
+    def cancel_batch_job(self, job):
+        """取消任务并中止它在途的请求"""
+        self.batch_queue.cancel(job)
+        for reply, (reply_job, _) in list(self.batch_replies.items()):
+            if reply_job is job and reply.isRunning():
+                self.aborted_replies.add(reply)
+                reply.abort()
+    
+    def show_batch_panel(self):
+        """显示批量翻译面板"""
+        if self.batch_panel is None:
+            from batch_panel import BatchPanel
+            self.batch_panel = BatchPanel(self)
+        self.batch_panel.show()
+        self.batch_panel.raise_()
+    
+    def record_timing(self, timing):
+        if timing is not None:
+            self.request_metrics.record(timing)
+    
+    def flush_timings(self, job):
+        """译文显示后记录该任务中已完成请求的耗时"""
+        now = time.monotonic()
+        for timing in job["timings"]:
+            timing.mark("render_done", now)
+            self.request_metrics.record(timing)
+        job["timings"].clear()
+    
+    def render_progress(self):
+        """把从开头起连续已译完的分段追加到结果框"""
+        job = self.current_job
+        end = translated_prefix_end(job["segments"], job["translations"], job["rendered"])
+        if end > job["rendered"]:
+            chunk = assemble(job["segments"][job["rendered"]:end], job["translations"])
+            job["rendered"] = end
+            job["rendered_parts"].append(chunk)
+            self.target_text.appendChunk(chunk)
+    
+    def finish_job(self):
+        """拼接各分段译文并显示"""
+        job = self.current_job
+        if job["total"]:
+            self.debouncer.record_latency(time.monotonic() - job["started"])
+        source_lang, target_lang = job["lang"]
+        if job["stream"]:
+            self.render_progress()
+            self.current_job = None
+            translated_text = "".join(job["rendered_parts"])
+            self.target_text.copyResult(translated_text)
+        else:
+            self.current_job = None
+            translated_text = assemble(job["segments"], job["translations"])
+            # 设置翻译结果，并自动复制到剪贴板
+            self.target_text.setTextAndCopy(translated_text)
+        self.schedule_prefetch(job["text"], source_lang, target_lang, translated_text)
+        self.remember_translation(job["text"], source_lang, target_lang, translated_text)
+        total = len({segment.body for segment in job["segments"] if segment.body})
+        if job["cached"] == total:
+            self.statusBar.showMessage("翻译完成（缓存）并已复制到剪贴板")
+        elif job["cached"]:
+            self.statusBar.showMessage(f"翻译完成（{job['cached']}/{total} 段来自缓存）并已复制到剪贴板")
+        else:
+            self.statusBar.showMessage("翻译完成并已复制到剪贴板")
+    
+    def remember_translation(self, text, source_lang, target_lang, translation):
+        """暂存完成的翻译，输入停顿后写入历史；改为翻译别的内容时先写入上一条"""
+        pending = self.history_pending
+        if pending is not None:
+            continued = pending[1:3] == (source_lang, target_lang) and (
+                text.startswith(pending[0]) or pending[0].startswith(text))
+            if not continued:
+                self.commit_history()
+        self.history_pending = (text, source_lang, target_lang, translation)
+        self.history_timer.start(HISTORY_IDLE_MS)
+    
+    def commit_history(self):
+        self.history_timer.stop()
+        if self.history_pending is not None:
+            text, source_lang, target_lang, translation = self.history_pending
+            self.history_pending = None
+            self.history.append(source_lang, target_lang, text, translation)
+    
+    def start_history_compaction(self):
+        """在后台线程中检查并整理翻译历史，上一次整理未结束时跳过"""
+        if self.compacting:
+            return
+        self.compacting = True
+        threading.Thread(target=self.compact_history, name="history-compact", daemon=True).start()
+    
+    def compact_history(self):
+        try:
+            if self.history.needs_compaction():
+                self.history.compact()
+        finally:
+            self.compacting = False
+    
+    def show_history_panel(self):
+        """显示翻译历史面板"""
+        if self.history_panel is None:
+            from history_panel import HistoryPanel
+            self.history_panel = HistoryPanel(self)
+        self.history_panel.show()
+        self.history_panel.raise_()
+        self.history_panel.activateWindow()
+    
+    def open_history_entry(self, entry):
+        """显示历史条目的原文和译文，不发送请求"""
+        self.commit_history()
+        self.translate_timer.stop()
+        self.stop_prefetch()
+        self.cancel_pending_requests()
+        self.loading_indicator.stop()
+        names = {code: name for name, code in LANGUAGE_CODES.items()}
+        # 只切换下拉框和原文，不触发重新翻译
+        for widget in (self.source_lang_combo, self.target_lang_combo, self.source_text):
+            widget.blockSignals(True)
+        if entry.source_lang in names:
+            self.source_lang_combo.setCurrentText(names[entry.source_lang])
+        if entry.target_lang in names:
+            self.target_lang_combo.setCurrentText(names[entry.target_lang])
+        self.source_text.setPlainText(entry.source)
+        for widget in (self.source_lang_combo, self.target_lang_combo, self.source_text):
+            widget.blockSignals(False)
+        self.target_text.setTextAndCopy(entry.translation)
+        self.statusBar.showMessage("已打开历史记录（未重新翻译）并已复制到剪贴板")
     
     def clear_text(self):
         """清空文本框"""
+        self.commit_history()
+        self.cancel_pending_requests()
+        self.loading_indicator.stop()
         self.source_text.clear()
         self.target_text.clear()
         self.statusBar.showMessage("已清空", 2000)
     
     def swap_languages(self):
         """交换源语言和目标语言"""
-        source_index = self.source_lang_combo.currentIndex()
-        target_index = self.target_lang_combo.currentIndex()
+        # 两个下拉框的语言顺序不同，按名称交换
+        source_lang = self.source_lang_combo.currentText()
+        target_lang = self.target_lang_combo.currentText()
         
-        self.source_lang_combo.setCurrentIndex(target_index)
-        self.target_lang_combo.setCurrentIndex(source_index)
+        self.source_lang_combo.setCurrentText(target_lang)
+        self.target_lang_combo.setCurrentText(source_lang)
         
-        # 同时交换文本
+        # 同时交换文本（结果框取完整译文，不受显示上限影响）
         source_text = self.source_text.toPlainText()
-        target_text = self.target_text.toPlainText()
+        target_text = self.target_text.fullText()
+        
+        self.source_text.setPlainText(target_text)
+        self.target_text.setResult(source_text)
         
-        self.source_text.setText(target_text)
-        self.target_text.setText(source_text)
+        # 译文的回译已预取时立即显示，不再等待防抖
+        if target_text and self.usage.prefetch_enabled and self.prefetcher.covers(target_text, *self.current_languages()):
+            self.translate_timer.stop()
+            self.translate_text()
         
         self.statusBar.showMessage("已交换语言", 2000)
     
+    def show_diagnostics(self):
+        """显示诊断面板"""
+        if self.diagnostics_panel is None:
+            from diagnostics_panel import DiagnosticsPanel
+            self.diagnostics_panel = DiagnosticsPanel(self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+    
+    def diagnostics_snapshot(self):
+        """汇总各组件的运行指标，供诊断面板显示和导出"""
+        return {
+            "requests": self.request_metrics.summary(),
+            "counters": {
+                "cancelled_requests": self.cancelled_requests,
+                "stale_replies": self.stale_replies,
+                "coalesced_requests": self.coalesced_requests,
+                "detected_language_switches": self.detected_switches,
+                "connection_prewarms": self.prewarms,
+                "hedges_sent": self.hedges_sent,
+                "failover_retries": self.failover_retries,
+                "request_timeouts": self.request_timeouts,
+            },
+            "cache": self.cache.stats(),
+            "rate_limiter": self.rate_limiter.metrics(),
+            "prefetch": self.prefetcher.stats(),
+            "backends": self.backends.stats(),
+            "batch": self.batch_queue.stats(),
+            "memory": {**self.memory.stats(), "provisional_results": self.provisional_results,
+                       "pending_writes": self.memory_writer.pending()},
+            "history": self.history.stats(),
+            "stalls": self.stall_watchdog.stats(),
+            "frames": self.frame_monitor.stats(),
+            "debounce": self.debouncer.stats(),
+        }
+    
+    def closeEvent(self, event):
+        """关闭窗口时释放缓存"""
+        self.stall_watchdog.stop()
+        self.compact_timer.stop()
+        self.commit_history()
+        self.usage.save()
+        if self._cache is not None:
+            self._cache.close()
+        if self._memory_writer is not None:
+            self._memory_writer.close()
+        if self._memory is not None:
+            self._memory.close()
+        if self._history is not None:
+            self._history.close()
+        if self._request_metrics is not None:
+            self._request_metrics.close()
+        super().closeEvent(event)
+    
     def show_about(self):
         """显示关于对话框"""
         about_msg = QMessageBox(self)
@@ -555,7 +1778,33 @@ class GoogleTranslator(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    translator = GoogleTranslator()
+    parser = argparse.ArgumentParser(description="谷歌翻译桌面应用")
+    parser.add_argument("--trace-log", help="逐请求耗时追踪日志（JSON Lines）")
+    parser.add_argument("--no-prewarm", action="store_true", help="不在启动时预先建立连接（用于对比冷启动的首个请求耗时）")
+    parser.add_argument("--backend", action="append", metavar="URL",
+                        help="翻译接口地址，可重复指定多个（按顺序优先，支持故障切换和对冲请求），默认为Google翻译接口")
+    parser.add_argument("--stall-log", help="界面卡顿日志（JSON Lines，含卡顿时主线程的Python调用栈）")
+    parser.add_argument("--stall-threshold", type=int, metavar="MS",
+                        help="事件循环超过多少毫秒无响应记为卡顿（默认使用stall_watchdog中的阈值）")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="输出启动各阶段耗时（含首次绘制、可交互时间）和模块导入耗时排行后退出")
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
+    startup_profiler.mark("qapplication")
+    backends = None
+    if args.backend:
+        from backends import BackendPool
+        backends = BackendPool.from_urls(args.backend)
+    translator = GoogleTranslator(trace_log=args.trace_log, prewarm=not args.no_prewarm, backends=backends,
+                                  startup_profiler=startup_profiler, stall_log=args.stall_log,
+                                  stall_threshold_ms=args.stall_threshold)
     translator.show()
+    startup_profiler.mark("show")
+    if args.profile_startup:
+        def report_startup():
+            print(startup_profiler.report({"first_paint": FIRST_PAINT_TARGET_MS,
+                                           "interactive": INTERACTIVE_TARGET_MS}), file=sys.stderr)
+            app.quit()
+        translator.startup_finished.connect(report_startup)
     sys.exit(app.exec_())
@@ -0,0 +1,119 @@
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer
+
+
+# 输入停顿多久（毫秒）后搜索
+SEARCH_DELAY_MS = 100
+# 最多显示的结果数
+RESULT_LIMIT = 200
+# 表格中原文、译文只显示第一行的前若干个字符
+PREVIEW_CHARS = 80
+
+
+def _preview(text):
+    line = text.strip().split("\n", 1)[0]
+    return line[:PREVIEW_CHARS] + ("…" if len(line) > PREVIEW_CHARS or "\n" in text.strip() else "")
+
+
+class HistoryPanel(QDialog):
+    """翻译历史面板：边输入边搜索原文和译文，打开条目时直接显示保存的译文，不发送请求"""
+
+    def __init__(self, translator):
+        super(HistoryPanel, self).__init__(translator)
+        self.translator = translator
+        self.entries = []
+        # 记录总数在打开面板和清空时更新，输入搜索时不再每次COUNT整个表
+        self.total = 0
+        self.setWindowTitle("翻译历史")
+        self.resize(760, 520)
+
+        layout = QVBoxLayout(self)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("搜索原文或译文（空格分隔多个关键词）")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(lambda: self.search_timer.start(SEARCH_DELAY_MS))
+        self.search_box.returnPressed.connect(self.open_selected)
+        layout.addWidget(self.search_box)
+
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["时间", "语言", "原文", "译文"])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.cellDoubleClicked.connect(lambda row, column: self.open_selected())
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        open_button = QPushButton("打开")
+        open_button.clicked.connect(self.open_selected)
+        clear_button = QPushButton("清空历史")
+        clear_button.clicked.connect(self.clear_history)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(open_button)
+        button_layout.addWidget(clear_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.search)
+
+    def showEvent(self, event):
+        # 先保存刚完成的翻译，搜索结果中才能看到
+        self.translator.commit_history()
+        self.total = self.translator.history.count()
+        self.search()
+        self.search_box.setFocus()
+        self.search_box.selectAll()
+        super().showEvent(event)
+
+    def search(self):
+        history = self.translator.history
+        started = time.perf_counter()
+        self.entries = history.search(self.search_box.text(), RESULT_LIMIT)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.table.setRowCount(len(self.entries))
+        for row, entry in enumerate(self.entries):
+            values = (time.strftime("%m-%d %H:%M", time.localtime(entry.created)),
+                      f"{entry.source_lang} → {entry.target_lang}",
+                      _preview(entry.source), _preview(entry.translation))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 2:
+                    item.setToolTip(entry.source if column == 2 else entry.translation)
+                self.table.setItem(row, column, item)
+        if self.entries:
+            self.table.selectRow(0)
+        more = "（只显示最新的部分）" if len(self.entries) == RESULT_LIMIT else ""
+        self.summary.setText(f"共 {self.total} 条记录，找到 {len(self.entries)} 条{more}，用时 {elapsed_ms:.1f}ms")
+
+    def open_selected(self):
+        rows = self.table.selectionModel().selectedRows()
+        if rows and rows[0].row() < len(self.entries):
+            self.translator.open_history_entry(self.entries[rows[0].row()])
+
+    def keyPressEvent(self, event):
+        # 在搜索框中用上下键选择结果
+        if event.key() in (Qt.Key_Up, Qt.Key_Down) and self.entries:
+            row = self.table.currentRow() + (1 if event.key() == Qt.Key_Down else -1)
+            self.table.selectRow(max(0, min(row, len(self.entries) - 1)))
+            return
+        super().keyPressEvent(event)
+
+    def clear_history(self):
+        reply = QMessageBox.question(self, "清空历史", "确定删除全部翻译历史吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.translator.history.clear()
+            self.total = 0
+            self.search()
@@ -0,0 +1,100 @@
+import re
+
+
+# 只检查开头的一部分文本，长文档的检测耗时与长度无关
+SAMPLE_CHARS = 400
+
+# 拉丁字母语言的常见三字母组（含词首/词尾空格）
+PROFILES = {
+    "en": " th|the|he | an|and|nd |ing|ng | of|of | to|to |ion| in|in |is | is|ed |hat|tha|er |"
+          "you| yo|ou |for| fo| wi|wit|ith|th |was| wa| be| it|it |are| ar|ave|hav| wh|all|ll |uld|ld |"
+          "not| no|ot | ha|ly |ver|her|ere|thi|his| my|my |out| ab|abo|bou|ut |hel|llo|wor|rld|ay ",
+    "fr": " de|de |es | le|le |ent| la|la |les|ion| et|et |que| qu|ue |re | un|une|ne |ous| vo|vou|"
+          "our| pa|pas|est| es|st |des|tio|ait|eur| au|au | ce|ce |ell| je|je | ne|pou|eux|ux ",
+    "de": "en |er |ch |der|ie |die| di| de|ein| ei|ich|sch|und| un|nd |den|ung|ng |che|cht|gen|ist|"
+          " is|nic|das| da|zu | zu|auf|ber|mit| mi|sie|wir| ge| ni|ht |ine|ten|ter",
+    "es": " de|de |os | la|la |el | el|que| qu|ue |es |as | en|en |ent|ión|ado|con| co| y | lo|los|"
+          "par| pa|por| po|una| un|del|est|ara|nte|aci| se|se |ño | ha",
+}
+
+# 各语言特有字母，出现一次相当于多个三字母组
+MARKERS = {
+    "de": ("ß", "ä", "ö", "ü"),
+    "fr": ("è", "ê", "ç", "à", "œ", "ë", "î", "ù"),
+    "es": ("ñ", "¿", "¡", "á", "í", "ó", "ú"),
+}
+MARKER_WEIGHT = 3
+MIN_LATIN_LETTERS = 10
+
+_TRIGRAMS = {}
+for _lang, _profile in PROFILES.items():
+    for _gram in _profile.split("|"):
+        _TRIGRAMS.setdefault(_gram, []).append(_lang)
+
+_LETTERS = re.compile(r"[^\W\d_]+")
+
+
+def _script_counts(sample):
+    """按文字统计字符数：汉字、假名、谚文、西里尔字母、拉丁字母"""
+    han = kana = hangul = cyrillic = latin = 0
+    for ch in sample:
+        code = ord(ch)
+        if code < 0x80:
+            if ch.isalpha():
+                latin += 1
+        elif 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF:
+            han += 1
+        elif 0x3040 <= code <= 0x30FF:
+            kana += 1
+        elif 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+            hangul += 1
+        elif 0x0400 <= code <= 0x04FF:
+            cyrillic += 1
+        elif 0x00C0 <= code <= 0x024F:
+            latin += 1
+    return han, kana, hangul, cyrillic, latin
+
+
+def _latin_language(sample):
+    """根据三字母组和特有字母在英、法、德、西语中打分"""
+    lowered = sample.lower()
+    text = f" {' '.join(_LETTERS.findall(lowered))} "
+    scores = dict.fromkeys(PROFILES, 0)
+    for i in range(len(text) - 2):
+        langs = _TRIGRAMS.get(text[i:i + 3])
+        if langs:
+            for lang in langs:
+                scores[lang] += 1
+    for lang, markers in MARKERS.items():
+        for marker in markers:
+            scores[lang] += lowered.count(marker) * MARKER_WEIGHT
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score == 0:
+        return "en", 0.0
+    return best, (best_score - second_score) / best_score
+
+
+def detect_language(text, hint=None, sample_chars=SAMPLE_CHARS):
+    """检测text的语言，返回 (语言代码, 置信度0~1)；无法判断时返回 (None, 0.0)
+
+    先按文字区分中、日、韩、俄，拉丁字母再按三字母组区分英、法、德、西。
+    hint为当前选择的语言：纯汉字文本在hint为日语时仍判为日语。
+    """
+    sample = text[:sample_chars]
+    han, kana, hangul, cyrillic, latin = _script_counts(sample)
+    total = han + kana + hangul + cyrillic + latin
+    if total == 0:
+        return None, 0.0
+    # 日文混用汉字，只要假名占一定比例即判为日语
+    if kana and kana * 10 >= han + kana:
+        return "ja", (han + kana) / total
+    if hangul and hangul >= han:
+        return "ko", (hangul + han) / total
+    if han and han * 2 >= total - latin or han > latin:
+        return ("ja" if hint == "ja" else "zh-CN"), han / total
+    if cyrillic > latin:
+        return "ru", cyrillic / total
+    lang, margin = _latin_language(sample)
+    # 字母太少时三字母组不足以区分，降低置信度
+    return lang, margin * latin / total * min(1.0, latin / MIN_LATIN_LETTERS)
@@ -0,0 +1,74 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from segmenter import split_run_translation
+from translate_api import parse_response
+
+
+# 响应超过该大小时在线程池中解析，较小的响应直接在主线程处理更快
+PARSE_IN_THREAD_BYTES = 32 * 1024
+
+
+def parse_and_store(data, request_key, cache, memory=None, parse=parse_response):
+    """解析响应，把一组分段的译文拆回各分段并写入缓存（及翻译记忆），返回 正文 -> 译文
+
+    不涉及界面，可在任意线程调用（TranslationCache、TranslationMemory内部有锁）。
+    memory为TranslationMemory或MemoryWriter，界面线程上应传入MemoryWriter，索引在后台写入线程中进行。
+    """
+    source_lang, target_lang, bodies = request_key
+    translated_text = parse(data)
+    mapping = split_run_translation(bodies, translated_text)
+    if mapping is None:
+        # 行数对不上时整组译文挂在第一个分段上，不写入分段缓存
+        mapping = dict.fromkeys(bodies, "")
+        mapping[bodies[0]] = translated_text
+        return mapping
+    cache.put_many(source_lang, target_lang, mapping)
+    if memory is not None:
+        memory.add_many(source_lang, target_lang, mapping)
+    return mapping
+
+
+class ParseSignals(QObject):
+    # (任务标识, 正文 -> 译文 或 None, 错误信息 或 None)
+    finished = pyqtSignal(object, object, object)
+
+
+class ParseTask(QRunnable):
+    """在QThreadPool中解析响应，结果通过信号回到主线程"""
+
+    def __init__(self, token, data, request_key, cache, memory=None, parse=parse_response):
+        super(ParseTask, self).__init__()
+        self.token = token
+        self.data = data
+        self.request_key = request_key
+        self.cache = cache
+        self.memory = memory
+        self.parse = parse
+        self.signals = ParseSignals()
+
+    def run(self):
+        try:
+            mapping = parse_and_store(self.data, self.request_key, self.cache, self.memory, self.parse)
+        except Exception as e:
+            self.signals.finished.emit(self.token, None, str(e))
+        else:
+            self.signals.finished.emit(self.token, mapping, None)
+
+
+class BatchPrepareTask(QRunnable):
+    """在QThreadPool中为批量翻译任务分段并查询缓存，大文件不会卡住界面"""
+
+    def __init__(self, token, job, cache):
+        super(BatchPrepareTask, self).__init__()
+        self.token = token
+        self.job = job
+        self.cache = cache
+        self.signals = ParseSignals()
+
+    def run(self):
+        try:
+            self.job.prepare(self.cache)
+        except Exception as e:
+            self.signals.finished.emit(self.token, None, str(e))
+        else:
+            self.signals.finished.emit(self.token, self.job, None)
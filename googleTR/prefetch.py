@@ -0,0 +1,170 @@
+import os
+import json
+import threading
+from collections import deque
+
+from translation_cache import DATA_DIR
+from rate_limiter import TokenBucket
+from segmenter import MAX_CHUNK_CHARS, split_segments, group_missing
+
+
+class LanguageUsage:
+    """记录各目标语言的使用次数，以及预取、自动识别源语言的开关"""
+
+    def __init__(self, path=None):
+        # path为None时使用默认路径，为":memory:"时不落盘（便于测试）
+        if path is None:
+            path = os.path.join(DATA_DIR, "language_usage.json")
+        self.path = path
+        self.counts = {}
+        self.prefetch_enabled = False
+        # 自动识别会改动用户选择的语言，需用户开启
+        self.detect_enabled = False
+        self.dirty = False
+        if path != ":memory:" and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self.counts = {lang: int(count) for lang, count in data.get("targets", {}).items()}
+                self.prefetch_enabled = bool(data.get("prefetch_enabled", False))
+                self.detect_enabled = bool(data.get("detect_enabled", False))
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def record(self, target_lang):
+        self.counts[target_lang] = self.counts.get(target_lang, 0) + 1
+        self.dirty = True
+
+    def most_used(self, exclude=(), limit=2):
+        """按使用次数从多到少返回目标语言"""
+        ranked = sorted(self.counts.items(), key=lambda item: -item[1])
+        return [lang for lang, _ in ranked if lang not in exclude][:limit]
+
+    def set_prefetch_enabled(self, enabled):
+        self.prefetch_enabled = bool(enabled)
+        self.dirty = True
+        self.save()
+
+    def set_detect_enabled(self, enabled):
+        self.detect_enabled = bool(enabled)
+        self.dirty = True
+        self.save()
+
+    def save(self):
+        if not self.dirty or self.path == ":memory:":
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"prefetch_enabled": self.prefetch_enabled, "detect_enabled": self.detect_enabled,
+                       "targets": self.counts}, f)
+        self.dirty = False
+
+
+class PrefetchPlanner:
+    """多目标语言预取：原文停顿后把它翻译成其他常用目标语言，并预先回译当前译文（供交换语言使用）
+
+    只生成缓存中缺少的分块；按字符数计的令牌桶限制预取占用的带宽。
+    发送时机（前台空闲、低优先级）由调用方决定。
+    """
+
+    def __init__(self, cache, usage, max_targets=2, chars_per_minute=30000, burst_chars=10000,
+                 max_chars=MAX_CHUNK_CHARS):
+        self.cache = cache
+        self.usage = usage
+        self.max_targets = max_targets
+        self.max_chars = max_chars
+        self.budget = TokenBucket(chars_per_minute / 60.0, burst_chars)
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.planned = 0
+        self.sent = 0
+        self.sent_chars = 0
+        self.completed = 0
+        self.failed = 0
+        self.budget_waits = 0
+        self.hits = 0
+
+    def missing_runs(self, text, source_lang, target_lang):
+        """text在该语言对下缓存中缺少的分块；用peek查询，不影响前台翻译的缓存命中统计"""
+        segments = split_segments(text)
+        known = {}
+        for segment in segments:
+            if segment.body and segment.body not in known:
+                cached = self.cache.peek(source_lang, target_lang, segment.body)
+                if cached is not None:
+                    known[segment.body] = cached
+        return group_missing(segments, known, self.max_chars)
+
+    def plan(self, text, source_lang, target_lang, translation=None):
+        """为刚完成翻译的原文重新生成预取队列，返回排队的分块数"""
+        jobs = []
+        if translation:
+            jobs.append((translation, target_lang, source_lang))
+        for lang in self.usage.most_used(exclude=(source_lang, target_lang), limit=self.max_targets):
+            jobs.append((text, source_lang, lang))
+        queue = deque()
+        for job_text, sl, tl in jobs:
+            for bodies in self.missing_runs(job_text, sl, tl):
+                queue.append((sl, tl, bodies))
+        with self.lock:
+            self.queue = queue
+            self.planned += len(queue)
+        return len(queue)
+
+    def next_request(self):
+        """取下一个预取分块，返回 ((源语言, 目标语言, 分段列表) 或 None, 需等待的秒数)"""
+        with self.lock:
+            if not self.queue:
+                return None, 0.0
+            source_lang, target_lang, bodies = self.queue[0]
+            chars = min(len("\n".join(bodies)), self.budget.burst)
+            wait = self.budget.take(chars)
+            if wait > 0:
+                self.budget_waits += 1
+                return None, wait
+            self.queue.popleft()
+            self.sent += 1
+            self.sent_chars += chars
+            return (source_lang, target_lang, bodies), 0.0
+
+    def requeue(self, request):
+        """next_request取出的分块最终没有发送（限流、接口熔断）：放回队首并退还带宽预算"""
+        chars = min(len("\n".join(request[2])), self.budget.burst)
+        with self.lock:
+            self.queue.appendleft(request)
+            self.budget.tokens = min(self.budget.burst, self.budget.tokens + chars)
+            self.sent -= 1
+            self.sent_chars -= chars
+
+    def covers(self, text, source_lang, target_lang):
+        """缓存中已有text全部分段的译文时返回True（切换语言可直接显示）"""
+        if self.missing_runs(text, source_lang, target_lang):
+            return False
+        self.hits += 1
+        return True
+
+    def record_result(self, ok):
+        with self.lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def cancel(self):
+        with self.lock:
+            self.queue.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "enabled": self.usage.prefetch_enabled,
+                "queued": len(self.queue),
+                "planned": self.planned,
+                "sent": self.sent,
+                "sent_chars": self.sent_chars,
+                "completed": self.completed,
+                "failed": self.failed,
+                "budget_waits": self.budget_waits,
+                "instant_switches": self.hits,
+                "budget_chars_per_minute": round(self.budget.rate * 60),
+            }
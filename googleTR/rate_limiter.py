@@ -0,0 +1,247 @@
+import time
+import random
+import threading
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"服务暂时不可用，{retry_in:.0f}秒后重试")
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """令牌桶：以rate个/秒的速度补充令牌，最多积累burst个"""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount=1, keep=0):
+        """取amount个令牌，返回还需等待的秒数（0表示已取到）
+
+        keep>0时只在取走后仍剩余至少keep个令牌时才取，为其他请求保留余量。
+        """
+        self._refill()
+        if self.tokens >= amount + keep:
+            self.tokens -= amount
+            return 0.0
+        return (amount + keep - self.tokens) / self.rate
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却期过后放行一个探测请求
+
+    探测请求被取消或最终没有发送时需调用release_probe；
+    超过probe_timeout秒仍没有结果的探测视为已丢失，放行新的探测。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, clock=time.monotonic, probe_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.times_opened = 0
+
+    def check(self):
+        """请求前调用，熔断时抛出CircuitOpenError；返回True表示本次请求占用了半开状态的探测名额"""
+        if self.state == self.OPEN:
+            elapsed = self.clock() - self.opened_at
+            if elapsed < self.recovery_timeout:
+                raise CircuitOpenError(self.recovery_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self.probe_in_flight and self.clock() - self.probe_started < self.probe_timeout:
+                raise CircuitOpenError(1.0)
+            self.probe_in_flight = True
+            self.probe_started = self.clock()
+            return True
+        return False
+
+    def release_probe(self):
+        """探测请求没有结果（被取消或未发送）时释放名额，下一个请求继续探测"""
+        if self.state == self.HALF_OPEN:
+            self.probe_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.probe_in_flight = False
+
+
+class RateLimiter:
+    """所有出站翻译请求共用的限流器
+
+    组合令牌桶、429/503退避（指数退避 + 随机抖动，优先遵循Retry-After）和熔断器。
+    线程安全；clock和rng可替换，便于在测试中控制时间。
+    """
+
+    def __init__(self, rate=10.0, burst=20, failure_threshold=5, recovery_timeout=30.0,
+                 base_backoff=1.0, max_backoff=60.0, clock=time.monotonic, rng=random.random):
+        self.clock = clock
+        self.rng = rng
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout, clock)
+        self.lock = threading.Lock()
+        self.backoff_until = 0.0
+        self.consecutive_throttles = 0
+        # 统计
+        self.granted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def reserve(self, keep=0):
+        """申请发送一个请求，返回需要等待的秒数；0表示可立即发送（已占用令牌）
+
+        后台任务传入keep，令牌不足keep个时让给前台请求。熔断器打开时抛出CircuitOpenError。
+        """
+        return self.try_reserve(keep)[0]
+
+    def try_reserve(self, keep=0):
+        """同reserve，返回 (等待秒数, probe)
+
+        probe为True表示本次占用了熔断器的探测名额：请求被取消、没有结果时调用release_probe，
+        最终没有发送时调用cancel_reservation，否则熔断器会一直等待这个探测请求。
+        """
+        with self.lock:
+            try:
+                probe = self.breaker.check()
+            except CircuitOpenError:
+                self.rejected += 1
+                raise
+            wait = self.backoff_until - self.clock()
+            if wait <= 0:
+                wait = self.bucket.take(1, min(keep, self.bucket.burst - 1))
+            if wait > 0:
+                # 未真正发送，探测名额留给下一次
+                if probe:
+                    self.breaker.release_probe()
+                self.delayed += 1
+                return wait, False
+            self.granted += 1
+            return 0.0, probe
+
+    def cancel_reservation(self, probe=False):
+        """已申请到的名额最终没有发送请求：退还令牌，释放探测名额"""
+        with self.lock:
+            self.bucket.tokens = min(self.bucket.burst, self.bucket.tokens + 1)
+            self.granted -= 1
+            if probe:
+                self.breaker.release_probe()
+
+    def release_probe(self):
+        """已发送的探测请求被取消或结果不计入限流器时调用"""
+        with self.lock:
+            self.breaker.release_probe()
+
+    def acquire(self, timeout=None):
+        """阻塞直到可以发送请求，供工作线程使用"""
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            if deadline is not None and self.clock() + wait > deadline:
+                raise TimeoutError("等待限流超时")
+            time.sleep(wait)
+
+    def backoff_delay(self, attempt):
+        """第attempt次重试的退避时间（equal jitter：上限的一半到上限之间随机，至少等待上限的一半）"""
+        ceiling = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return ceiling * (0.5 + 0.5 * self.rng())
+
+    def record_result(self, status=None, retry_after=None):
+        """记录一次请求的结果；status为None表示网络错误"""
+        with self.lock:
+            if status in (429, 503):
+                self.throttled += 1
+                self.failures += 1
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = self.backoff_delay(self.consecutive_throttles)
+                self.consecutive_throttles += 1
+                self.backoff_until = max(self.backoff_until, self.clock() + delay)
+                self.breaker.record_failure()
+            elif status is None or status >= 500:
+                self.failures += 1
+                self.breaker.record_failure()
+            else:
+                self.consecutive_throttles = 0
+                self.breaker.record_success()
+
+    def is_retryable(self, status):
+        return status is None or status == 429 or status >= 500
+
+    def metrics(self):
+        with self.lock:
+            self.bucket._refill()
+            return {
+                "rate": self.bucket.rate,
+                "burst": self.bucket.burst,
+                "tokens": round(self.bucket.tokens, 2),
+                "granted": self.granted,
+                "delayed": self.delayed,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "failures": self.failures,
+                "backoff_remaining": max(0.0, round(self.backoff_until - self.clock(), 3)),
+                "circuit_state": self.breaker.state,
+                "circuit_opened": self.breaker.times_opened,
+            }
+
+
+def parse_retry_after(value):
+    """解析Retry-After头（秒数形式），无法解析时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "ignore")
+    try:
+        return max(0.0, float(value.strip()))
+    except ValueError:
+        return None
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter():
+    """进程内共享的限流器，桌面应用与引擎的请求共用同一预算"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
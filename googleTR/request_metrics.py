@@ -0,0 +1,214 @@
+import json
+import time
+import itertools
+import threading
+from collections import deque
+
+
+# 各阶段耗时 = 后一时间点 - 前一时间点
+PHASES = [
+    ("queue", "enqueue", "send"),           # 排队（并发上限、限流）
+    ("connect", "send", "encrypted"),       # DNS + TCP + TLS握手，仅新建连接时有
+    ("ttfb", "send", "first_byte"),         # 发送到收到响应头
+    ("download", "first_byte", "finished"),
+    ("parse", "finished", "parse_done"),
+    ("render", "parse_done", "render_done"),
+    ("total", "enqueue", "render_done"),
+]
+
+# 直方图桶上限（毫秒），与Prometheus的le标签对应
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class RequestTiming:
+    """单个请求各时间点的记录（time.monotonic秒）"""
+
+    # 多个线程同时创建记录，count的next()是原子的，+=不是
+    _ids = itertools.count(1)
+
+    def __init__(self, chars=0, enqueue=None):
+        self.id = next(RequestTiming._ids)
+        self.chars = chars
+        self.status = None
+        self.bytes = 0
+        self.error = None
+        self.marks = {"enqueue": enqueue if enqueue is not None else time.monotonic()}
+
+    def mark(self, name, when=None):
+        """记录时间点，同名时间点只记录第一次"""
+        if name not in self.marks:
+            self.marks[name] = when if when is not None else time.monotonic()
+
+    def durations(self):
+        """各阶段耗时（毫秒），缺少时间点的阶段不计入"""
+        result = {}
+        for phase, start, end in PHASES:
+            if start in self.marks and end in self.marks:
+                result[phase] = (self.marks[end] - self.marks[start]) * 1000
+        return result
+
+    def to_dict(self):
+        base = self.marks["enqueue"]
+        return {
+            "id": self.id,
+            "chars": self.chars,
+            "status": self.status,
+            "bytes": self.bytes,
+            "error": self.error,
+            "marks_ms": {name: round((value - base) * 1000, 3) for name, value in self.marks.items()},
+            "durations_ms": {name: round(value, 3) for name, value in self.durations().items()},
+        }
+
+
+class LatencyHistogram:
+    """累计分桶直方图 + 最近样本窗口（用于计算分位数）"""
+
+    def __init__(self, window=1000):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value_ms):
+        self.count += 1
+        self.sum += value_ms
+        self.samples.append(value_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, pct):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count, 2) if self.count else None,
+            "p50_ms": _round(self.percentile(50)),
+            "p95_ms": _round(self.percentile(95)),
+            "p99_ms": _round(self.percentile(99)),
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+class RequestMetrics:
+    """汇总请求耗时，支持导出JSON和Prometheus文本格式，可选写入逐请求的追踪日志"""
+
+    def __init__(self, trace_path=None, recent=200, main_thread_budget_ms=16):
+        self.lock = threading.Lock()
+        self.histograms = {phase: LatencyHistogram() for phase, _, _ in PHASES}
+        # 每个响应在界面线程上的处理耗时，超过预算（约一帧）即计为一次卡顿
+        self.histograms["main_thread"] = LatencyHistogram()
+        self.main_thread_budget_ms = main_thread_budget_ms
+        self.main_thread_over_budget = 0
+        # 首字节时间按是否新建了TLS连接（出现encrypted时间点）分开统计，对比冷、热连接
+        self.histograms["ttfb_new_connection"] = LatencyHistogram()
+        self.histograms["ttfb_reused_connection"] = LatencyHistogram()
+        self.prewarmed_at = None
+        self.first_request = None
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.recent = deque(maxlen=recent)
+        self.trace_file = open(trace_path, "a", encoding="utf-8") if trace_path else None
+
+    def record(self, timing):
+        """请求结束（含渲染）后调用"""
+        with self.lock:
+            self.requests += 1
+            self.bytes += timing.bytes
+            if timing.error:
+                self.errors += 1
+            durations = timing.durations()
+            for phase, value in durations.items():
+                self.histograms[phase].observe(value)
+            if "ttfb" in durations:
+                connection = "ttfb_new_connection" if "encrypted" in timing.marks else "ttfb_reused_connection"
+                self.histograms[connection].observe(durations["ttfb"])
+            entry = timing.to_dict()
+            if self.first_request is None and not timing.error:
+                self.first_request = {
+                    "prewarmed": self.prewarmed_at is not None and self.prewarmed_at <= timing.marks["enqueue"],
+                    "new_connection": "encrypted" in timing.marks,
+                    "ttfb_ms": round(durations["ttfb"], 3) if "ttfb" in durations else None,
+                    "total_ms": round(durations["total"], 3) if "total" in durations else None,
+                }
+            self.recent.append(entry)
+            if self.trace_file is not None:
+                entry["time"] = time.time()
+                self.trace_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.trace_file.flush()
+
+    def record_prewarm(self, when=None):
+        """记录预先建立连接的时间，用于标记第一个请求是否在连接预热之后发出"""
+        with self.lock:
+            if self.prewarmed_at is None:
+                self.prewarmed_at = when if when is not None else time.monotonic()
+
+    def record_main_thread(self, value_ms):
+        """记录一次响应处理占用界面线程的时间"""
+        with self.lock:
+            self.histograms["main_thread"].observe(value_ms)
+            if value_ms > self.main_thread_budget_ms:
+                self.main_thread_over_budget += 1
+
+    def summary(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "bytes": self.bytes,
+                "main_thread_budget_ms": self.main_thread_budget_ms,
+                "main_thread_over_budget": self.main_thread_over_budget,
+                "first_request": self.first_request,
+                "phases": {phase: histogram.summary() for phase, histogram in self.histograms.items()},
+            }
+
+    def export_json(self):
+        data = self.summary()
+        with self.lock:
+            data["recent"] = list(self.recent)
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def export_prometheus(self):
+        """Prometheus文本格式"""
+        with self.lock:
+            return self._prometheus_lines()
+
+    def _prometheus_lines(self):
+        lines = [
+            "# HELP googletr_requests_total Translation requests completed.",
+            "# TYPE googletr_requests_total counter",
+            f"googletr_requests_total {self.requests}",
+            "# HELP googletr_request_errors_total Translation requests that failed.",
+            "# TYPE googletr_request_errors_total counter",
+            f"googletr_request_errors_total {self.errors}",
+            "# HELP googletr_response_bytes_total Response bytes received.",
+            "# TYPE googletr_response_bytes_total counter",
+            f"googletr_response_bytes_total {self.bytes}",
+            "# HELP googletr_request_phase_seconds Time spent in each request phase.",
+            "# TYPE googletr_request_phase_seconds histogram",
+        ]
+        for phase, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS, histogram.counts):
+                cumulative += count
+                lines.append(f'googletr_request_phase_seconds_bucket{{phase="{phase}",le="{bound / 1000}"}} {cumulative}')
+            lines.append(f'googletr_request_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'googletr_request_phase_seconds_sum{{phase="{phase}"}} {histogram.sum / 1000:.6f}')
+            lines.append(f'googletr_request_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self.lock:
+            if self.trace_file is not None:
+                self.trace_file.close()
+                self.trace_file = None
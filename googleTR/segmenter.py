@@ -0,0 +1,122 @@
+import re
+from collections import namedtuple
+
+
+# 单个分段的最大长度，超过后按句子再切分
+MAX_SEGMENT_CHARS = 500
+
+# 单个请求（合并后的分段组）的最大长度
+MAX_CHUNK_CHARS = 4500
+
+# 句末标点（中英日韩常用）之后的位置作为句子边界
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;。！？；…])\s*")
+
+# prefix/suffix为分段前后的空白（含换行），body为需要翻译的正文
+Segment = namedtuple("Segment", ["prefix", "body", "suffix"])
+
+
+def _make_segment(piece):
+    body = piece.strip()
+    if not body:
+        return Segment(piece, "", "")
+    start = piece.index(body)
+    return Segment(piece[:start], body, piece[start + len(body):])
+
+
+def _split_long(line, max_chars):
+    """按句子边界切分过长的行，单句仍过长时按长度硬切"""
+    pieces = []
+    last = 0
+    for match in SENTENCE_BOUNDARY.finditer(line):
+        if match.end() > last and match.end() < len(line):
+            pieces.append(line[last:match.end()])
+            last = match.end()
+    pieces.append(line[last:])
+
+    result = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            result.append(current)
+            current = ""
+        current += piece
+        while len(current) > max_chars:
+            result.append(current[:max_chars])
+            current = current[max_chars:]
+    if current:
+        result.append(current)
+    return result
+
+
+def split_segments(text, max_chars=MAX_SEGMENT_CHARS):
+    """把文本切分为段落/句子分段，所有分段首尾相接即为原文"""
+    segments = []
+    for line in text.splitlines(keepends=True):
+        if len(line.strip()) > max_chars:
+            segments.extend(_make_segment(piece) for piece in _split_long(line, max_chars))
+        else:
+            segments.append(_make_segment(line))
+    return segments
+
+
+def group_missing(segments, known, max_chars=MAX_CHUNK_CHARS):
+    """找出尚无译文的分段，相邻的分段合并为一组以减少请求数
+
+    known为 正文 -> 译文 的映射；同一正文只会出现在一个分组里，
+    每组合并后的长度不超过max_chars。
+    """
+    runs = []
+    current = []
+    current_len = 0
+    queued = set()
+    for segment in segments:
+        body = segment.body
+        if not body or body in known:
+            # 空白分段和已有译文的分段打断连续区间
+            if current:
+                runs.append(current)
+                current = []
+                current_len = 0
+            continue
+        if body in queued:
+            continue
+        if current and current_len + 1 + len(body) > max_chars:
+            runs.append(current)
+            current = []
+            current_len = 0
+        queued.add(body)
+        current.append(body)
+        current_len += len(body) + 1
+    if current:
+        runs.append(current)
+    return runs
+
+
+def split_run_translation(bodies, translated_text):
+    """把一组分段的合并译文拆回各分段，行数对不上时返回None"""
+    lines = translated_text.split("\n")
+    if len(lines) != len(bodies):
+        return None
+    return {body: line.strip() for body, line in zip(bodies, lines)}
+
+
+def translated_prefix_end(segments, translations, start=0):
+    """从start开始，返回连续已有译文的分段之后的位置，用于按顺序渐进显示"""
+    end = start
+    while end < len(segments):
+        body = segments[end].body
+        if body and body not in translations:
+            break
+        end += 1
+    return end
+
+
+def assemble(segments, translations):
+    """按原有空白结构拼接各分段译文"""
+    parts = []
+    for segment in segments:
+        parts.append(segment.prefix)
+        if segment.body:
+            parts.append(translations.get(segment.body, ""))
+        parts.append(segment.suffix)
+    return "".join(parts)
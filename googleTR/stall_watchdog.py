@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+
+from request_metrics import LatencyHistogram
+
+
+# 主线程心跳间隔（毫秒）
+HEARTBEAT_MS = 20
+# 超过该时间没有心跳即视为卡顿，记录主线程的Python调用栈
+STALL_THRESHOLD_MS = 100
+# 两帧间隔超过该值视为动画已停止，不计入帧率
+IDLE_GAP_MS = 1000
+
+# 源码行中出现这些调用的帧正在运行（可能嵌套的）事件循环
+EVENT_LOOP_CALLS = ("exec_(", "exec(", "processEvents(")
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def capture_stack(frame, limit=30):
+    """返回 (调用栈 "文件:行号 函数" 列表（外层在前）, 卡顿所在的处理函数)
+
+    处理函数为最内层事件循环直接调用的帧；调用栈只停在事件循环上时说明卡在Qt内部（如布局、绘制）。
+    """
+    entries = traceback.extract_stack(frame, limit=limit)
+    stack = [f"{os.path.relpath(entry.filename, APP_DIR) if entry.filename.startswith(APP_DIR) else entry.filename}"
+             f":{entry.lineno} {entry.name}" for entry in entries]
+    loops = [i for i, entry in enumerate(entries) if any(call in (entry.line or "") for call in EVENT_LOOP_CALLS)]
+    start = loops[-1] + 1 if loops else 0
+    if start < len(stack):
+        return stack, stack[start]
+    return stack, "Qt内部（无Python调用）"
+
+
+class StallWatchdog(QObject):
+    """事件循环卡顿监测
+
+    主线程用定时器定期写入心跳，并统计定时器的延迟（事件循环响应时间）；
+    后台线程发现心跳超过threshold_ms没有更新时，立即抓取主线程的Python调用栈，
+    卡顿结束后记录总时长。每次卡顿可写入JSON Lines日志。
+    """
+
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, log_path=None, recent=100, parent=None):
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.lock = threading.Lock()
+        self.main_thread_id = threading.main_thread().ident
+        self.lateness = LatencyHistogram()
+        self.stalls = deque(maxlen=recent)
+        self.stall_count = 0
+        self.stalled_ms = 0.0
+        self.max_stall_ms = 0.0
+        self.last_beat = None
+        self.open_stall = None
+        self.log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            self.last_beat = time.monotonic()
+        self.timer.start(HEARTBEAT_MS)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def beat(self):
+        """主线程心跳：记录定时器延迟，结束进行中的卡顿"""
+        now = time.monotonic()
+        with self.lock:
+            gap_ms = (now - self.last_beat) * 1000
+            self.last_beat = now
+            self.lateness.observe(max(0.0, gap_ms - HEARTBEAT_MS))
+            stall, self.open_stall = self.open_stall, None
+        if stall is None and gap_ms > self.threshold_ms + HEARTBEAT_MS:
+            # 卡顿太短，后台线程还没来得及抓取调用栈
+            stall = {"started": time.time() - gap_ms / 1000, "stack": [], "handler": "未抓取到调用栈"}
+        if stall is not None:
+            self._finish(stall, gap_ms)
+
+    def _finish(self, stall, duration_ms):
+        stall["duration_ms"] = round(duration_ms, 1)
+        with self.lock:
+            self.stalls.append(stall)
+            self.stall_count += 1
+            self.stalled_ms += duration_ms
+            self.max_stall_ms = max(self.max_stall_ms, duration_ms)
+            if self.log_file is not None:
+                self.log_file.write(json.dumps(stall, ensure_ascii=False) + "\n")
+                self.log_file.flush()
+
+    def _watch(self):
+        interval = max(self.threshold_ms / 4000, 0.005)
+        while not self.stop_event.wait(interval):
+            with self.lock:
+                if self.open_stall is not None or self.last_beat is None:
+                    continue
+                waited_ms = (time.monotonic() - self.last_beat) * 1000
+            if waited_ms <= self.threshold_ms + HEARTBEAT_MS:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            stack, handler = capture_stack(frame) if frame is not None else ([], "未抓取到调用栈")
+            with self.lock:
+                # 抓取期间主线程可能已恢复
+                still_waiting_ms = (time.monotonic() - self.last_beat) * 1000
+                if self.open_stall is None and still_waiting_ms > self.threshold_ms + HEARTBEAT_MS:
+                    self.open_stall = {"started": time.time() - waited_ms / 1000, "stack": stack, "handler": handler}
+
+    def stats(self, limit=5):
+        with self.lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "stalls": self.stall_count,
+                "stalled_ms": round(self.stalled_ms, 1),
+                "max_stall_ms": round(self.max_stall_ms, 1),
+                "event_loop_lateness": self.lateness.summary(),
+                "recent": list(self.stalls)[-limit:],
+            }
+
+
+class FrameMonitor:
+    """动画帧统计：实际帧率、绘制耗时、掉帧数（两帧间隔超过预期的1.5倍）"""
+
+    def __init__(self, expected_interval_ms, window=120):
+        self.expected_interval_ms = expected_interval_ms
+        self.paint = LatencyHistogram()
+        self.intervals = deque(maxlen=window)
+        self.last_frame = None
+        self.frames = 0
+        self.dropped = 0
+
+    def record_frame(self, paint_ms, when=None):
+        now = when if when is not None else time.monotonic()
+        if self.last_frame is not None:
+            interval = (now - self.last_frame) * 1000
+            if interval < IDLE_GAP_MS:
+                self.intervals.append(interval)
+                if interval > self.expected_interval_ms * 1.5:
+                    self.dropped += 1
+        self.last_frame = now
+        self.frames += 1
+        self.paint.observe(paint_ms)
+
+    def stats(self):
+        mean_interval = sum(self.intervals) / len(self.intervals) if self.intervals else None
+        return {
+            "frames": self.frames,
+            "expected_fps": round(1000 / self.expected_interval_ms, 1),
+            "fps": round(1000 / mean_interval, 1) if mean_interval else None,
+            "dropped_frames": self.dropped,
+            "paint": self.paint.summary(),
+        }
@@ -0,0 +1,110 @@
+import sys
+import time
+import builtins
+
+
+class ImportTimer:
+    """替换builtins.__import__，统计每个模块首次导入的耗时
+
+    total为导入该模块的总耗时，self为扣除其间导入其他模块后的耗时；
+    depth为0的是被主模块直接导入的模块。
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.records = {}
+        self.stack = []
+        self.original = None
+
+    def install(self):
+        if self.original is None:
+            self.original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self.original is not None:
+            builtins.__import__ = self.original
+            self.original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 已导入的模块和相对导入直接交给原函数
+        if level or name in sys.modules:
+            return self.original(name, globals, locals, fromlist, level)
+        depth = len(self.stack)
+        self.stack.append(0.0)
+        started = self.clock()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            total = self.clock() - started
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += total
+            self.records.setdefault(name, ((total - children) * 1000, total * 1000, depth))
+
+    def top(self, limit=15, direct_only=False):
+        """按总耗时从大到小返回 [(模块名, 自身耗时ms, 总耗时ms)]"""
+        records = [(name, own, total) for name, (own, total, depth) in self.records.items()
+                   if depth == 0 or not direct_only]
+        return sorted(records, key=lambda item: -item[2])[:limit]
+
+
+class StartupProfiler:
+    """记录启动过程中各阶段完成的时间点（从创建本对象起计时），可选统计导入耗时"""
+
+    def __init__(self, track_imports=False, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.marks = []
+        self.imports = ImportTimer(clock) if track_imports else None
+        if self.imports is not None:
+            self.imports.install()
+
+    @property
+    def enabled(self):
+        return self.imports is not None
+
+    def mark(self, phase):
+        """记录阶段完成的时间，同名阶段只记录第一次"""
+        if all(name != phase for name, _ in self.marks):
+            self.marks.append((phase, self.clock()))
+            # 导入阶段结束后不再拦截import，避免影响运行时
+            if phase == "imports" and self.imports is not None:
+                self.imports.uninstall()
+
+    def elapsed_ms(self, phase):
+        for name, when in self.marks:
+            if name == phase:
+                return (when - self.started) * 1000
+        return None
+
+    def phases(self):
+        """[(阶段, 阶段耗时ms, 累计耗时ms)]"""
+        result = []
+        previous = self.started
+        for name, when in self.marks:
+            result.append((name, (when - previous) * 1000, (when - self.started) * 1000))
+            previous = when
+        return result
+
+    def report(self, targets=None, import_limit=15):
+        """生成文本报告：各阶段耗时、是否达到目标、导入耗时排行"""
+        lines = [f"{'阶段':<20}{'耗时':>10}{'累计':>10}"]
+        for name, own, total in self.phases():
+            lines.append(f"{name:<20}{own:>10.1f}{total:>10.1f}")
+        for phase, target in (targets or {}).items():
+            value = self.elapsed_ms(phase)
+            if value is not None:
+                verdict = "达标" if value <= target else "超出"
+                lines.append(f"{phase}: {value:.1f}ms（目标 {target}ms，{verdict}）")
+        if self.imports is not None:
+            lines.append("")
+            lines.append(f"{'直接导入的模块':<40}{'自身':>10}{'总计':>10}")
+            for name, own, total in self.imports.top(import_limit, direct_only=True):
+                lines.append(f"{name:<40}{own:>10.1f}{total:>10.1f}")
+            lines.append("")
+            lines.append(f"{'耗时最多的模块（含间接导入）':<40}{'自身':>10}{'总计':>10}")
+            by_self = sorted(self.imports.records.items(), key=lambda item: -item[1][0])[:import_limit]
+            for name, (own, total, _) in by_self:
+                lines.append(f"{name:<40}{own:>10.1f}{total:>10.1f}")
+        return "\n".join(lines)
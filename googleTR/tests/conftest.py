@@ -0,0 +1,18 @@
+import os
+import sys
+
+# 各模块直接放在googleTR目录下（非包结构），测试时加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """可手动拨动的时钟，替换time.monotonic"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
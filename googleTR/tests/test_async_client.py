@@ -0,0 +1,73 @@
+import asyncio
+import gc
+import time
+
+import pytest
+
+from async_client import AsyncTranslator
+from fake_server import FakeTranslateServer
+from rate_limiter import RateLimiter
+from translate_engine import TranslationEngine, TranslationError
+
+
+@pytest.fixture
+def server():
+    server = FakeTranslateServer().start()
+    yield server
+    server.stop()
+
+
+def make_client(server, **kwargs):
+    return AsyncTranslator(api_url=server.url, limiter=RateLimiter(rate=1000, burst=1000), **kwargs)
+
+
+def test_translate_many_keeps_order(server):
+    async def main():
+        async with make_client(server, max_concurrency=4) as client:
+            return await client.translate_many([f"第{i}句" for i in range(20)], "zh-CN", "ja")
+    assert asyncio.run(main()) == [f"[ja] 第{i}句" for i in range(20)]
+
+
+def test_stream_many_error_cancels_and_retrieves_other_tasks(server):
+    server.config["error_rate"] = 1.0
+    server.config["latency"] = 50
+    unhandled = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        async with make_client(server, max_concurrency=4) as client:
+            client.engine.max_retries = 0
+            with pytest.raises(TranslationError):
+                await client.translate_many([f"第{i}句" for i in range(6)])
+            await asyncio.sleep(0.2)
+        gc.collect()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert unhandled == []
+
+
+def test_engine_timeout_bounds_total_work(server):
+    server.config["latency"] = 2000
+    engine = TranslationEngine(api_url=server.url, limiter=RateLimiter(rate=1000, burst=1000))
+    started = time.monotonic()
+    with pytest.raises(TranslationError):
+        engine.translate("慢请求", "zh-CN", "en", timeout=0.3)
+    assert time.monotonic() - started < 1.0
+    engine.close()
+
+
+def test_async_timeout_stops_worker_thread(server):
+    server.config["latency"] = 2000
+
+    async def main():
+        client = make_client(server, max_concurrency=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.translate("慢请求", timeout=0.3)
+        # 线程中的请求也已超时结束，下一个任务可以立即使用唯一的工作线程
+        started = time.monotonic()
+        await asyncio.get_running_loop().run_in_executor(client.executor, lambda: None)
+        client.close()
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 0.5
@@ -0,0 +1,124 @@
+from conftest import FakeClock
+from batch_queue import BatchJob, BatchQueue
+from translation_cache import TranslationCache
+
+TEXT = "第一段\n第二段\n第三段"
+
+
+def make_queue():
+    return BatchQueue(max_chars=5, clock=FakeClock())
+
+
+def finish(queue, job):
+    while True:
+        request_job, bodies = queue.next_request()
+        if request_job is None:
+            return
+        queue.complete(request_job, bodies, {body: f"[en] {body}" for body in bodies})
+
+
+def test_job_runs_from_queued_to_done():
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en")
+    assert job.state == BatchJob.QUEUED and job.total == 3
+    request_job, bodies = queue.next_request()
+    assert request_job is job and job.state == BatchJob.RUNNING and job.in_flight == 1
+    queue.complete(job, bodies, {bodies[0]: "[en] " + bodies[0]})
+    finish(queue, job)
+    assert job.state == BatchJob.DONE and job.progress == 1.0
+    assert job.result() == "[en] 第一段\n[en] 第二段\n[en] 第三段"
+
+
+def test_cached_segments_are_not_requested():
+    cache = TranslationCache(":memory:")
+    cache.put("zh-CN", "en", "第二段", "cached")
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en", cache)
+    assert job.total == 2
+    fully_cached = queue.add("缓存", "第二段", "zh-CN", "en", cache)
+    assert fully_cached.state == BatchJob.DONE and fully_cached.result() == "cached"
+    cache.close()
+
+
+def test_pause_and_resume_keep_pending_chunks():
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en")
+    queue.pause(job)
+    assert job.state == BatchJob.PAUSED and queue.next_request() == (None, None) and queue.queue_depth() == 0
+    queue.resume(job)
+    assert job.state == BatchJob.QUEUED and queue.queue_depth() == 3
+
+
+def test_failed_chunk_is_retried_first_after_resume():
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en")
+    _, bodies = queue.next_request()
+    queue.retry(job, bodies)
+    assert queue.attempts(job, bodies) == 1 and job.pending[0] == bodies
+    _, bodies = queue.next_request()
+    queue.fail(job, bodies, "HTTP 500")
+    assert job.state == BatchJob.FAILED and job.error == "HTTP 500" and queue.next_request() == (None, None)
+    queue.resume(job)
+    assert job.state == BatchJob.RUNNING and job.error is None and queue.attempts(job, bodies) == 0
+    assert queue.next_request() == (job, bodies)
+
+
+def test_cancel_drops_pending_and_late_results():
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en")
+    _, bodies = queue.next_request()
+    queue.cancel(job)
+    assert job.state == BatchJob.CANCELLED and not job.pending
+    assert queue.complete(job, bodies, {bodies[0]: "late"}) is False
+    assert job.done == 0 and job.in_flight == 0
+    queue.remove_finished()
+    assert queue.jobs == []
+
+
+def test_prepared_job_waits_for_ready():
+    queue = make_queue()
+    job = queue.create("文档", TEXT, "zh-CN", "en")
+    assert job.state == BatchJob.PREPARING and queue.next_request() == (None, None)
+    queue.remove_finished()
+    assert queue.jobs == [job]
+    job.prepare()
+    queue.ready(job)
+    assert job.state == BatchJob.QUEUED and queue.queue_depth() == 3
+
+
+def test_job_cancelled_while_preparing_stays_cancelled():
+    queue = make_queue()
+    job = queue.create("文档", TEXT, "zh-CN", "en")
+    queue.cancel(job)
+    job.prepare()
+    queue.ready(job)
+    assert job.state == BatchJob.CANCELLED and not job.pending and queue.next_request() == (None, None)
+
+
+def test_preparation_error_fails_job_without_retry():
+    queue = make_queue()
+    job = queue.create("文档", TEXT, "zh-CN", "en")
+    queue.ready(job, "准备任务出错")
+    assert job.state == BatchJob.FAILED and job.error == "准备任务出错"
+    queue.resume(job)
+    assert job.state == BatchJob.FAILED
+
+
+def test_throughput_counts_recent_characters():
+    queue = make_queue()
+    job = queue.add("文档", TEXT, "zh-CN", "en")
+    finish(queue, job)
+    assert queue.throughput() == 9
+    queue.clock.advance(queue.throughput_window + 1)
+    assert queue.throughput() == 0
+
+
+def test_job_from_path_reads_file_when_prepared(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(TEXT.encode("gb18030"))
+    queue = make_queue()
+    job = queue.create("doc.txt", None, "zh-CN", "en", str(path))
+    assert job.chars == 0
+    job.prepare()
+    queue.ready(job)
+    assert job.state == BatchJob.QUEUED and job.chars == len(TEXT) and job.total == 3
@@ -0,0 +1,53 @@
+from prefetch import LanguageUsage, PrefetchPlanner
+from translation_cache import TranslationCache
+
+
+def make_planner(**kwargs):
+    usage = LanguageUsage(":memory:")
+    for lang in ("ja", "ja", "ko"):
+        usage.record(lang)
+    return PrefetchPlanner(TranslationCache(":memory:"), usage, **kwargs)
+
+
+def test_plan_queues_back_translation_and_most_used_targets():
+    planner = make_planner()
+    assert planner.plan("你好", "zh-CN", "en", "Hello") == 3
+    requests = [planner.next_request()[0] for _ in range(3)]
+    assert [(sl, tl) for sl, tl, _ in requests] == [("en", "zh-CN"), ("zh-CN", "ja"), ("zh-CN", "ko")]
+    assert planner.next_request() == (None, 0.0)
+
+
+def test_cached_runs_are_not_planned():
+    planner = make_planner()
+    planner.cache.put("zh-CN", "ja", "你好", "こんにちは")
+    planner.plan("你好", "zh-CN", "en")
+    assert [request[1] for request, _ in iter(planner.next_request, (None, 0.0))] == ["ko"]
+    assert planner.covers("你好", "zh-CN", "ja")
+
+
+def test_requeue_restores_order_and_budget():
+    planner = make_planner(burst_chars=10)
+    planner.plan("你好世界", "zh-CN", "en")
+    request, _ = planner.next_request()
+    tokens = planner.budget.tokens
+    planner.requeue(request)
+    assert planner.budget.tokens == tokens + 4
+    assert planner.stats()["sent"] == 0 and planner.stats()["sent_chars"] == 0
+    assert planner.next_request()[0] == request
+
+
+def test_coverage_checks_do_not_count_as_cache_lookups():
+    planner = make_planner()
+    planner.cache.put("zh-CN", "ja", "你好", "こんにちは")
+    planner.plan("你好", "zh-CN", "en", "Hello")
+    assert planner.covers("你好", "zh-CN", "ja") and not planner.covers("你好", "zh-CN", "ko")
+    stats = planner.cache.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 0
+
+
+def test_language_detection_is_opt_in(tmp_path):
+    assert not LanguageUsage(":memory:").detect_enabled
+    path = tmp_path / "language_usage.json"
+    usage = LanguageUsage(str(path))
+    usage.set_detect_enabled(True)
+    assert LanguageUsage(str(path)).detect_enabled
@@ -0,0 +1,147 @@
+import pytest
+
+from conftest import FakeClock
+from rate_limiter import CircuitBreaker, CircuitOpenError, RateLimiter, TokenBucket, parse_retry_after
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_token_bucket_refills_and_keeps_reserve():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+    clock.advance(1)
+    # 剩2个令牌，要求保留2个时不能取
+    assert bucket.take(keep=2) == pytest.approx(0.5)
+    assert bucket.take() == 0.0
+
+
+def test_breaker_opens_then_half_open_allows_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+    assert breaker.check() is False
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    clock.advance(10)
+    assert breaker.check() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.check() is False
+
+
+def test_breaker_release_probe_lets_next_request_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    open_breaker(breaker)
+    clock.advance(5)
+    assert breaker.check() is True
+    breaker.release_probe()
+    assert breaker.check() is True
+
+
+def test_breaker_lost_probe_times_out():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock, probe_timeout=30)
+    open_breaker(breaker)
+    clock.advance(5)
+    assert breaker.check() is True
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    clock.advance(1)
+    assert breaker.check() is True
+
+
+def test_release_probe_does_not_affect_closed_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, clock=FakeClock())
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.CLOSED and not breaker.probe_in_flight
+
+
+def half_open_limiter(clock):
+    limiter = RateLimiter(rate=10, burst=5, failure_threshold=1, recovery_timeout=5, clock=clock)
+    limiter.record_result(None)
+    clock.advance(5)
+    return limiter
+
+
+def test_limiter_cancelled_probe_is_released():
+    clock = FakeClock()
+    limiter = half_open_limiter(clock)
+    wait, probe = limiter.try_reserve()
+    assert (wait, probe) == (0.0, True)
+    with pytest.raises(CircuitOpenError):
+        limiter.reserve()
+    # 探测请求被取消（没有结果）
+    limiter.release_probe()
+    assert limiter.try_reserve() == (0.0, True)
+
+
+def test_limiter_unsent_reservation_is_refunded():
+    clock = FakeClock()
+    limiter = half_open_limiter(clock)
+    tokens = limiter.metrics()["tokens"]
+    wait, probe = limiter.try_reserve()
+    assert limiter.metrics()["tokens"] == tokens - 1
+    limiter.cancel_reservation(probe)
+    assert limiter.metrics()["tokens"] == tokens
+    assert limiter.metrics()["granted"] == 0
+    assert limiter.try_reserve() == (0.0, True)
+
+
+def test_limiter_delayed_reservation_does_not_hold_probe():
+    clock = FakeClock()
+    limiter = half_open_limiter(clock)
+    limiter.bucket.tokens = 0
+    limiter.bucket.updated = clock()
+    wait, probe = limiter.try_reserve()
+    assert wait > 0 and probe is False
+    clock.advance(wait)
+    assert limiter.try_reserve() == (0.0, True)
+
+
+def test_limiter_probe_result_closes_breaker():
+    clock = FakeClock()
+    limiter = half_open_limiter(clock)
+    limiter.reserve()
+    limiter.record_result(200)
+    assert limiter.metrics()["circuit_state"] == CircuitBreaker.CLOSED
+    assert limiter.try_reserve() == (0.0, False)
+
+
+def test_limiter_throttle_backs_off_and_honours_retry_after():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=100, burst=10, failure_threshold=10, clock=clock, rng=lambda: 1.0)
+    limiter.record_result(429, "3")
+    assert limiter.reserve() == pytest.approx(3)
+    clock.advance(3)
+    assert limiter.reserve() == 0.0
+    # 连续第二次被限流，退避时间翻倍
+    limiter.record_result(429)
+    assert limiter.reserve() == pytest.approx(limiter.backoff_delay(1))
+
+
+def test_backoff_delay_is_capped():
+    limiter = RateLimiter(base_backoff=1, max_backoff=8, rng=lambda: 1.0)
+    assert [limiter.backoff_delay(attempt) for attempt in range(5)] == [1, 2, 4, 8, 8]
+
+
+def test_backoff_delay_uses_equal_jitter():
+    low = RateLimiter(base_backoff=1, max_backoff=8, rng=lambda: 0.0)
+    assert [low.backoff_delay(attempt) for attempt in range(5)] == [0.5, 1, 2, 4, 4]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(b" 2 ") == 2.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
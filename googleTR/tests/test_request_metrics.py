@@ -0,0 +1,36 @@
+import threading
+
+from request_metrics import RequestMetrics, RequestTiming
+
+
+def test_timing_ids_are_unique_across_threads():
+    ids = []
+    lock = threading.Lock()
+
+    def create():
+        created = [RequestTiming().id for _ in range(2000)]
+        with lock:
+            ids.extend(created)
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == len(ids) == 16000
+
+
+def test_record_summarises_phases():
+    metrics = RequestMetrics()
+    timing = RequestTiming(10, enqueue=0.0)
+    timing.mark("send", 0.010)
+    timing.mark("first_byte", 0.060)
+    timing.mark("finished", 0.070)
+    timing.bytes = 100
+    metrics.record(timing)
+    summary = metrics.summary()
+    assert summary["requests"] == 1 and summary["bytes"] == 100
+    assert summary["phases"]["queue"]["count"] == 1
+    assert round(summary["phases"]["ttfb"]["mean_ms"]) == 50
+    assert summary["phases"]["ttfb_reused_connection"]["count"] == 1
+    metrics.close()
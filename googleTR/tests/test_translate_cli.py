@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import translate_cli
+from fake_server import FakeTranslateServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = FakeTranslateServer().start()
+    yield server
+    server.stop()
+
+
+def run_cli(server, tmp_path, name, content, *extra):
+    source = tmp_path / name
+    source.write_text(content, encoding="utf-8")
+    output = tmp_path / ("out_" + name)
+    code = translate_cli.main([str(source), "-o", str(output), "--no-cache", "--api-url", server.url,
+                               "--rate", "1000", "--burst", "1000", *extra])
+    return code, output.read_text(encoding="utf-8")
+
+
+def test_translates_text_lines_in_order(server, tmp_path):
+    code, output = run_cli(server, tmp_path, "input.txt", "第一行\n第二行\n\n第四行\n")
+    assert code == 0
+    assert output.splitlines() == ["[en] 第一行", "[en] 第二行", "", "[en] 第四行"]
+
+
+def test_translates_csv_column(server, tmp_path):
+    code, output = run_cli(server, tmp_path, "input.csv", "id,text\n1,你好\n", "--column", "1", "--header")
+    assert code == 0
+    assert output.splitlines() == ["id,text,translation", "1,你好,[en] 你好"]
+
+
+def test_invalid_jsonl_lines_are_reported_and_passed_through(server, tmp_path, capsys):
+    lines = ['{"text": "你好"}', "{broken", "[1, 2]", '{"text": 5}', '{"text": "再见"}']
+    code, output = run_cli(server, tmp_path, "input.jsonl", "\n".join(lines) + "\n")
+    assert code == 0
+    records = output.splitlines()
+    assert json.loads(records[0]) == {"text": "你好", "translation": "[en] 你好"}
+    assert records[1:4] == lines[1:4]
+    assert json.loads(records[4])["translation"] == "[en] 再见"
+    err = capsys.readouterr().err
+    assert "第 2 行JSON解析失败" in err and "第 3 行不是JSON对象" in err and "第 4 行字段 text 不是字符串" in err
+
+
+def test_failed_records_are_passed_through_and_reported(server, tmp_path, capsys):
+    server.config["error_rate"] = 1.0
+    try:
+        code, output = run_cli(server, tmp_path, "input.txt", "第一行\n第二行\n", "--workers", "1")
+    finally:
+        server.config["error_rate"] = 0.0
+    assert code == 1
+    assert output.splitlines() == ["第一行", "第二行"]
+    err = capsys.readouterr().err
+    assert "第 1 条记录翻译失败" in err and "第 2 条记录翻译失败" in err and "其中 2 条翻译失败" in err
+    assert not (tmp_path / "out_input.txt.checkpoint").exists()
@@ -0,0 +1,43 @@
+import pytest
+
+from fake_server import FakeTranslateServer
+from rate_limiter import RateLimiter
+from request_metrics import RequestMetrics
+from translate_engine import TranslationEngine, TranslationError
+from translation_cache import TranslationCache
+
+
+@pytest.fixture
+def server():
+    server = FakeTranslateServer().start()
+    yield server
+    server.stop()
+
+
+def make_engine(server, **kwargs):
+    return TranslationEngine(api_url=server.url, limiter=RateLimiter(rate=1000, burst=1000), **kwargs)
+
+
+def test_translate_requests_only_uncached_segments(server):
+    cache = TranslationCache(":memory:")
+    cache.put("zh-CN", "en", "第二段", "cached")
+    engine = make_engine(server, cache=cache)
+    assert engine.translate("第一段\n第二段\n第三段", "zh-CN", "en") == "[en] 第一段\ncached\n[en] 第三段"
+    requests = server.stats["requests"]
+    # 全部分段已缓存，不再发送请求
+    assert engine.translate("第一段\n第三段", "zh-CN", "en") == "[en] 第一段\n[en] 第三段"
+    assert server.stats["requests"] == requests
+    engine.close()
+    cache.close()
+
+
+def test_server_error_raises_and_is_recorded(server):
+    server.config["error_rate"] = 1.0
+    metrics = RequestMetrics()
+    engine = make_engine(server, max_retries=0, metrics=metrics)
+    with pytest.raises(TranslationError, match="HTTP 500"):
+        engine.translate("出错", "zh-CN", "en")
+    summary = engine.stats()["requests"]
+    assert summary["requests"] == 1 and summary["errors"] == 1
+    engine.close()
+    metrics.close()
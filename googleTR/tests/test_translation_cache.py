@@ -0,0 +1,76 @@
+from translation_cache import TranslationCache
+
+
+def test_memory_layer_evicts_least_recently_used():
+    cache = TranslationCache(":memory:", max_entries=2)
+    cache.put("zh-CN", "en", "一", "one")
+    cache.put("zh-CN", "en", "二", "two")
+    assert cache.get("zh-CN", "en", "一") == "one"
+    cache.put("zh-CN", "en", "三", "three")
+    assert cache.stats()["memory_entries"] == 2
+    # "二"最久未使用，已移出内存但仍可从磁盘读回
+    assert cache.get("zh-CN", "en", "二") == "two"
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_trim_removes_least_recently_accessed_rows():
+    cache = TranslationCache(":memory:", max_entries=0, max_disk_entries=2)
+    for accessed, text in enumerate(["一", "二", "三"]):
+        cache.put("zh-CN", "en", text, text)
+        cache.db.execute("UPDATE translations SET accessed = ? WHERE key = ?",
+                         (accessed, cache.make_key("zh-CN", "en", text)))
+    cache.trim()
+    assert cache.get("zh-CN", "en", "一") is None
+    assert cache.get("zh-CN", "en", "二") == "二" and cache.get("zh-CN", "en", "三") == "三"
+    cache.close()
+
+
+def test_expired_entries_are_deleted_on_read():
+    cache = TranslationCache(":memory:", max_age=-1)
+    cache.put("zh-CN", "en", "过期", "expired")
+    assert cache.get("zh-CN", "en", "过期") is None
+    assert cache.db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] == 0
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_peek_does_not_touch_stats_or_lru_order():
+    cache = TranslationCache(":memory:", max_entries=2)
+    cache.put("zh-CN", "en", "一", "one")
+    cache.put("zh-CN", "en", "二", "two")
+    assert cache.peek("zh-CN", "en", "一") == "one" and cache.peek("zh-CN", "en", "三") is None
+    cache.put("zh-CN", "en", "三", "three")
+    # peek没有把"一"移到最近使用，仍被移出内存；磁盘上的条目peek也能查到
+    assert "一" not in [translation for translation, _ in cache.memory.values()]
+    assert cache.peek("zh-CN", "en", "一") == "one"
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+    cache.close()
+
+
+class CountingConnection:
+    def __init__(self, db):
+        self.db = db
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        self.db.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+def test_put_many_commits_once_and_reads_do_not_commit():
+    cache = TranslationCache(":memory:", max_entries=0)
+    cache.db = CountingConnection(cache.db)
+    cache.put_many("zh-CN", "en", {"一": "one", "二": "two", "三": "three"})
+    assert cache.db.commits == 1
+    assert cache.get("zh-CN", "en", "二") == "two" and cache.stats()["disk_hits"] == 1
+    assert cache.db.commits == 1
+    # 访问时间随下一次写入一并提交
+    cache.put("zh-CN", "en", "四", "four")
+    assert cache.db.commits == 2
+    accessed = dict(cache.db.execute("SELECT translation, accessed FROM translations").fetchall())
+    assert accessed["two"] >= accessed["four"] - 1 and accessed["two"] > accessed["one"]
+    cache.close()
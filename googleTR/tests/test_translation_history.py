@@ -0,0 +1,58 @@
+import pytest
+
+from translation_history import TranslationHistory, COMPACT_INTERVAL
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def history():
+    history = TranslationHistory(":memory:", max_entries=3, retention_days=10)
+    yield history
+    history.close()
+
+
+def fill(history):
+    history.append("zh-CN", "en", "今天天气很好", "The weather is nice today", when=1 * DAY)
+    history.append("zh-CN", "en", "明天会下雨", "It will rain tomorrow", when=2 * DAY)
+    history.append("en", "zh-CN", "Good morning", "早上好", when=3 * DAY)
+
+
+def test_append_skips_empty_and_repeated_entries(history):
+    assert history.append("zh-CN", "en", "你好", "Hello") is not None
+    assert history.append("zh-CN", "en", "你好", "Hello") is None
+    assert history.append("zh-CN", "en", "  ", "Hello") is None
+    assert history.count() == 1
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_search_matches_all_terms_newest_first(history, fts):
+    history.fts = history.fts and fts
+    fill(history)
+    assert [entry.source for entry in history.search("")] == ["Good morning", "明天会下雨", "今天天气很好"]
+    assert [entry.translation for entry in history.search("weather nice")] == ["The weather is nice today"]
+    # 少于3个字符的关键词不走三字母组索引
+    assert [entry.source for entry in history.search("早上")] == ["Good morning"]
+    assert [entry.source for entry in history.search("天 rain")] == ["明天会下雨"]
+    assert history.search("weather rain") == []
+    assert history.search("100%") == []
+
+
+def test_compact_removes_expired_and_excess_entries(history):
+    fill(history)
+    history.append("zh-CN", "en", "最新的一条", "The newest one", when=12 * DAY)
+    # 第1天的条目超过保留天数（10天），且总数超出上限3条
+    assert history.compact(now=12 * DAY) == 1
+    assert history.count() == 3
+    assert history.search("天气") == []
+    assert not history.needs_compaction(now=12 * DAY)
+    assert history.needs_compaction(now=12 * DAY + COMPACT_INTERVAL + 1)
+    assert history.compact(now=12.5 * DAY) == 1
+    assert [entry.source for entry in history.search("")] == ["最新的一条", "Good morning"]
+
+
+def test_clear_removes_entries_and_index(history):
+    fill(history)
+    history.clear()
+    assert history.count() == 0 and history.search("weather") == []
+    assert history.append("zh-CN", "en", "明天会下雨", "It will rain tomorrow") is not None
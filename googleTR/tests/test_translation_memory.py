@@ -0,0 +1,21 @@
+from translation_memory import MemoryWriter, TranslationMemory
+
+
+def test_lookup_finds_similar_source_and_transfers_numbers():
+    memory = TranslationMemory(":memory:")
+    memory.add("zh-CN", "en", "订单 123 已发货", "Order 123 has shipped")
+    translation, similarity, source = memory.lookup("zh-CN", "en", "订单 456 已发货")
+    assert translation == "Order 456 has shipped" and source == "订单 123 已发货" and similarity >= 0.7
+    assert memory.lookup("zh-CN", "ja", "订单 456 已发货") is None
+    memory.close()
+
+
+def test_writer_indexes_in_order_and_drains_on_close():
+    memory = TranslationMemory(":memory:")
+    writer = MemoryWriter(memory)
+    writer.add_many("zh-CN", "en", {"今天天气很好": "first"})
+    writer.add_many("zh-CN", "en", {"今天天气很好": "second"})
+    writer.close()
+    assert not writer.thread.is_alive() and writer.pending() == 0
+    assert memory.lookup("zh-CN", "en", "今天天气很好")[0] == "second"
+    memory.close()
@@ -0,0 +1,325 @@
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from conftest import FakeClock
+from backends import Backend, BackendPool
+from fake_server import FakeTranslateServer
+from prefetch import LanguageUsage
+from rate_limiter import CircuitBreaker, RateLimiter
+from translation_cache import TranslationCache
+from translation_history import TranslationHistory
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def server():
+    server = FakeTranslateServer(latency=300).start()
+    yield server
+    server.stop()
+
+
+def wait(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def settle(condition, timeout_ms=5000):
+    deadline = time.monotonic() + timeout_ms / 1000
+    while time.monotonic() < deadline:
+        wait(20)
+        if condition():
+            return True
+    return False
+
+
+def make_window(app, backends, limiter):
+    import google_translator
+    window = google_translator.GoogleTranslator(
+        cache=TranslationCache(":memory:"), memory=TranslationMemory(":memory:"), usage=LanguageUsage(":memory:"),
+        history=TranslationHistory(":memory:"), backends=backends, prewarm=False)
+    window.rate_limiter = limiter
+    return window
+
+
+def translate_now(window, text):
+    window.source_text.setPlainText(text)
+    window.translate_timer.stop()
+    window.translate_text()
+
+
+def supersede_probe_then_translate(window, server):
+    """半开状态下发出一个请求（探测），在它返回前改为翻译别的内容，之后的翻译应能正常完成"""
+    translate_now(window, "第一段原文")
+    assert server.stats["requests"] == 0 and window.pending_requests
+    translate_now(window, "完全不同的第二段")
+    assert settle(lambda: window.current_job is None and window.target_text.fullText() == "[en] 完全不同的第二段"), \
+        window.statusBar.currentMessage()
+    translate_now(window, "第三段")
+    assert settle(lambda: window.target_text.fullText() == "[en] 第三段"), window.statusBar.currentMessage()
+
+
+def test_cancelled_backend_probe_is_released(app, server):
+    clock = FakeClock()
+    backend = Backend(server.url, clock=clock)
+    window = make_window(app, BackendPool([backend]), RateLimiter(rate=1000, burst=1000))
+    for _ in range(backend.breaker.failure_threshold):
+        window.backends.record(backend, 0, False)
+    clock.advance(backend.breaker.recovery_timeout)
+    supersede_probe_then_translate(window, server)
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+    assert not window.backend_probes
+    window.close()
+
+
+def test_cancelled_limiter_probe_is_released(app, server):
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1000, burst=1000, failure_threshold=1, recovery_timeout=5, clock=clock)
+    limiter.record_result(None)
+    clock.advance(5)
+    window = make_window(app, BackendPool([Backend(server.url)]), limiter)
+    supersede_probe_then_translate(window, server)
+    assert limiter.breaker.state == CircuitBreaker.CLOSED
+    assert not window.limiter_probes
+    window.close()
+
+
+def test_hedge_without_alternative_takes_no_token(app, server):
+    first, second = Backend(server.url, name="a"), Backend(server.url, name="b")
+    limiter = RateLimiter(rate=1000, burst=1000)
+    window = make_window(app, BackendPool([first, second]), limiter)
+    translate_now(window, "对冲测试")
+    reply = next(iter(window.pending_requests))
+    for _ in range(second.breaker.failure_threshold):
+        window.backends.record(second, 0, False)
+    granted = limiter.metrics()["granted"]
+    window.hedge_request(reply)
+    assert limiter.metrics()["granted"] == granted and window.hedges_sent == 0
+    assert settle(lambda: window.current_job is None)
+    window.close()
+
+
+def test_hedge_held_by_limiter_releases_backend_probe(app, server):
+    clock = FakeClock()
+    first, second = Backend(server.url, name="a"), Backend(server.url, name="b", clock=clock)
+    limiter = RateLimiter(rate=1000, burst=1000)
+    window = make_window(app, BackendPool([first, second]), limiter)
+    translate_now(window, "对冲限流测试")
+    reply = next(iter(window.pending_requests))
+    for _ in range(second.breaker.failure_threshold):
+        window.backends.record(second, 0, False)
+    clock.advance(second.breaker.recovery_timeout)
+    # 冷却期已过，之前的探测被取消，接口停在半开状态
+    second.breaker.check()
+    second.breaker.release_probe()
+    limiter.backoff_until = limiter.clock() + 60
+    window.hedge_request(reply)
+    assert window.hedges_sent == 0
+    assert second.breaker.state == CircuitBreaker.HALF_OPEN and not second.breaker.probe_in_flight
+    limiter.backoff_until = 0
+    assert settle(lambda: window.current_job is None)
+    window.close()
+
+
+def test_batch_waiting_for_limiter_leaves_backend_probe(app, server):
+    clock = FakeClock()
+    backend = Backend(server.url, clock=clock)
+    limiter = RateLimiter(rate=1000, burst=1000)
+    window = make_window(app, BackendPool([backend]), limiter)
+    for _ in range(backend.breaker.failure_threshold):
+        window.backends.record(backend, 0, False)
+    clock.advance(backend.breaker.recovery_timeout)
+    limiter.backoff_until = limiter.clock() + 60
+    job = window.add_batch_job("批量", "批量原文")
+    assert settle(lambda: job.state != "preparing")
+    assert not window.batch_replies and not backend.breaker.probe_in_flight
+    window.batch_timer.stop()
+    window.close()
+
+
+def test_batch_open_backend_returns_limiter_token(app, server):
+    backend = Backend(server.url)
+    limiter = RateLimiter(rate=1000, burst=1000)
+    window = make_window(app, BackendPool([backend]), limiter)
+    for _ in range(backend.breaker.failure_threshold):
+        window.backends.record(backend, 0, False)
+    job = window.add_batch_job("批量", "批量原文")
+    assert settle(lambda: job.state != "preparing")
+    assert not window.batch_replies and limiter.metrics()["granted"] == 0
+    window.batch_timer.stop()
+    window.close()
+
+
+def test_cancelled_batch_request_releases_backend_probe(app, server):
+    clock = FakeClock()
+    backend = Backend(server.url, clock=clock)
+    window = make_window(app, BackendPool([backend]), RateLimiter(rate=1000, burst=1000))
+    for _ in range(backend.breaker.failure_threshold):
+        window.backends.record(backend, 0, False)
+    clock.advance(backend.breaker.recovery_timeout)
+    job = window.add_batch_job("批量", "批量原文")
+    assert settle(lambda: window.batch_replies)
+    assert backend.breaker.probe_in_flight
+    window.cancel_batch_job(job)
+    assert not window.batch_replies and not backend.breaker.probe_in_flight
+    second = window.add_batch_job("批量2", "另一段批量原文")
+    assert settle(lambda: second.state == "done"), second.to_dict()
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+    window.close()
+
+
+def test_batch_job_is_prepared_in_thread_pool(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.cache.put("zh-CN", "en", "已缓存的一段", "cached")
+    job = window.add_batch_job("批量", "已缓存的一段\n未缓存的一段")
+    assert job.state == "preparing" and not window.batch_replies
+    assert settle(lambda: job.state == "done"), job.to_dict()
+    assert job.total == 1 and server.stats["requests"] == 1
+    window.close()
+
+
+def test_batch_file_is_read_in_thread_pool(app, server, tmp_path, monkeypatch):
+    import batch_queue
+    threads = []
+    read = batch_queue.read_text_file
+    monkeypatch.setattr(batch_queue, "read_text_file",
+                        lambda path: threads.append(threading.current_thread()) or read(path))
+    path = tmp_path / "doc.txt"
+    path.write_bytes("文件里的一段".encode("gb18030"))
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.show_batch_panel()
+    window.batch_panel.add_files([str(path)])
+    job = window.batch_queue.jobs[0]
+    assert job.state == "preparing" and job.path == str(path)
+    assert settle(lambda: job.state == "done"), job.to_dict()
+    assert threads and threading.main_thread() not in threads
+    assert job.result() == "[en] 文件里的一段" and job.chars == 6
+    window.batch_panel.close()
+    window.close()
+
+
+def test_batch_job_cancelled_while_preparing_stays_cancelled(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    job = window.add_batch_job("批量", "准备中取消")
+    window.cancel_batch_job(job)
+    assert settle(lambda: not window.parse_tasks)
+    assert job.state == "cancelled" and not job.pending and not window.batch_replies
+    window.close()
+
+
+def test_history_search_does_not_count_entries(app, server, monkeypatch):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.history.append("zh-CN", "en", "历史原文", "history")
+    window.show_history_panel()
+    panel = window.history_panel
+    calls = []
+    monkeypatch.setattr(window.history, "count", lambda: calls.append(1) or 0)
+    panel.search_box.setText("历史")
+    panel.search_timer.stop()
+    panel.search()
+    assert panel.summary.text().startswith("共 1 条记录，找到 1 条") and not calls
+    panel.close()
+    window.close()
+
+
+def test_history_compaction_is_checked_periodically(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.start_services()
+    assert window.compact_timer.isActive() and window.compact_timer.interval() == 3600 * 1000
+    assert settle(lambda: not window.compacting)
+    assert window.history.stats()["last_compacted"] is not None
+    window.close()
+    assert not window.compact_timer.isActive()
+
+
+def test_history_records_the_text_that_was_translated(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    translate_now(window, "发送时的原文")
+    # 请求返回前继续输入，防抖计时器尚未触发
+    window.source_text.setPlainText("发送时的原文，之后又输入了一些")
+    window.translate_timer.stop()
+    assert settle(lambda: window.current_job is None)
+    assert window.history_pending[0] == "发送时的原文"
+    assert window.history_pending[3] == "[en] 发送时的原文"
+    window.close()
+
+
+def test_prefetch_plans_from_the_text_that_was_translated(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.usage.set_prefetch_enabled(True)
+    translate_now(window, "预取用的原文")
+    window.source_text.setPlainText("预取用的原文，之后又输入了一些")
+    window.translate_timer.stop()
+    assert settle(lambda: window.prefetch_source is not None)
+    assert window.prefetch_source[0] == "预取用的原文"
+    window.prefetch_timer.stop()
+    window.close()
+
+
+def test_explicit_source_language_is_not_overridden(app, server):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    window.source_lang_combo.setCurrentText("英语")
+    window.target_lang_combo.setCurrentText("日语")
+    translate_now(window, "这是一段明显的中文文本")
+    assert window.current_languages() == ("en", "ja") and window.detected_switches == 0
+    assert settle(lambda: window.current_job is None)
+    # 用户开启自动识别后才切换源语言
+    window.toggle_detect(True)
+    translate_now(window, "这是另一段明显的中文文本")
+    assert window.current_languages() == ("zh-CN", "ja") and window.detected_switches == 1
+    assert settle(lambda: window.current_job is None)
+    window.close()
+
+
+def test_prefetch_reserves_only_when_sending(app, server):
+    backend = Backend(server.url)
+    limiter = RateLimiter(rate=1000, burst=1000)
+    window = make_window(app, BackendPool([backend]), limiter)
+    window.usage.set_prefetch_enabled(True)
+    window.dispatch_prefetch()
+    assert limiter.metrics()["granted"] == 0
+    window.prefetcher.queue.append(("zh-CN", "ja", ["预取原文"]))
+    for _ in range(backend.breaker.failure_threshold):
+        window.backends.record(backend, 0, False)
+    window.dispatch_prefetch()
+    assert limiter.metrics()["granted"] == 0 and not window.prefetch_replies
+    assert list(window.prefetcher.queue) == [("zh-CN", "ja", ["预取原文"])]
+    window.close()
+
+
+def test_small_reply_indexes_memory_off_the_ui_thread(app, server, monkeypatch):
+    window = make_window(app, BackendPool([Backend(server.url)]), RateLimiter(rate=1000, burst=1000))
+    threads = []
+    add_many = window.memory.add_many
+    monkeypatch.setattr(window.memory, "add_many",
+                        lambda *args: threads.append(threading.current_thread()) or add_many(*args))
+    translate_now(window, "翻译记忆在后台写入")
+    assert settle(lambda: window.current_job is None)
+    window.memory_writer.flush()
+    assert threads and threading.main_thread() not in threads
+    assert window.memory.lookup("zh-CN", "en", "翻译记忆在后台写入") is not None
+    window.close()
+
+
+def test_non_essential_modules_are_not_imported_before_first_paint():
+    import subprocess
+    import sys
+    deferred = ["translation_cache", "parse_worker", "prefetch", "language_detect", "backends",
+                "stall_watchdog", "batch_queue", "request_metrics"]
+    code = f"import sys, google_translator; print([m for m in {deferred!r} if m in sys.modules])"
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True,
+                            check=True).stdout
+    assert output.strip() == "[]"
@@ -0,0 +1,40 @@
+import json
+from urllib.parse import urlencode
+
+
+# Google翻译API地址
+API_URL = "https://translate.googleapis.com/translate_a/single"
+
+# 界面显示名称 -> 语言代码
+LANGUAGE_CODES = {
+    "中文 (简体)": "zh-CN",
+    "英语": "en",
+    "日语": "ja",
+    "韩语": "ko",
+    "法语": "fr",
+    "德语": "de",
+    "西班牙语": "es",
+    "俄语": "ru"
+}
+
+
+def get_language_code(language):
+    """获取语言代码"""
+    return LANGUAGE_CODES.get(language, "en")
+
+
+def build_request_url(source_lang, target_lang, api_url=API_URL):
+    """构造请求地址（原文放在POST正文中）"""
+    query = urlencode({"client": "gtx", "sl": source_lang, "tl": target_lang, "dt": "t"})
+    return f"{api_url}?{query}"
+
+
+def build_request_body(text):
+    """构造POST正文"""
+    return urlencode({"q": text}).encode("ascii")
+
+
+def parse_response(data):
+    """解析Google翻译API的响应，返回译文"""
+    json_data = json.loads(data.decode("utf-8"))
+    return "".join(sentence[0] for sentence in json_data[0] if sentence[0])
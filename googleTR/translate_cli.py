@@ -0,0 +1,247 @@
+"""命令行批量翻译工具
+
+逐行流式读取纯文本、CSV或JSONL文件，并发翻译后按输入顺序写出结果，
+内存占用与文件大小无关。中断后可使用 --resume 从检查点继续。
+
+示例:
+    python translate_cli.py input.txt -o output.txt --sl zh-CN --tl en
+    python translate_cli.py data.jsonl -o out.jsonl --field text --workers 16 --resume
+"""
+import os
+import io
+import csv
+import sys
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from translation_cache import TranslationCache
+from translate_engine import API_URL, TranslationEngine, TranslationError
+from rate_limiter import RateLimiter
+from request_metrics import RequestMetrics
+
+
+class LineReader:
+    """按行读取二进制流并记录已读取的字节偏移，用于检查点"""
+
+    def __init__(self, stream, offset=0):
+        self.stream = stream
+        self.offset = offset
+
+    def __iter__(self):
+        for raw in self.stream:
+            self.offset += len(raw)
+            yield raw.decode("utf-8")
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "txt"
+
+
+def iter_records(reader, fmt, args, skip_header, first_line=1):
+    """产出 (待翻译文本, 由译文生成输出行的函数, 该记录结束处的输入偏移)
+
+    first_line为读取的第一行的行号（从检查点继续时不为1），用于报告JSONL中无法解析的行。
+    """
+    if fmt == "csv":
+        rows = csv.reader(reader)
+        if args.header and not skip_header:
+            header = next(rows, None)
+            if header is not None:
+                yield "", lambda _, row=header: format_csv(row + [args.output_field]), reader.offset
+        column = args.column
+        for row in rows:
+            text = row[column] if column < len(row) else ""
+            yield text, lambda translation, row=row: format_csv(row + [translation]), reader.offset
+    elif fmt == "jsonl":
+        for number, line in enumerate(reader, first_line):
+            if not line.strip():
+                yield "", lambda _, line=line: line, reader.offset
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                obj = e
+            if isinstance(obj, ValueError):
+                reason = f"JSON解析失败: {obj}"
+            elif not isinstance(obj, dict):
+                reason = "不是JSON对象"
+            elif not isinstance(obj.get(args.field) or "", str):
+                reason = f"字段 {args.field} 不是字符串"
+            else:
+                reason = None
+            if reason is not None:
+                # 无法处理的行原样写出并跳过翻译，输出与输入仍逐行对应
+                print(f"\n第 {number} 行{reason}，已跳过", file=sys.stderr)
+                yield "", lambda _, line=line: line if line.endswith("\n") else line + "\n", reader.offset
+                continue
+            text = obj.get(args.field) or ""
+
+            def render(translation, obj=obj):
+                obj[args.output_field] = translation
+                return json.dumps(obj, ensure_ascii=False) + "\n"
+            yield text, render, reader.offset
+    else:
+        for line in reader:
+            text = line.rstrip("\r\n")
+            yield text, lambda translation: translation + "\n", reader.offset
+
+
+def format_csv(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def save_checkpoint(path, state):
+    """原子写入检查点"""
+    if not path:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def run(args):
+    fmt = args.format if args.format != "auto" else detect_format(args.input)
+    use_stdio = args.input == "-" or args.output == "-"
+    checkpoint_path = None if use_stdio else (args.checkpoint or args.output + ".checkpoint")
+
+    state = {"input": os.path.abspath(args.input), "records": 0, "input_offset": 0, "output_offset": 0}
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint is not None:
+        if checkpoint.get("input") != state["input"]:
+            print(f"检查点对应的输入文件不一致: {checkpoint.get('input')}", file=sys.stderr)
+            return 2
+        state = checkpoint
+        print(f"从检查点继续：已完成 {state['records']} 条记录", file=sys.stderr)
+
+    if args.input == "-":
+        source = sys.stdin.buffer
+    else:
+        source = open(args.input, "rb")
+        source.seek(state["input_offset"])
+    if args.output == "-":
+        sink = sys.stdout.buffer
+    else:
+        sink = open(args.output, "r+b" if checkpoint is not None else "wb")
+        sink.seek(state["output_offset"])
+        sink.truncate()
+
+    cache = None if args.no_cache else TranslationCache()
+    limiter = RateLimiter(rate=args.rate, burst=args.burst)
+    metrics = RequestMetrics(args.trace_log)
+    engine = TranslationEngine(cache=cache, pool_size=args.workers, timeout=args.timeout,
+                               api_url=args.api_url, limiter=limiter, metrics=metrics)
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    # 已提交但尚未写出的记录，窗口大小固定，保证内存占用恒定
+    pending = deque()
+    window = args.workers * 4
+
+    def write_next():
+        future, text, render, offset = pending.popleft()
+        try:
+            translation = future.result()
+        except TranslationError as e:
+            # 单条记录多次重试仍失败时写出原文并继续，不中断整个文件；结束时以非0退出码报告
+            translation = text
+            state["failed"] = state.get("failed", 0) + 1
+            print(f"\n第 {state['records'] + 1} 条记录翻译失败，已写出原文: {e}", file=sys.stderr)
+        sink.write(render(translation).encode("utf-8"))
+        state["records"] += 1
+        state["input_offset"] = offset
+        if state["records"] % args.checkpoint_every == 0:
+            sink.flush()
+            if checkpoint_path:
+                state["output_offset"] = sink.tell()
+                save_checkpoint(checkpoint_path, state)
+            print(f"\r已完成 {state['records']} 条", end="", file=sys.stderr)
+
+    reader = LineReader(source, state["input_offset"])
+    exit_code = 0
+    try:
+        for text, render, offset in iter_records(reader, fmt, args, skip_header=state["input_offset"] > 0,
+                                                 first_line=state["records"] + 1):
+            pending.append((executor.submit(engine.translate, text, args.sl, args.tl), text, render, offset))
+            if len(pending) >= window:
+                write_next()
+        while pending:
+            write_next()
+    except KeyboardInterrupt:
+        print("\n已中断", file=sys.stderr)
+        exit_code = 130
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        sink.flush()
+        if checkpoint_path:
+            state["output_offset"] = sink.tell()
+            save_checkpoint(checkpoint_path, state)
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+        engine.close()
+        metrics.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"\n请求统计: {json.dumps(engine.stats(), ensure_ascii=False)}", file=sys.stderr)
+    failed = state.get("failed", 0)
+    if exit_code == 0:
+        print(f"完成，共 {state['records']} 条记录", file=sys.stderr)
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        if failed:
+            print(f"其中 {failed} 条翻译失败，输出中为原文", file=sys.stderr)
+            exit_code = 1
+    else:
+        print("可使用 --resume 从检查点继续", file=sys.stderr)
+    return exit_code
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="批量翻译纯文本、CSV或JSONL文件")
+    parser.add_argument("input", help="输入文件，- 表示标准输入")
+    parser.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    parser.add_argument("--sl", default="zh-CN", help="源语言代码，默认 zh-CN")
+    parser.add_argument("--tl", default="en", help="目标语言代码，默认 en")
+    parser.add_argument("--format", choices=["auto", "txt", "csv", "jsonl"], default="auto",
+                        help="输入格式，默认按扩展名判断")
+    parser.add_argument("--field", default="text", help="JSONL中待翻译的字段")
+    parser.add_argument("--column", type=int, default=0, help="CSV中待翻译的列序号")
+    parser.add_argument("--header", action="store_true", help="CSV首行为表头")
+    parser.add_argument("--output-field", default="translation", help="译文写入的字段名/列名")
+    parser.add_argument("--workers", type=int, default=8, help="并发请求数")
+    parser.add_argument("--timeout", type=float, default=15, help="单个请求超时（秒）")
+    parser.add_argument("--rate", type=float, default=10, help="每秒最多发出的请求数")
+    parser.add_argument("--burst", type=int, default=20, help="允许的突发请求数")
+    parser.add_argument("--checkpoint", help="检查点文件，默认为 输出文件.checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="每完成多少条记录保存一次检查点")
+    parser.add_argument("--resume", action="store_true", help="从检查点继续")
+    parser.add_argument("--no-cache", action="store_true", help="不使用本地翻译缓存")
+    parser.add_argument("--api-url", default=API_URL, help="翻译接口地址，可指向本地替身服务")
+    parser.add_argument("--trace-log", help="逐请求耗时追踪日志（JSON Lines）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from segmenter import split_segments, group_missing, split_run_translation, assemble
+from rate_limiter import shared_limiter, CircuitOpenError
+from single_flight import SingleFlight
+from request_metrics import RequestTiming
+# 请求格式与语言代码定义在不依赖requests的translate_api中，这里重新导出以保持兼容
+from translate_api import (API_URL, LANGUAGE_CODES, get_language_code, build_request_url, build_request_body,
+                           parse_response)
+
+
+class TranslationError(Exception):
+    """翻译请求失败或响应无法解析"""
+
+
+class TranslationEngine:
+    """不依赖界面的翻译引擎，可在多个线程中共享
+
+    内部使用带连接池的requests.Session，同一主机的连接会被复用。
+    所有请求先经过限流器，默认与桌面应用共用进程内的shared_limiter()；
+    并发的相同请求（语言对和原文都相同）只发送一次，结果由所有调用方共享。
+    """
+
+    def __init__(self, cache=None, pool_size=8, timeout=15, api_url=API_URL, limiter=None, max_retries=3,
+                 metrics=None):
+        self.cache = cache
+        self.api_url = api_url
+        self.limiter = limiter if limiter is not None else shared_limiter()
+        self.max_retries = max_retries
+        # 可选的RequestMetrics，记录每次请求各阶段的耗时
+        self.metrics = metrics
+        self.single_flight = SingleFlight()
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Content-Type"] = "application/x-www-form-urlencoded;charset=UTF-8"
+
+    def request(self, source_lang, target_lang, text, deadline=None):
+        """发送一次翻译请求，不经过缓存；相同的并发请求会被合并
+
+        deadline为time.monotonic()的截止时间：单次请求的超时不超过剩余时间，过了截止时间不再重试。
+        """
+        return self.single_flight.do((source_lang, target_lang, text), self._send, source_lang, target_lang, text,
+                                     deadline)
+
+    @staticmethod
+    def _remaining(deadline):
+        """距截止时间的秒数，没有截止时间时返回None；已超时抛出TranslationError"""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TranslationError("翻译超时")
+        return remaining
+
+    def _backoff(self, attempt, deadline):
+        remaining = self._remaining(deadline)
+        delay = self.limiter.backoff_delay(attempt)
+        time.sleep(delay if remaining is None else min(delay, remaining))
+
+    def _send(self, source_lang, target_lang, text, deadline=None):
+        """实际发送请求；限流、服务端错误时按退避策略重试"""
+        attempt = 0
+        while True:
+            timing = RequestTiming(len(text))
+            try:
+                self.limiter.acquire(self._remaining(deadline))
+            except CircuitOpenError as e:
+                raise TranslationError(str(e)) from e
+            except TimeoutError as e:
+                raise TranslationError("翻译超时") from e
+            remaining = self._remaining(deadline)
+            timing.mark("send")
+            try:
+                response = self.session.post(
+                    build_request_url(source_lang, target_lang, self.api_url),
+                    data=build_request_body(text),
+                    timeout=self.timeout if remaining is None else min(self.timeout, remaining)
+                )
+            except requests.RequestException as e:
+                self.limiter.record_result(None)
+                timing.error = str(e)
+                self._record(timing)
+                if attempt >= self.max_retries:
+                    raise TranslationError(f"翻译请求失败: {e}") from e
+                self._backoff(attempt, deadline)
+                attempt += 1
+                continue
+
+            status = response.status_code
+            # elapsed为发送请求到解析完响应头的时间
+            timing.mark("first_byte", timing.marks["send"] + response.elapsed.total_seconds())
+            timing.mark("finished")
+            timing.status = status
+            timing.bytes = len(response.content)
+            self.limiter.record_result(status, response.headers.get("Retry-After"))
+            if status >= 400:
+                timing.error = f"HTTP {status}"
+                self._record(timing)
+                if self.limiter.is_retryable(status) and attempt < self.max_retries:
+                    # 429/503的等待由限流器的退避时间控制，其余错误在此退避
+                    if status not in (429, 503):
+                        self._backoff(attempt, deadline)
+                    attempt += 1
+                    continue
+                raise TranslationError(f"翻译请求失败: HTTP {status}")
+
+            try:
+                result = parse_response(response.content)
+            except (ValueError, IndexError, TypeError) as e:
+                timing.error = str(e)
+                self._record(timing)
+                raise TranslationError(f"解析翻译结果出错: {e}") from e
+            timing.mark("parse_done")
+            self._record(timing)
+            return result
+
+    def _record(self, timing):
+        if self.metrics is not None:
+            self.metrics.record(timing)
+
+    def translate(self, text, source_lang, target_lang, timeout=None):
+        """翻译任意长度的文本，按分段使用缓存并分块请求；timeout为全部请求（含重试）的总超时（秒）"""
+        deadline = time.monotonic() + timeout if timeout else None
+        segments = split_segments(text)
+        translations = {}
+        if self.cache is not None:
+            for segment in segments:
+                if segment.body and segment.body not in translations:
+                    cached = self.cache.get(source_lang, target_lang, segment.body)
+                    if cached is not None:
+                        translations[segment.body] = cached
+
+        for bodies in group_missing(segments, translations):
+            translated_text = self.request(source_lang, target_lang, "\n".join(bodies), deadline)
+            mapping = split_run_translation(bodies, translated_text)
+            if mapping is None:
+                mapping = dict.fromkeys(bodies, "")
+                mapping[bodies[0]] = translated_text
+            elif self.cache is not None:
+                self.cache.put_many(source_lang, target_lang, mapping)
+            translations.update(mapping)
+        return assemble(segments, translations)
+
+    def stats(self):
+        """请求合并与限流的统计"""
+        stats = {"single_flight": self.single_flight.stats(), "rate_limiter": self.limiter.metrics()}
+        if self.metrics is not None:
+            stats["requests"] = self.metrics.summary()
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,186 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# 应用数据目录，缓存等持久化文件统一存放于此
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".googleTR")
+
+
+class TranslationCache:
+    """翻译结果缓存：内存LRU + SQLite磁盘持久化
+
+    查询顺序为 内存 -> 磁盘，磁盘命中的条目会回填到内存。
+    内存层按最近使用淘汰，磁盘层按条目数和存活时间淘汰。
+    """
+
+    def __init__(self, path=None, max_entries=2000, max_disk_entries=100000,
+                 max_age=30 * 24 * 3600):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.lock = threading.RLock()
+        self.puts_since_trim = 0
+        # 磁盘命中时的访问时间先记在内存中，随下一次写入一并提交，读取时不再每次提交
+        self.accessed = {}
+
+        # path为None时使用默认路径，为":memory:"时不落盘（便于测试）
+        if path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            path = os.path.join(DATA_DIR, "translation_cache.sqlite3")
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON translations(accessed)")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(source_lang, target_lang, text):
+        """根据语言对和原文生成缓存键"""
+        raw = f"{source_lang}\x00{target_lang}\x00{text}".encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()
+
+    def get(self, source_lang, target_lang, text):
+        """查询缓存，未命中返回None"""
+        key = self.make_key(source_lang, target_lang, text)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                translation, created = entry
+                if now - created <= self.max_age:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return translation
+                del self.memory[key]
+
+            row = self.db.execute(
+                "SELECT translation, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                translation, created = row
+                if now - created <= self.max_age:
+                    self.accessed[key] = now
+                    if len(self.accessed) >= 1000:
+                        # 长时间只读不写时也定期写入
+                        self._flush_accessed()
+                        self.db.commit()
+                    self._remember(key, translation, created)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return translation
+                # 过期条目直接删除
+                self.db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self.db.commit()
+
+            self.misses += 1
+            return None
+
+    def peek(self, source_lang, target_lang, text):
+        """查询缓存但不计入命中统计、不更新LRU顺序和访问时间（供预取判断覆盖情况），未命中返回None"""
+        key = self.make_key(source_lang, target_lang, text)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                entry = self.db.execute(
+                    "SELECT translation, created FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+        if entry is not None and now - entry[1] <= self.max_age:
+            return entry[0]
+        return None
+
+    def put(self, source_lang, target_lang, text, translation):
+        """写入缓存"""
+        self.put_many(source_lang, target_lang, {text: translation})
+
+    def put_many(self, source_lang, target_lang, mapping):
+        """写入一组 原文 -> 译文，在同一个事务中提交（一个响应的各分段只提交一次）"""
+        now = time.time()
+        rows = [(self.make_key(source_lang, target_lang, text), translation, now, now)
+                for text, translation in mapping.items()]
+        if not rows:
+            return
+        with self.lock:
+            for key, translation, _, _ in rows:
+                self._remember(key, translation, now)
+            self._flush_accessed()
+            self.db.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, created, accessed) VALUES (?, ?, ?, ?)", rows
+            )
+            self.db.commit()
+            self.puts_since_trim += len(rows)
+            if self.puts_since_trim >= 100:
+                self.trim()
+
+    def _flush_accessed(self):
+        """把积累的访问时间写入数据库（不提交，由调用方提交）"""
+        if self.accessed:
+            self.db.executemany("UPDATE translations SET accessed = ? WHERE key = ?",
+                                [(accessed, key) for key, accessed in self.accessed.items()])
+            self.accessed.clear()
+
+    def _remember(self, key, translation, created):
+        self.memory[key] = (translation, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def trim(self):
+        """按存活时间和条目数清理磁盘缓存"""
+        with self.lock:
+            self.puts_since_trim = 0
+            # 按访问时间淘汰前先写入最近的访问记录
+            self._flush_accessed()
+            self.db.execute("DELETE FROM translations WHERE created < ?", (time.time() - self.max_age,))
+            count = self.db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            excess = count - self.max_disk_entries
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM translations WHERE key IN "
+                    "(SELECT key FROM translations ORDER BY accessed ASC LIMIT ?)",
+                    (excess,)
+                )
+            self.db.commit()
+
+    def clear(self):
+        """清空全部缓存"""
+        with self.lock:
+            self.memory.clear()
+            self.accessed.clear()
+            self.db.execute("DELETE FROM translations")
+            self.db.commit()
+
+    def stats(self):
+        """返回命中统计"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    def close(self):
+        with self.lock:
+            self._flush_accessed()
+            self.db.commit()
+            self.db.close()
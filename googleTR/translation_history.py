@@ -0,0 +1,219 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import deque, namedtuple
+
+from translation_cache import DATA_DIR
+
+
+HistoryEntry = namedtuple("HistoryEntry", ["id", "created", "source_lang", "target_lang", "source", "translation"])
+
+# 距上次整理超过该时间（秒）或条目超出上限10%时再次整理
+COMPACT_INTERVAL = 24 * 3600
+# 整理时每批删除的条数和每步合并的索引页数，逐批持锁，后台整理期间界面线程的写入和搜索不会长时间等待
+COMPACT_BATCH = 500
+MERGE_PAGES = 100
+# 三字母组索引只能匹配不少于3个字符的关键词，更短的关键词直接扫描（从最新的条目开始）
+MIN_INDEXED_CHARS = 3
+
+_COLUMNS = "id, created, source_lang, target_lang, source, translation"
+_ALIASED = ", ".join("h." + column for column in _COLUMNS.split(", "))
+
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class TranslationHistory:
+    """翻译历史：只追加的SQLite日志 + FTS5三字母组全文索引
+
+    条目只插入不修改；按保留天数和条目上限定期整理（删除旧条目、合并索引、回收空间）。
+    原文和译文都可搜索，关键词按空格拆分后须全部出现。
+    """
+
+    def __init__(self, path=None, max_entries=200000, retention_days=365):
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.lock = threading.RLock()
+        self.searches = 0
+        self.latencies = deque(maxlen=1000)
+        self.last = None
+        self.closed = False
+
+        # path为None时使用默认路径，为":memory:"时不落盘（便于测试）
+        if path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            path = os.path.join(DATA_DIR, "translation_history.sqlite3")
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # 需在建表前设置，之后整理时可以逐步回收空闲页
+        self.db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL
+            )
+        """)
+        self.db.execute("CREATE TABLE IF NOT EXISTS history_meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        # 不支持FTS5三字母组分词的SQLite版本退回逐条扫描
+        try:
+            self.db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+                "source, translation, content='history', content_rowid='id', tokenize='trigram')"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        self.db.commit()
+
+    def append(self, source_lang, target_lang, source, translation, when=None):
+        """追加一条记录，与上一条完全相同时跳过；返回新条目的id或None"""
+        if not source.strip() or not translation.strip():
+            return None
+        key = (source_lang, target_lang, source, translation)
+        with self.lock:
+            if key == self.last:
+                return None
+            entry_id = self.db.execute(
+                "INSERT INTO history (created, source_lang, target_lang, source, translation) VALUES (?, ?, ?, ?, ?)",
+                (when if when is not None else time.time(), source_lang, target_lang, source, translation)
+            ).lastrowid
+            if self.fts:
+                self.db.execute("INSERT INTO history_fts (rowid, source, translation) VALUES (?, ?, ?)",
+                                (entry_id, source, translation))
+            self.db.commit()
+            self.last = key
+            return entry_id
+
+    def search(self, query, limit=50):
+        """返回包含全部关键词的条目（最新的在前）；query为空时返回最近的条目"""
+        started = time.perf_counter()
+        terms = query.split()
+        indexed = [term for term in terms if len(term) >= MIN_INDEXED_CHARS] if self.fts else []
+        scanned = [term for term in terms if term not in indexed]
+        sql = f"SELECT {_ALIASED} FROM history h"
+        params = []
+        conditions = []
+        if indexed:
+            # 短语查询即子串匹配；按rowid倒序由索引直接给出最新的结果
+            match = " AND ".join('"' + term.replace('"', '""') + '"' for term in indexed)
+            sql = f"SELECT {_ALIASED} FROM history_fts f CROSS JOIN history h ON h.id = f.rowid"
+            conditions.append("history_fts MATCH ?")
+            params.append(match)
+        for term in scanned:
+            conditions.append("(h.source LIKE ? ESCAPE '\\' OR h.translation LIKE ? ESCAPE '\\')")
+            params.extend([_like_pattern(term)] * 2)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {'f.rowid' if indexed else 'h.id'} DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+            self.searches += 1
+            self.latencies.append((time.perf_counter() - started) * 1000)
+        return [HistoryEntry(*row) for row in rows]
+
+    def get(self, entry_id):
+        with self.lock:
+            row = self.db.execute(f"SELECT {_COLUMNS} FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return HistoryEntry(*row) if row else None
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def needs_compaction(self, now=None):
+        now = now if now is not None else time.time()
+        with self.lock:
+            if self.closed:
+                return False
+            row = self.db.execute("SELECT value FROM history_meta WHERE key = 'compacted'").fetchone()
+            if row is None or now - row[0] > COMPACT_INTERVAL:
+                return True
+            return self.count() > self.max_entries * 1.1
+
+    def compact(self, now=None):
+        """删除超过保留天数和条目上限的旧记录，合并全文索引并回收空间；返回删除的条数"""
+        now = now if now is not None else time.time()
+        cutoff = now - self.retention_days * 24 * 3600
+        with self.lock:
+            if self.closed:
+                return 0
+            # 超出上限时保留最新的max_entries条
+            row = self.db.execute("SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                  (self.max_entries,)).fetchone()
+        oldest_kept = row[0] + 1 if row else 0
+        removed = 0
+        while True:
+            with self.lock:
+                # 后台整理期间可能已关闭
+                if self.closed:
+                    return removed
+                ids = [entry_id for entry_id, in self.db.execute(
+                    "SELECT id FROM history WHERE created < ? OR id < ? ORDER BY id LIMIT ?",
+                    (cutoff, oldest_kept, COMPACT_BATCH))]
+                if not ids:
+                    break
+                marks = ", ".join("?" * len(ids))
+                if self.fts:
+                    # 外部内容索引需在删除原记录之前删除，以便读出旧内容
+                    self.db.execute(f"DELETE FROM history_fts WHERE rowid IN ({marks})", ids)
+                self.db.execute(f"DELETE FROM history WHERE id IN ({marks})", ids)
+                self.db.commit()
+                removed += len(ids)
+        while self.fts:
+            # 逐步合并索引段，没有可合并的内容时total_changes不再变化
+            with self.lock:
+                if self.closed:
+                    return removed
+                changes = self.db.total_changes
+                self.db.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('merge', ?)", (MERGE_PAGES,))
+                self.db.commit()
+                if self.db.total_changes - changes < 2:
+                    break
+        with self.lock:
+            if self.closed:
+                return removed
+            self.db.execute("INSERT OR REPLACE INTO history_meta (key, value) VALUES ('compacted', ?)", (now,))
+            self.db.commit()
+            self.db.execute("PRAGMA incremental_vacuum")
+            self.db.commit()
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM history")
+            if self.fts:
+                self.db.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+            self.db.commit()
+            self.db.execute("PRAGMA incremental_vacuum")
+            self.last = None
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            page_count = self.db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+            row = self.db.execute("SELECT value FROM history_meta WHERE key = 'compacted'").fetchone()
+            return {
+                "entries": self.count(),
+                "size_bytes": page_count * page_size,
+                "full_text_index": self.fts,
+                "searches": self.searches,
+                "search_mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "search_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+                "last_compacted": time.strftime("%Y-%m-%d %H:%M", time.localtime(row[0])) if row else None,
+            }
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.db.close()
@@ -0,0 +1,276 @@
+import os
+import re
+import time
+import zlib
+import random
+import queue
+import sqlite3
+import hashlib
+import threading
+from collections import deque
+
+from translation_cache import DATA_DIR
+
+
+# MinHash签名长度与LSH分带：8个带、每带2行，相似度0.7的条目约99.5%概率成为候选
+NUM_PERM = 16
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+NUMBER = re.compile(r"\d+(?:[.,:]\d+)*")
+SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    """小写、合并空白、数字统一替换为0，模板化文本中只有数字不同的变体视为相同"""
+    return NUMBER.sub("0", SPACES.sub(" ", text.strip().lower()))
+
+
+def shingles(text):
+    """字符n-gram集合（text已规范化）"""
+    if len(text) <= SHINGLE:
+        return {text}
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def band_keys(source_lang, target_lang, grams):
+    """MinHash签名按带切分后的索引键（带符号64位整数，便于存入SQLite）"""
+    hashes = [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+    signature = [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    keys = []
+    for band in range(BANDS):
+        raw = f"{source_lang}\x00{target_lang}\x00{band}\x00{signature[band * ROWS:(band + 1) * ROWS]}"
+        digest = hashlib.blake2b(raw.encode("ascii", "replace"), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def transfer_numbers(source, match_source, match_translation):
+    """原文与记忆条目只有数字不同时，把译文中的旧数字替换为新数字；无法对应时返回None"""
+    new_numbers = NUMBER.findall(source)
+    old_numbers = NUMBER.findall(match_source)
+    if new_numbers == old_numbers:
+        return match_translation
+    if len(new_numbers) != len(old_numbers) or NUMBER.sub("0", source) != NUMBER.sub("0", match_source):
+        return None
+    # 每个旧数字在译文中恰好出现一次时才能安全替换
+    pieces = NUMBER.split(match_translation)
+    found = NUMBER.findall(match_translation)
+    if sorted(found) != sorted(old_numbers) or len(set(old_numbers)) != len(old_numbers):
+        return None
+    mapping = dict(zip(old_numbers, new_numbers))
+    result = [pieces[0]]
+    for number, piece in zip(found, pieces[1:]):
+        result.append(mapping[number])
+        result.append(piece)
+    return "".join(result)
+
+
+class TranslationMemory:
+    """模糊翻译记忆：以字符n-gram的MinHash + LSH分带索引历史译文，查找最相近的原文分段
+
+    条目和分带索引存放在SQLite中，查询只读取候选条目，不需要在启动时载入全部记忆。
+    """
+
+    def __init__(self, path=None, threshold=0.7, max_entries=50000, min_chars=4, max_candidates=10):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.min_chars = min_chars
+        self.max_candidates = max_candidates
+        self.lock = threading.RLock()
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.latencies = deque(maxlen=1000)
+        self.puts_since_trim = 0
+
+        # path为None时使用默认路径，为":memory:"时不落盘（便于测试）
+        if path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            path = os.path.join(DATA_DIR, "translation_memory.sqlite3")
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                updated REAL NOT NULL,
+                UNIQUE (source_lang, target_lang, source)
+            )
+        """)
+        self.db.execute("CREATE TABLE IF NOT EXISTS bands (band_key INTEGER NOT NULL, entry_id INTEGER NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_band_key ON bands(band_key)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_band_entry ON bands(entry_id)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_updated ON entries(updated)")
+        self.db.commit()
+
+    def add(self, source_lang, target_lang, source, translation):
+        """记录一条译文（原文相同的条目直接覆盖）"""
+        self.add_many(source_lang, target_lang, {source: translation})
+
+    def add_many(self, source_lang, target_lang, mapping):
+        """记录一组 原文 -> 译文，在同一个事务中提交"""
+        items = [(source, translation, band_keys(source_lang, target_lang, shingles(normalize(source))))
+                 for source, translation in mapping.items()
+                 if len(source) >= self.min_chars and translation]
+        if not items:
+            return
+        with self.lock:
+            for source, translation, keys in items:
+                self._insert(source_lang, target_lang, source, translation, keys)
+            self.db.commit()
+            self.puts_since_trim += len(items)
+            if self.puts_since_trim >= 500:
+                self.trim()
+
+    def _insert(self, source_lang, target_lang, source, translation, keys):
+        row = self.db.execute(
+            "SELECT id FROM entries WHERE source_lang = ? AND target_lang = ? AND source = ?",
+            (source_lang, target_lang, source)
+        ).fetchone()
+        if row is not None:
+            self.db.execute("UPDATE entries SET translation = ?, updated = ? WHERE id = ?",
+                            (translation, time.time(), row[0]))
+        else:
+            entry_id = self.db.execute(
+                "INSERT INTO entries (source_lang, target_lang, source, translation, updated) VALUES (?, ?, ?, ?, ?)",
+                (source_lang, target_lang, source, translation, time.time())
+            ).lastrowid
+            self.db.executemany("INSERT INTO bands (band_key, entry_id) VALUES (?, ?)",
+                                [(key, entry_id) for key in keys])
+
+    def lookup(self, source_lang, target_lang, source):
+        """查找相似度不低于阈值的最相近条目，返回 (译文, 相似度, 记忆中的原文) 或None
+
+        只有数字不同的条目会把译文中的数字替换为新原文中的数字。
+        """
+        started = time.perf_counter()
+        try:
+            if len(source) < self.min_chars:
+                return None
+            grams = shingles(normalize(source))
+            keys = band_keys(source_lang, target_lang, grams)
+            with self.lock:
+                self.lookups += 1
+                # 先按分带索引取候选编号，再按主键读取条目（CROSS JOIN固定连接顺序）
+                rows = self.db.execute(
+                    f"SELECT e.source, e.translation FROM "
+                    f"(SELECT DISTINCT entry_id FROM bands WHERE band_key IN ({','.join('?' * len(keys))}) LIMIT ?) AS c "
+                    f"CROSS JOIN entries e ON e.id = c.entry_id "
+                    f"WHERE e.source_lang = ? AND e.target_lang = ?",
+                    (*keys, self.max_candidates, source_lang, target_lang)
+                ).fetchall()
+                best = None
+                for match_source, match_translation in rows:
+                    score = jaccard(grams, shingles(normalize(match_source)))
+                    if score >= self.threshold and (best is None or score > best[1]):
+                        best = (match_source, score, match_translation)
+                if best is None:
+                    return None
+                match_source, score, match_translation = best
+                translation = transfer_numbers(source, match_source, match_translation)
+                if translation is None:
+                    translation = match_translation
+                self.hits += 1
+                if match_source == source:
+                    self.exact_hits += 1
+                return translation, score, match_source
+        finally:
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+    def trim(self):
+        """超过条目上限时删除最久未更新的条目及其索引"""
+        with self.lock:
+            self.puts_since_trim = 0
+            count = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY updated ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.db.execute("DELETE FROM bands WHERE entry_id NOT IN (SELECT id FROM entries)")
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM bands")
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            entries = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "entries": entries,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "lookup_mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "lookup_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+            }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class MemoryWriter:
+    """翻译记忆的后台写入：MinHash/LSH索引和SQLite提交在单独的线程中按顺序进行，调用方只负责排队
+
+    接口与TranslationMemory.add_many一致，可直接代替它传给parse_and_store。
+    """
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.queue = queue.Queue()
+        self.written = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self.thread.start()
+
+    def add_many(self, source_lang, target_lang, mapping):
+        self.queue.put((source_lang, target_lang, dict(mapping)))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.memory.add_many(*item)
+                self.written += 1
+            except sqlite3.Error:
+                self.errors += 1
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """等待已排队的条目全部写入"""
+        self.queue.join()
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def close(self):
+        """写完已排队的条目后结束线程，需在关闭翻译记忆之前调用"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()